@@ -0,0 +1,167 @@
+"""Throughput of concurrent pipeline runs with and without the resource scheduler.
+
+For each concurrency level (default 1, 2, 4, 8) and each scheduler setting,
+N spawned processes stand in for N busy job workers. They load the models,
+wait at a barrier, then each run --jobs-per-worker full pipelines
+(extract -> transcribe -> translate -> SRT -> burn) on the same fixture.
+Reported per case:
+
+  wall_seconds     first start to last finish
+  jobs_per_minute  completed pipelines / wall time
+  mean_latency_s   average time for one pipeline
+  speedup          jobs_per_minute with the scheduler / without it
+
+Every process holds its own models, so memory grows with concurrency
+(roughly 1.5-2 GB each with the default models); use --whisper tiny on
+small machines. Runs offline like pipeline_bench.py:
+
+    python benchmarks/concurrency_bench.py --concurrency 1,2,4,8 --seconds 30
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+from pipeline_bench import DEFAULT_FIXTURES, environment, make_tone_fixture
+
+
+def _worker(index, fixture, workdir, jobs, burn_mode, barrier, conn):
+    try:
+        sys.path.insert(0, BACKEND_DIR)
+        from utils.resources import scheduler
+        scheduler.pin_worker(index)
+        from utils.models import registry
+        from utils.pipeline import run_pipeline
+        registry.whisper()
+        registry.translation()
+        barrier.wait()
+
+        latencies = []
+        started = time.time()
+        for j in range(jobs):
+            file_id = f"w{index}_{j}"
+            video = os.path.join(workdir, f"{file_id}.mp4")
+            shutil.copyfile(fixture, video)
+            t0 = time.perf_counter()
+            run_pipeline(file_id, video, "french", "english", burn=True, burn_mode=burn_mode)
+            latencies.append(time.perf_counter() - t0)
+        conn.send({"started": started, "finished": time.time(), "latencies": latencies})
+    except Exception as e:
+        barrier.abort()
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def _migrate():
+    sys.path.insert(0, BACKEND_DIR)
+    from utils.db import db, migrate
+    migrate(db)
+
+
+def run_case(concurrency, scheduler_on, fixture, args):
+    workdir = tempfile.mkdtemp(prefix="subtitle_conc_")
+    os.environ.update({
+        "RESOURCE_SCHEDULER": "true" if scheduler_on else "false",
+        "UPLOAD_DIR": workdir,
+        "OUTPUT_DIR": workdir,
+        "DB_PATH": os.path.join(workdir, "bench.db"),
+        "SCHEDULER_LOCK_DIR": os.path.join(workdir, "slots"),
+    })
+    ctx = multiprocessing.get_context("spawn")
+    # Migrate once up front so the workers don't race on the schema
+    migration = ctx.Process(target=_migrate)
+    migration.start()
+    migration.join()
+    barrier = ctx.Barrier(concurrency)
+    procs, pipes = [], []
+    for i in range(concurrency):
+        parent, child = ctx.Pipe(duplex=False)
+        p = ctx.Process(target=_worker,
+                        args=(i, fixture, workdir, args.jobs_per_worker, args.burn_mode, barrier, child))
+        p.start()
+        child.close()
+        procs.append(p)
+        pipes.append(parent)
+    results = []
+    for parent in pipes:
+        try:
+            results.append(parent.recv())
+        except EOFError:
+            results.append({"error": "worker process exited"})
+    for p in procs:
+        p.join()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    errors = [r["error"] for r in results if "error" in r]
+    if errors:
+        return {"error": errors[0]}
+    wall = max(r["finished"] for r in results) - min(r["started"] for r in results)
+    latencies = [l for r in results for l in r["latencies"]]
+    return {
+        "wall_seconds": round(wall, 2),
+        "jobs": len(latencies),
+        "jobs_per_minute": round(len(latencies) / wall * 60, 2),
+        "mean_latency_s": round(statistics.mean(latencies), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,2,4,8")
+    parser.add_argument("--seconds", type=int, default=30, help="length of the synthetic fixture")
+    parser.add_argument("--clip", help="use this local clip instead of the synthetic fixture")
+    parser.add_argument("--jobs-per-worker", type=int, default=1)
+    parser.add_argument("--burn-mode", default="hard")
+    parser.add_argument("--whisper", default=os.getenv("WHISPER_MODEL", "small"))
+    parser.add_argument("--vad", default="energy")
+    parser.add_argument("--model-cache", default=os.getenv("HF_HOME", os.path.expanduser("~/.cache/huggingface")))
+    parser.add_argument("--output", help="also write the results JSON here")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "HF_HOME": args.model_cache,
+        "HF_HUB_OFFLINE": "1",
+        "TRANSFORMERS_OFFLINE": "1",
+        "CUDA_VISIBLE_DEVICES": "",
+        "CACHE_ENABLED": "false",
+        "TRANSLATION_MEMORY": "false",
+        "LOG_JSON": "false",
+        "VAD_MODE": args.vad,
+        "WHISPER_MODEL": args.whisper,
+        "PREWARM_MODELS": "",
+    })
+    if args.clip:
+        fixture = os.path.abspath(args.clip)
+    else:
+        os.makedirs(DEFAULT_FIXTURES, exist_ok=True)
+        fixture = make_tone_fixture(os.path.join(DEFAULT_FIXTURES, f"tone_{args.seconds}s.mp4"), args.seconds)
+
+    results = {}
+    for n in [int(x) for x in args.concurrency.split(",") if x.strip()]:
+        for scheduler_on in (False, True):
+            key = f"{n}/{'scheduler' if scheduler_on else 'unmanaged'}"
+            print(f"[CONC] {key} ...", flush=True)
+            results[key] = run_case(n, scheduler_on, fixture, args)
+            print(f"[CONC] {key}: {results[key]}", flush=True)
+        off, on = results[f"{n}/unmanaged"], results[f"{n}/scheduler"]
+        if "error" not in off and "error" not in on:
+            on["speedup"] = round(on["jobs_per_minute"] / off["jobs_per_minute"], 2)
+            print(f"[CONC] {n} concurrent: {on['speedup']}x throughput with the scheduler")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(), "fixture": fixture, "results": results}, f, indent=2)
+    return 1 if any("error" in r for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
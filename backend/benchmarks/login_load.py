@@ -0,0 +1,110 @@
+"""Login throughput load test.
+
+Registers a throwaway user, then fires concurrent POST /login requests and
+reports requests/second and latency percentiles. /health is probed during
+the burst to show whether the event loop stays responsive.
+
+Run it against a server started from each revision to compare, e.g.:
+
+    python benchmarks/login_load.py --url http://localhost:8000 --requests 400 --concurrency 32
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+def post_form(url, fields, timeout=30):
+    data = urllib.parse.urlencode(fields).encode()
+    req = urllib.request.Request(url, data=data, method="POST")
+    req.add_header("Content-Type", "application/x-www-form-urlencoded")
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as res:
+            return res.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    status = fn(*args)
+    return status, time.perf_counter() - started
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def probe_health(url, stop, latencies):
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            urllib.request.urlopen(f"{url}/health", timeout=30).read()
+            latencies.append(time.perf_counter() - started)
+        except Exception:
+            latencies.append(float("inf"))
+        time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args()
+
+    email = f"loadtest-{uuid.uuid4().hex[:8]}@example.com"
+    password = "load-test-password"
+    post_form(f"{args.url}/register", {"email": email, "password": password})
+
+    stop = threading.Event()
+    health = []
+    prober = threading.Thread(target=probe_health, args=(args.url, stop, health), daemon=True)
+    prober.start()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(
+            lambda _: timed(post_form, f"{args.url}/login", {"email": email, "password": password}),
+            range(args.requests),
+        ))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    prober.join()
+
+    ok = [lat for status, lat in results if status == 200]
+    statuses = {}
+    for status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    finite_health = [h for h in health if h != float("inf")]
+    report = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "successful_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "statuses": statuses,
+        "login_p50_ms": round(statistics.median(ok) * 1000, 1) if ok else None,
+        "login_p99_ms": round(percentile(ok, 99) * 1000, 1) if ok else None,
+        "health_p99_ms": round(percentile(finite_health, 99) * 1000, 1) if finite_health else None,
+        "health_failures": len(health) - len(finite_health),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print(f"{key:>18}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""Offline benchmark for extract -> transcribe -> translate -> SRT -> burn.
+
+Generates deterministic fixtures with ffmpeg (testsrc2 video plus a gated
+sine tone so VAD sees regular "speech" bursts), optionally adds real clips
+passed with --clip. It then times every stage in a fresh process, so peak
+RSS belongs to that stage alone:
+
+  extract      extract_audio() to a 16 kHz mono WAV
+  transcribe   translate_text() with source == target (Whisper only)
+  translate    translate_batch() over a fixed set of English sentences -> French
+  srt          generate_srt() for a synthetic cue list sized to the fixture
+  burn         burn_subtitles() in --burn-mode
+  end_to_end   run_pipeline() with burn enabled
+
+Models load before the timer starts. Everything runs on CPU with Hugging
+Face in offline mode, reading models from --model-cache. Fill the cache
+once while online, e.g.
+
+    HF_HOME=~/.cache/subtitle-bench python -c "from utils.models import registry; registry.whisper(); registry.translation()"
+
+Compare against a stored baseline and fail on regressions:
+
+    python benchmarks/pipeline_bench.py --update-baseline      # record
+    python benchmarks/pipeline_bench.py                        # compare, exit 1 if slower
+
+The result cache and translation memory are disabled. Chunked
+transcription runs in pool processes that are not reaped per stage, so
+their CPU time is not counted; pass --no-chunked for full CPU accounting.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, "benchmarks", "baseline.json")
+DEFAULT_FIXTURES = os.path.join(BACKEND_DIR, "benchmarks", "fixtures")
+STAGES = ("extract", "transcribe", "translate", "srt", "burn", "end_to_end")
+
+SENTENCES = [
+    "The meeting starts at nine tomorrow morning.",
+    "Please remember to bring the quarterly report.",
+    "We have finished the first part of the project.",
+    "The weather was much better than we expected.",
+    "Can you send me the address of the new office?",
+    "Our team will present the results next week.",
+    "This video explains how the system works.",
+    "Thank you all for coming here today.",
+]
+
+
+# ---------- fixtures ----------
+def make_tone_fixture(path, seconds):
+    """Write a deterministic test clip: testsrc2 video with 2.5s tone / 1.5s silence audio."""
+    import ffmpeg
+    if os.path.exists(path):
+        return path
+    video = ffmpeg.input(f"testsrc2=size=640x360:rate=25:duration={seconds}", f="lavfi")
+    audio = (
+        ffmpeg
+        .input(f"sine=frequency=220:sample_rate=48000:duration={seconds}", f="lavfi")
+        .filter("volume", "if(lt(mod(t,4),2.5),0.5,0)", eval="frame")
+    )
+    tmp = path + ".tmp.mp4"
+    (
+        ffmpeg
+        .output(video, audio, tmp, vcodec="libx264", preset="ultrafast", pix_fmt="yuv420p",
+                g=50, threads=1, acodec="aac", t=seconds)
+        .overwrite_output()
+        .run(quiet=True)
+    )
+    os.replace(tmp, path)
+    return path
+
+
+def probe_seconds(path):
+    import ffmpeg
+    return float(ffmpeg.probe(path)["format"]["duration"])
+
+
+def synthetic_cues(seconds):
+    cues = []
+    t = 0.0
+    i = 0
+    while t < seconds:
+        cues.append({"start": t, "end": t + 2.0, "text": SENTENCES[i % len(SENTENCES)]})
+        t += 2.5
+        i += 1
+    return cues
+
+
+# ---------- measurement (runs in a child process) ----------
+def _usage():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return cpu, max(own.ru_maxrss, children.ru_maxrss) * scale
+
+
+def _prepare(stage, fixture, workdir):
+    """Load what the stage needs and return a zero-argument callable to time."""
+    sys.path.insert(0, BACKEND_DIR)
+    from utils.db import db, migrate
+    migrate(db)
+    from utils.models import registry
+
+    video = fixture["path"]
+    wav = os.path.join(workdir, f"{fixture['name']}.wav")
+    srt_path = os.path.join(workdir, f"{fixture['name']}.srt")
+
+    if stage == "extract":
+        from utils.audio import extract_audio
+        return lambda: extract_audio(video, wav)
+
+    if stage == "transcribe":
+        from utils.audio import extract_audio
+        from utils.translate import translate_text
+        extract_audio(video, wav)
+        registry.whisper()
+        return lambda: translate_text(wav, "english", "english")
+
+    if stage == "translate":
+        from utils.translate import translate_batch
+        tokenizer, model = registry.translation()
+        texts = [c["text"] for c in synthetic_cues(fixture["seconds"])]
+        return lambda: translate_batch(texts, tokenizer, model, "en", "fr")
+
+    if stage == "srt":
+        from utils.subtitles import generate_srt
+        cues = synthetic_cues(fixture["seconds"])
+        return lambda: generate_srt(cues, srt_path)
+
+    if stage == "burn":
+        from utils.subtitles import generate_srt
+        from utils.burn import burn_subtitles
+        generate_srt(synthetic_cues(fixture["seconds"]), srt_path)
+        out = os.path.join(workdir, f"{fixture['name']}_burned.mp4")
+        return lambda: burn_subtitles(video, srt_path, out, mode=fixture["burn_mode"])
+
+    if stage == "end_to_end":
+        import shutil
+        from utils.pipeline import run_pipeline
+        registry.whisper()
+        registry.translation()
+        copy = os.path.join(workdir, f"{fixture['name']}_e2e.mp4")
+        shutil.copyfile(video, copy)
+        return lambda: run_pipeline(f"{fixture['name']}_e2e", copy, "french", "english", burn=True,
+                                    burn_mode=fixture["burn_mode"])
+
+    raise ValueError(f"Unknown stage {stage}")
+
+
+def _child(stage, fixture, workdir, conn):
+    try:
+        fn = _prepare(stage, fixture, workdir)
+        cpu0, _ = _usage()
+        started = time.perf_counter()
+        fn()
+        wall = time.perf_counter() - started
+        cpu1, peak = _usage()
+        conn.send({"wall_seconds": wall, "cpu_seconds": cpu1 - cpu0, "peak_rss_bytes": peak})
+    except Exception as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def measure(stage, fixture, workdir):
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe(duplex=False)
+    p = ctx.Process(target=_child, args=(stage, fixture, workdir, child))
+    p.start()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        result = {"error": f"stage process exited with code {p.exitcode}"}
+    p.join()
+    return result
+
+
+def run_case(stage, fixture, workdir, repeat):
+    runs = []
+    for _ in range(repeat):
+        r = measure(stage, fixture, workdir)
+        if "error" in r:
+            return r
+        runs.append(r)
+    wall = statistics.median(r["wall_seconds"] for r in runs)
+    return {
+        "wall_seconds": round(wall, 4),
+        "cpu_seconds": round(statistics.median(r["cpu_seconds"] for r in runs), 4),
+        "peak_rss_bytes": max(r["peak_rss_bytes"] for r in runs),
+        "realtime_factor": round(wall / fixture["seconds"], 4) if fixture["seconds"] else None,
+        "runs": repeat,
+    }
+
+
+# ---------- baseline ----------
+def environment():
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return a list of regression messages (wall time or peak RSS above threshold)."""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get("results", {}).get(key)
+        if not base or "error" in current or "error" in base:
+            continue
+        for metric in ("wall_seconds", "peak_rss_bytes"):
+            if base.get(metric) and current[metric] > base[metric] * (1 + threshold):
+                change = (current[metric] / base[metric] - 1) * 100
+                regressions.append(f"{key} {metric}: {base[metric]} -> {current[metric]} (+{change:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", default="10,30,60", help="comma-separated synthetic clip lengths in seconds")
+    parser.add_argument("--clip", action="append", default=[], help="extra local clip to benchmark (repeatable)")
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the median is reported")
+    parser.add_argument("--burn-mode", default="hard")
+    parser.add_argument("--vad", default="energy", help="VAD_MODE for the run (silero ignores pure tones)")
+    parser.add_argument("--no-chunked", action="store_true", help="disable chunked transcription")
+    parser.add_argument("--decoding", default="balanced", help="Whisper decoding profile (fast/balanced/accurate/adaptive)")
+    parser.add_argument("--model-cache", default=os.getenv("HF_HOME", os.path.expanduser("~/.cache/huggingface")))
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--output", help="also write the results JSON here")
+    args = parser.parse_args()
+
+    # Child processes inherit this environment (and with it utils.config)
+    workdir = tempfile.mkdtemp(prefix="subtitle_bench_")
+    os.environ.update({
+        "HF_HOME": args.model_cache,
+        "HF_HUB_OFFLINE": "1",
+        "TRANSFORMERS_OFFLINE": "1",
+        "CUDA_VISIBLE_DEVICES": "",
+        "CACHE_ENABLED": "false",
+        "TRANSLATION_MEMORY": "false",
+        "LOG_JSON": "false",
+        "VAD_MODE": args.vad,
+        "DECODING_PROFILE": args.decoding,
+        "UPLOAD_DIR": workdir,
+        "OUTPUT_DIR": workdir,
+        "DB_PATH": os.path.join(workdir, "bench.db"),
+    })
+    if args.no_chunked:
+        os.environ["CHUNKED_TRANSCRIPTION"] = "false"
+
+    os.makedirs(args.fixtures, exist_ok=True)
+    fixtures = []
+    for d in [int(x) for x in args.durations.split(",") if x.strip()]:
+        path = make_tone_fixture(os.path.join(args.fixtures, f"tone_{d}s.mp4"), d)
+        fixtures.append({"name": f"tone_{d}s", "path": path, "seconds": float(d)})
+    for clip in args.clip:
+        name = os.path.splitext(os.path.basename(clip))[0]
+        fixtures.append({"name": name, "path": os.path.abspath(clip), "seconds": probe_seconds(clip)})
+    for f in fixtures:
+        f["burn_mode"] = args.burn_mode
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    results = {}
+    for fixture in fixtures:
+        for stage in stages:
+            key = f"{stage}/{fixture['name']}"
+            print(f"[BENCH] {key} ...", flush=True)
+            results[key] = run_case(stage, fixture, workdir, args.repeat)
+            print(f"[BENCH] {key}: {results[key]}", flush=True)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": environment(),
+        "settings": {"vad": args.vad, "decoding": args.decoding, "burn_mode": args.burn_mode,
+                     "chunked": not args.no_chunked, "repeat": args.repeat},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[BENCH] Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"[BENCH] No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != report["environment"]:
+        print(f"[BENCH] Warning: baseline recorded on {baseline.get('environment')}")
+    regressions = compare(results, baseline, args.threshold)
+    failed = [k for k, v in results.items() if "error" in v]
+    for msg in regressions:
+        print(f"[BENCH] REGRESSION {msg}")
+    for key in failed:
+        print(f"[BENCH] FAILED {key}: {results[key]['error']}")
+    if regressions or failed:
+        return 1
+    print(f"[BENCH] No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""Compare translation backends on a fixed local test set.
+
+Runs every backend in its own spawned process, so memory figures are not
+mixed. The model loads before timing starts. For each backend it reports:
+
+  load_seconds      time to load the model and tokenizer
+  model_rss_bytes   resident memory added by loading
+  peak_rss_bytes    peak RSS of the process, translation included
+  sentences_per_s   throughput of translate_batch() over the test set (median of --repeat)
+  tokens_per_s      the same in source tokens
+  bleu              corpus BLEU against the reference translations
+  drift_bleu        BLEU of this backend's output with the first backend's output
+                    as the reference (100 = identical), plus exact_match
+
+Runs fully offline from --model-cache. Convert the CTranslate2 model first:
+
+    HF_HOME=~/.cache/subtitle-bench python -m utils.translation_backends convert
+    python benchmarks/translation_compare.py --backends torch,ctranslate2
+
+The built-in test set is English -> French. Use --test-set for a tab-separated
+"source<TAB>reference" file and --src/--tgt for its languages.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TEST_SET = [
+    ("The meeting starts at nine tomorrow morning.", "La réunion commence demain matin à neuf heures."),
+    ("Please remember to bring the quarterly report.", "N'oubliez pas d'apporter le rapport trimestriel."),
+    ("We have finished the first part of the project.", "Nous avons terminé la première partie du projet."),
+    ("The weather was much better than we expected.", "Le temps était bien meilleur que prévu."),
+    ("Can you send me the address of the new office?", "Pouvez-vous m'envoyer l'adresse du nouveau bureau ?"),
+    ("Our team will present the results next week.", "Notre équipe présentera les résultats la semaine prochaine."),
+    ("This video explains how the system works.", "Cette vidéo explique comment fonctionne le système."),
+    ("Thank you all for coming here today.", "Merci à tous d'être venus aujourd'hui."),
+    ("I don't think we have enough time.", "Je ne pense pas que nous ayons assez de temps."),
+    ("The train was late again this morning.", "Le train était encore en retard ce matin."),
+    ("She opened the window to let in some fresh air.", "Elle a ouvert la fenêtre pour laisser entrer de l'air frais."),
+    ("Where did you put the keys?", "Où as-tu mis les clés ?"),
+    ("The children are playing in the garden.", "Les enfants jouent dans le jardin."),
+    ("He has been working here for ten years.", "Il travaille ici depuis dix ans."),
+    ("We need to buy milk, bread and eggs.", "Nous devons acheter du lait, du pain et des œufs."),
+    ("The museum is closed on Mondays.", "Le musée est fermé le lundi."),
+    ("Could you speak a little more slowly, please?", "Pourriez-vous parler un peu plus lentement, s'il vous plaît ?"),
+    ("The price of the tickets has gone up.", "Le prix des billets a augmenté."),
+    ("My brother lives in a small village near the sea.", "Mon frère habite dans un petit village près de la mer."),
+    ("It is important to drink enough water every day.", "Il est important de boire assez d'eau chaque jour."),
+    ("The doctor said I should rest for a few days.", "Le médecin a dit que je devais me reposer quelques jours."),
+    ("They decided to cancel the concert because of the rain.", "Ils ont décidé d'annuler le concert à cause de la pluie."),
+    ("Turn left at the end of the street.", "Tournez à gauche au bout de la rue."),
+    ("This book was translated into many languages.", "Ce livre a été traduit dans de nombreuses langues."),
+]
+
+
+# ---------- BLEU (corpus level, 4-gram, brevity penalty; no smoothing) ----------
+def _tokens(text):
+    out, word = [], ""
+    for ch in text.lower():
+        if ch.isalnum():
+            word += ch
+            continue
+        if word:
+            out.append(word)
+            word = ""
+        if not ch.isspace():
+            out.append(ch)
+    if word:
+        out.append(word)
+    return out
+
+
+def corpus_bleu(hypotheses, references, max_n=4):
+    """BLEU in [0, 100] over parallel lists of strings (simple tokenizer, one reference each)."""
+    matches = [0] * max_n
+    totals = [0] * max_n
+    hyp_len = ref_len = 0
+    for hyp, ref in zip(hypotheses, references):
+        h, r = _tokens(hyp), _tokens(ref)
+        hyp_len += len(h)
+        ref_len += len(r)
+        for n in range(1, max_n + 1):
+            h_ngrams = Counter(tuple(h[i:i + n]) for i in range(len(h) - n + 1))
+            r_ngrams = Counter(tuple(r[i:i + n]) for i in range(len(r) - n + 1))
+            matches[n - 1] += sum(min(c, r_ngrams[g]) for g, c in h_ngrams.items())
+            totals[n - 1] += max(0, len(h) - n + 1)
+    if hyp_len == 0 or min(matches) == 0:
+        return 0.0
+    log_precision = sum(math.log(m / t) for m, t in zip(matches, totals)) / max_n
+    brevity = 1.0 if hyp_len > ref_len else math.exp(1 - ref_len / hyp_len)
+    return round(100 * brevity * math.exp(log_precision), 2)
+
+
+# ---------- measurement (runs in a child process) ----------
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+
+def _peak_rss():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _child(backend, name, sources, src, tgt, repeat, conn):
+    try:
+        sys.path.insert(0, BACKEND_DIR)
+        from utils.models import registry
+        from utils.translate import translate_batch
+
+        rss_before = _rss_bytes()
+        started = time.perf_counter()
+        tokenizer, model = registry.translation(name, backend)
+        load_seconds = time.perf_counter() - started
+        rss_after = _rss_bytes()
+
+        tokenizer.src_lang = src
+        source_tokens = sum(len(ids) for ids in tokenizer(sources)["input_ids"])
+        translate_batch(sources[:2], tokenizer, model, src, tgt)  # warm-up
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            outputs = translate_batch(sources, tokenizer, model, src, tgt)
+            timings.append(time.perf_counter() - started)
+        seconds = statistics.median(timings)
+        conn.send({
+            "load_seconds": round(load_seconds, 3),
+            "model_rss_bytes": (rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+            "peak_rss_bytes": _peak_rss(),
+            "seconds": round(seconds, 4),
+            "sentences_per_s": round(len(sources) / seconds, 2),
+            "tokens_per_s": round(source_tokens / seconds, 1),
+            "outputs": outputs,
+        })
+    except Exception as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def measure(backend, name, sources, src, tgt, repeat):
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe(duplex=False)
+    p = ctx.Process(target=_child, args=(backend, name, sources, src, tgt, repeat, child))
+    p.start()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        result = {"error": f"backend process exited with code {p.exitcode}"}
+    p.join()
+    return result
+
+
+def load_test_set(path):
+    pairs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                source, _, reference = line.rstrip("\n").partition("\t")
+                pairs.append((source, reference))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="torch,ctranslate2",
+                        help="comma-separated; the first is the drift reference")
+    parser.add_argument("--model", default=os.getenv("TRANSLATION_MODEL", "facebook/m2m100_418M"))
+    parser.add_argument("--test-set", help="TSV file of source<TAB>reference lines (default: built-in en->fr)")
+    parser.add_argument("--src", default="en")
+    parser.add_argument("--tgt", default="fr")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes per backend; the median is reported")
+    parser.add_argument("--model-cache", default=os.getenv("HF_HOME", os.path.expanduser("~/.cache/huggingface")))
+    parser.add_argument("--output", help="also write the results JSON here")
+    parser.add_argument("--show", action="store_true", help="print every translation")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "HF_HOME": args.model_cache,
+        "HF_HUB_OFFLINE": "1",
+        "TRANSFORMERS_OFFLINE": "1",
+        "CUDA_VISIBLE_DEVICES": "",
+        "LOG_JSON": "false",
+    })
+    pairs = load_test_set(args.test_set) if args.test_set else TEST_SET
+    sources = [s for s, _ in pairs]
+    references = [r for _, r in pairs]
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+
+    results = {}
+    for backend in backends:
+        print(f"[COMPARE] {backend} ...", flush=True)
+        results[backend] = measure(backend, args.model, sources, args.src, args.tgt, args.repeat)
+
+    reference_outputs = None
+    for backend in backends:
+        r = results[backend]
+        if "error" in r:
+            print(f"[COMPARE] {backend}: FAILED {r['error']}")
+            continue
+        r["bleu"] = corpus_bleu(r["outputs"], references)
+        if reference_outputs is None:
+            reference_outputs = r["outputs"]
+        r["drift_bleu"] = corpus_bleu(r["outputs"], reference_outputs)
+        r["exact_match"] = round(sum(a == b for a, b in zip(r["outputs"], reference_outputs)) / len(sources), 3)
+        summary = {k: v for k, v in r.items() if k != "outputs"}
+        print(f"[COMPARE] {backend}: {summary}")
+        if args.show:
+            for source, out in zip(sources, r["outputs"]):
+                print(f"    {source} -> {out}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "model": args.model, "src": args.src, "tgt": args.tgt, "sentences": len(sources),
+                "cpu_count": os.cpu_count(), "results": results,
+            }, f, indent=2, ensure_ascii=False)
+    return 1 if any("error" in r for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,35 @@
 # backend/main.py
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Header
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Header, Request
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
 import os
-<<<<<<< HEAD
+import json
+import asyncio
 import uvicorn
-=======
-import sqlite3
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
 import jwt
->>>>>>> aaabbd8 (file Updated)
 import uuid
 import traceback
-from utils.audio import extract_audio
+from utils.audio import extract_audio, PipeExtraction
 from utils.translate import translate_text
-from utils.subtitles import generate_srt
+from utils.subtitles import SUBTITLE_FORMATS, generate_srt, get_writer, read_srt
 from utils.burn import burn_subtitles
+from utils.pipeline import run_pipeline
+from utils.config import UPLOAD_DIR, OUTPUT_DIR, EXTRACT_DURING_UPLOAD, BURN_MODE, BURN_MODES, MAX_TARGET_LANGUAGES
+from utils.config import SUBTITLE_FORMAT
+from utils.uploads import UploadError, save_upload, save_stream
+from utils.cache import init_cache, cache_stats
+from utils.models import registry, build_model_options
+from utils.resources import scheduler
+from utils.passwords import PasswordHasherBusy, hash_password, hasher_stats, verify_password
+from utils.token_cache import token_cache
+from utils.db import db, migrate
+from utils.jobs import WorkerPool, create_or_attach_job, get_job, get_job_events, queue_depth
+from utils.downloads import file_download
+from utils.coalesce import InFlight, request_key
+from utils import metrics
+from utils.storage import StorageSweeper, record_artifact, artifact_status, storage_stats
 import mimetypes
 import smtplib
 from email.message import EmailMessage
@@ -36,8 +49,6 @@ SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
 SMTP_USER = os.getenv("SMTP_USER", "")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 app = FastAPI()
 
 # CORS Configuration - limit to your frontend in production
@@ -49,54 +60,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-DB_PATH = os.getenv("DB_PATH", "users.db")
-
-def get_db_conn():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    return conn
-
 def init_db():
-    conn = get_db_conn()
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS users(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            is_active INTEGER DEFAULT 1,
-            created_at TEXT,
-            updated_at TEXT
-        )
-    """)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS password_reset_tokens(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            token_hash TEXT NOT NULL,
-            expires_at TEXT NOT NULL,
-            used INTEGER DEFAULT 0,
-            created_at TEXT,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    conn.commit()
-    conn.close()
+    """Apply pending schema migrations (see utils/db.py MIGRATIONS)."""
+    migrate(db)
 
 init_db()
+init_cache()
 
-UPLOAD_DIR = "uploads"
-OUTPUT_DIR = "outputs"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def preprocess_password(raw_password: str) -> str:
-    """
-    Fix bcrypt 72-byte limit by pre-hashing with SHA-256 before bcrypt.
-    """
-    return hashlib.sha256(raw_password.encode("utf-8")).hexdigest()
-
-
 # ------------------ Helpers: JWT & Auth ------------------
 def create_jwt(payload: dict, days: int = JWT_EXP_DAYS):
     data = payload.copy()
@@ -113,24 +86,40 @@ def decode_jwt(token: str):
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-def get_current_user(token: str = Header(None, alias="Authorization")):
+async def get_current_user(token: str = Header(None, alias="Authorization")):
     # Expect header: Authorization: Bearer <token>
     if not token:
         raise HTTPException(status_code=401, detail="Authorization header required")
     if token.startswith("Bearer "):
         token = token.split(" ", 1)[1]
+
+    # Fast path: token already verified against the current token_version
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+
     data = decode_jwt(token)
     email = data.get("email")
     if not email:
         raise HTTPException(status_code=401, detail="Invalid token payload")
-    conn = get_db_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT id, email FROM users WHERE email = ?", (email,))
-    row = cur.fetchone()
-    conn.close()
+    row = await db.afetchone("SELECT id, email, token_version FROM users WHERE email = ?", (email,))
     if not row:
         raise HTTPException(status_code=401, detail="User not found")
-    return {"id": row["id"], "email": row["email"]}
+    # Tokens issued before versioning carry no "ver" and count as version 0
+    if data.get("ver", 0) != row["token_version"]:
+        raise HTTPException(status_code=401, detail="Token revoked")
+    user = {"id": row["id"], "email": row["email"]}
+    token_cache.put(token, user, data.get("exp"))
+    return user
+
+async def revoke_user_tokens(user_id: int, hashed_password: str):
+    """Store a new password and bump token_version so existing JWTs stop working."""
+    now = datetime.utcnow().isoformat()
+    await db.aexecute(
+        "UPDATE users SET password = ?, token_version = token_version + 1, updated_at = ? WHERE id = ?",
+        (hashed_password, now, user_id),
+    )
+    token_cache.invalidate_user(user_id)
 
 # ------------------ Email helper ------------------
 def send_reset_email(to_email: str, token: str):
@@ -169,32 +158,24 @@ def send_reset_email(to_email: str, token: str):
 def hash_token(token: str) -> str:
     return hashlib.sha256(token.encode()).hexdigest()
 
-def create_reset_token_for_user(user_id: int, expiry_minutes: int = 60):
+async def create_reset_token_for_user(user_id: int, expiry_minutes: int = 60):
     raw_token = uuid.uuid4().hex + uuid.uuid4().hex  # long random
     token_hash = hash_token(raw_token)
     expires_at = datetime.utcnow() + timedelta(minutes=expiry_minutes)
-    conn = get_db_conn()
-    cur = conn.cursor()
     now = datetime.utcnow().isoformat()
-    cur.execute("""
+    await db.aexecute("""
         INSERT INTO password_reset_tokens(user_id, token_hash, expires_at, created_at)
         VALUES (?, ?, ?, ?)
     """, (user_id, token_hash, expires_at.isoformat(), now))
-    conn.commit()
-    conn.close()
     return raw_token
 
-def verify_reset_token(raw_token: str):
+async def verify_reset_token(raw_token: str):
     token_hash = hash_token(raw_token)
-    conn = get_db_conn()
-    cur = conn.cursor()
-    cur.execute("""
+    row = await db.afetchone("""
         SELECT id, user_id, expires_at, used FROM password_reset_tokens
         WHERE token_hash = ?
         ORDER BY id DESC LIMIT 1
     """, (token_hash,))
-    row = cur.fetchone()
-    conn.close()
     if not row:
         return None
     if row["used"]:
@@ -204,15 +185,16 @@ def verify_reset_token(raw_token: str):
         return None
     return {"id": row["id"], "user_id": row["user_id"]}
 
-def mark_token_used(token_id: int):
-    conn = get_db_conn()
-    cur = conn.cursor()
-    cur.execute("UPDATE password_reset_tokens SET used = 1 WHERE id = ?", (token_id,))
-    conn.commit()
-    conn.close()
+async def mark_token_used(token_id: int):
+    await db.aexecute("UPDATE password_reset_tokens SET used = 1 WHERE id = ?", (token_id,))
 
 # ------------------ Auth endpoints ------------------
 
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(request: Request, exc: PasswordHasherBusy):
+    # Backpressure: too many bcrypt operations queued; ask the client to retry
+    return JSONResponse({"success": False, "message": "Server busy, please retry shortly"}, status_code=429, headers={"Retry-After": "1"})
+
 @app.post("/register")
 async def register_user(email: str = Form(...), password: str = Form(...)):
     """
@@ -225,31 +207,21 @@ async def register_user(email: str = Form(...), password: str = Form(...)):
         raise HTTPException(status_code=400, detail="Email and password required")
 
     try:
-        conn = get_db_conn()
-        cur = conn.cursor()
         # Check explicitly
-        cur.execute("SELECT id FROM users WHERE email = ?", (email_clean,))
-        row = cur.fetchone()
+        row = await db.afetchone("SELECT id FROM users WHERE email = ?", (email_clean,))
         if row is not None:
-            conn.close()
             return JSONResponse({"success": False, "message": "Email already registered. Try logging in."}, status_code=400)
 
-        def preprocess_password(password: str):
-            # Fix for bcrypt max length (72 bytes)
-            password = password.encode('utf-8')
-            sha256 = hashlib.sha256(password).hexdigest()  # 64 chars
-            return sha256
-
-        hashed_password = pwd_context.hash(preprocess_password(password))
+        hashed_password = await hash_password(password)
 
         now = datetime.utcnow().isoformat()
-        cur.execute("""
+        await db.aexecute("""
             INSERT INTO users (email, password, created_at, updated_at) VALUES (?, ?, ?, ?)
         """, (email_clean, hashed_password, now, now))
-        conn.commit()
-        conn.close()
         print(f"[REGISTER] Created user: {email_clean}")
         return {"success": True, "message": "Registration successful"}
+    except PasswordHasherBusy:
+        raise
     except Exception as e:
         print("[REGISTER] Exception:", e)
         traceback.print_exc()
@@ -266,24 +238,22 @@ async def login_user(email: str = Form(...), password: str = Form(...)):
         raise HTTPException(status_code=400, detail="Email and password required")
 
     try:
-        conn = get_db_conn()
-        cur = conn.cursor()
-        cur.execute("SELECT id, password FROM users WHERE email = ?", (email_clean,))
-        row = cur.fetchone()
-        conn.close()
+        row = await db.afetchone("SELECT id, password, token_version FROM users WHERE email = ?", (email_clean,))
 
         if row is None:
             print(f"[LOGIN] User not found: {email_clean}")
             return JSONResponse({"success": False, "message": "Invalid email or password"}, status_code=400)
 
         stored_hash = row["password"]
-        if not pwd_context.verify(preprocess_password(password), stored_hash):
+        if not await verify_password(password, stored_hash):
             print(f"[LOGIN] Password mismatch for: {email_clean}")
             return JSONResponse({"success": False, "message": "Invalid email or password"}, status_code=400)
 
-        token = create_jwt({"email": email_clean})
+        token = create_jwt({"email": email_clean, "ver": row["token_version"]})
         print(f"[LOGIN] Success: {email_clean}")
         return {"success": True, "token": token, "email": email_clean}
+    except PasswordHasherBusy:
+        raise
     except Exception as e:
         print("[LOGIN] Exception:", e)
         traceback.print_exc()
@@ -291,17 +261,14 @@ async def login_user(email: str = Form(...), password: str = Form(...)):
 
 @app.post("/forgot-password")
 async def forgot_password(email: str = Form(...)):
-    conn = get_db_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT id FROM users WHERE email = ?", ((email or "").strip().lower(),))
-    row = cur.fetchone()
+    row = await db.afetchone("SELECT id FROM users WHERE email = ?", ((email or "").strip().lower(),))
 
     # Security: do not reveal existence
     if not row:
         return {"success": True, "message": "If this email is registered, a password reset link will be sent."}
 
     user_id = row["id"]
-    raw_token = create_reset_token_for_user(user_id, expiry_minutes=60)
+    raw_token = await create_reset_token_for_user(user_id, expiry_minutes=60)
     try:
         send_reset_email(email.strip().lower(), raw_token)
     except Exception as e:
@@ -316,73 +283,115 @@ async def reset_password(token: str = Form(...), new_password: str = Form(...)):
     if not token or not new_password:
         raise HTTPException(status_code=400, detail="Token and new password are required")
 
-    verified = verify_reset_token(token)
+    verified = await verify_reset_token(token)
     if not verified:
         raise HTTPException(status_code=400, detail="Invalid or expired token")
 
     user_id = verified["user_id"]
     token_id = verified["id"]
 
-    hashed_password = pwd_context.hash(preprocess_password(new_password))
-    conn = get_db_conn()
-    cur = conn.cursor()
-    now = datetime.utcnow().isoformat()
-    cur.execute("UPDATE users SET password = ?, updated_at = ? WHERE id = ?", (hashed_password, now, user_id))
-    conn.commit()
-    conn.close()
+    hashed_password = await hash_password(new_password)
+    await revoke_user_tokens(user_id, hashed_password)
 
-    mark_token_used(token_id)
+    await mark_token_used(token_id)
 
     return {"success": True, "message": "Password has been reset. You can now log in with your new password."}
 
 @app.post("/change-password")
 async def change_password(old_password: str = Form(...), new_password: str = Form(...), current_user: dict = Depends(get_current_user)):
     user_id = current_user["id"]
-    conn = get_db_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT password FROM users WHERE id = ?", (user_id,))
-    row = cur.fetchone()
+    row = await db.afetchone("SELECT password FROM users WHERE id = ?", (user_id,))
     if not row:
-        conn.close()
         raise HTTPException(status_code=404, detail="User not found")
-    if not pwd_context.verify(old_password, row["password"]):
-        conn.close()
+    if not await verify_password(old_password, row["password"]):
         raise HTTPException(status_code=400, detail="Old password incorrect")
 
-    hashed = pwd_context.hash(preprocess_password(new_password))
-    now = datetime.utcnow().isoformat()
-    cur.execute("UPDATE users SET password = ?, updated_at = ? WHERE id = ?", (hashed, now, user_id))
-    conn.commit()
-    conn.close()
-    return {"success": True, "message": "Password updated successfully."}
+    hashed = await hash_password(new_password)
+    await revoke_user_tokens(user_id, hashed)
+    return {"success": True, "message": "Password updated successfully. Please log in again."}
 
 # ------------------ Debug helper (dev only) ------------------
 @app.get("/debug/users")
 async def debug_users():
     """List users (for local dev only). Remove or protect this in production."""
-    conn = get_db_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT id, email, created_at, updated_at FROM users ORDER BY id DESC")
-    rows = cur.fetchall()
-    conn.close()
+    rows = await db.afetchall("SELECT id, email, created_at, updated_at FROM users ORDER BY id DESC")
     return {"users": [dict(r) for r in rows]}
 
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "ok", "message": "Backend is running"}
+    """Health check endpoint (answers before any model is loaded)"""
+    return {"status": "ok", "message": "Backend is running", "models_loaded": len(registry.loaded())}
+
+@app.get("/models")
+async def list_models():
+    """Models resident in the API process, with load time and approximate memory"""
+    return {"loaded": registry.loaded(), "max_resident": registry.max_resident, "resources": scheduler.describe()}
+
+def parse_burn_mode(burn_mode):
+    mode = (burn_mode or BURN_MODE).lower()
+    if mode not in BURN_MODES:
+        raise HTTPException(status_code=400, detail=f"burn_mode must be one of: {', '.join(BURN_MODES)}")
+    return mode
+
+def parse_subtitle_format(subtitle_format):
+    fmt = (subtitle_format or SUBTITLE_FORMAT).lower()
+    if fmt not in SUBTITLE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(SUBTITLE_FORMATS)}")
+    return fmt
+
+def parse_model_options(whisper_model, compute_type, translation_model, decoding=None):
+    try:
+        return build_model_options(whisper_model, compute_type, translation_model, decoding)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+def parse_languages(languages):
+    """Split a comma-separated `languages` value; None when it was not given."""
+    items = list(dict.fromkeys(l.strip().lower() for l in (languages or "").split(",") if l.strip()))
+    if len(items) > MAX_TARGET_LANGUAGES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_TARGET_LANGUAGES} target languages per request")
+    return items or None
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Result cache hit/miss/eviction counters and size per layer"""
+    return await run_in_threadpool(cache_stats)
+
+# Concurrent identical /upload requests attach to the run already in flight
+upload_inflight = InFlight("upload")
 
 @app.post("/upload")
-async def upload_video(video: UploadFile = File(...), language: str = Form("english"), source_lang: str = Form("english"), burn: str = Form("false")):
+async def upload_video(video: UploadFile = File(...), language: str = Form("english"), source_lang: str = Form("auto"), burn: str = Form("false"),
+                       whisper_model: str = Form(None), compute_type: str = Form(None), translation_model: str = Form(None),
+                       burn_mode: str = Form(None), languages: str = Form(None), format: str = Form(None),
+                       decoding: str = Form(None)):
     """Upload and process video to generate subtitles
     
     Args:
         video: Video file to upload
         language: Target language for subtitles (default: english)
-        source_lang: Source language of audio (default: english, usually Whisper transcribes to English)
+        source_lang: Source language of audio, or "auto" (default) to identify it from a
+            short probe of the speech; when it matches the target, nothing is translated
         burn: Whether to burn subtitles into video (default: false)
+        whisper_model: Optional Whisper size (tiny/base/small/medium)
+        compute_type: Optional Whisper compute type (int8/int8_float16/float32)
+        translation_model: Optional translation model name
+        burn_mode: soft (mux subtitle track, no re-encode), hard (x264 burn) or parallel (segment-parallel burn)
+        languages: Optional comma-separated target languages (e.g. "english,hindi,spanish").
+            Transcribes once and returns one SRT per language under "tracks";
+            with burn_mode=soft every language becomes a subtitle track
+        format: Subtitle file format: srt, vtt, ass or json (default SUBTITLE_FORMAT).
+            The file is returned as "subtitle_file"; "srt_file" is always written
+        decoding: Whisper decoding profile: fast, balanced, accurate or adaptive
+            (greedy pass, low-confidence segments re-decoded accurately)
     """
+    model_options = parse_model_options(whisper_model, compute_type, translation_model, decoding)
+    burn_mode = parse_burn_mode(burn_mode)
+    target_languages = parse_languages(languages)
+    subtitle_format = parse_subtitle_format(format)
+    input_video = None
+    handed_off = False
     try:
         # Validate file
         if not video.filename:
@@ -391,47 +400,45 @@ async def upload_video(video: UploadFile = File(...), language: str = Form("engl
         # Unique filenames
         file_id = str(uuid.uuid4())
         input_video = f"{UPLOAD_DIR}/{file_id}.mp4"
-        audio_file = f"{UPLOAD_DIR}/{file_id}.wav"
-        srt_file = f"{UPLOAD_DIR}/{file_id}.srt"
-        final_video = f"{OUTPUT_DIR}/{file_id}_final.mp4"
-        
-        # Save uploaded video
-        with open(input_video, "wb") as f:
-            contents = await video.read()
-            if not contents:
-                raise HTTPException(status_code=400, detail="File is empty")
-            f.write(contents)
         
-        # Step 1: Extract Audio
-        extract_audio(input_video, audio_file)
+        # Stream uploaded video to disk in chunks
+        try:
+            saved = await save_upload(video, input_video)
+        except UploadError as ue:
+            raise HTTPException(status_code=ue.status_code, detail=ue.detail)
         
-        # Step 2: Transcribe + Translate (now with source language support)
-        subtitles = translate_text(audio_file, language, source_lang)
-        
-        # Step 3: Create SRT
-        generate_srt(subtitles, srt_file)
-
-        response_payload = {
-            "status": "success",
-            "subtitles": subtitles,
-            "srt_file": os.path.basename(srt_file)
-        }
-
-        # Optionally burn subtitles into video if requested
+        # Run extract -> transcribe/translate -> SRT -> burn off the event loop
         burn_requested = str(burn).lower() in ("1", "true", "yes")
-        if burn_requested:
+
+        async def process():
             try:
-                burn_subtitles(input_video, srt_file, final_video)
-                response_payload["burned_video"] = os.path.basename(final_video)
-            except Exception as be:
-                # Log burn error but still return subtitles
-                print(f"Error burning subtitles: {be}")
-                traceback.print_exc()
-                response_payload["burn_error"] = str(be)
+                return await run_in_threadpool(
+                    run_pipeline, file_id, input_video, language, source_lang, burn_requested,
+                    media_hash=saved["sha256"], model_options=model_options, burn_mode=burn_mode,
+                    languages=target_languages, subtitle_format=subtitle_format
+                )
+            finally:
+                if os.path.exists(input_video):
+                    os.remove(input_video)
+
+        def start():
+            # From here on the shared run owns input_video and removes it
+            nonlocal handed_off
+            handed_off = True
+            return process()
+
+        # Identical uploads already being processed share that run's result
+        key = request_key(saved["sha256"], target_languages or language, source_lang, burn_requested, burn_mode, model_options,
+                          subtitle_format)
+        response_payload, coalesced = await upload_inflight.run(key, start)
+        if coalesced:
+            response_payload = dict(response_payload, coalesced=True)
 
         # Return subtitles as JSON (frontend will handle display)
         return JSONResponse(response_payload)
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error processing video: {str(e)}")
         traceback.print_exc()
@@ -440,7 +447,64 @@ async def upload_video(video: UploadFile = File(...), language: str = Form("engl
             detail=f"Error processing video: {str(e)}"
         )
     finally:
-        # Cleanup uploaded file
+        # Cleanup uploaded file (unless a running pipeline still needs it)
+        if input_video and not handed_off and os.path.exists(input_video):
+            os.remove(input_video)
+
+@app.post("/upload/stream")
+async def upload_video_stream(request: Request, language: str = "english", source_lang: str = "auto", burn: str = "false",
+                              whisper_model: str = None, compute_type: str = None, translation_model: str = None,
+                              burn_mode: str = None, languages: str = None, format: str = None,
+                              decoding: str = None):
+    """Upload the raw video as the request body and process it like /upload.
+
+    The body is written to disk as it arrives and, when EXTRACT_DURING_UPLOAD is
+    enabled, piped into ffmpeg at the same time so audio extraction overlaps the
+    upload. Options are passed as query parameters.
+    """
+    model_options = parse_model_options(whisper_model, compute_type, translation_model, decoding)
+    burn_mode = parse_burn_mode(burn_mode)
+    target_languages = parse_languages(languages)
+    subtitle_format = parse_subtitle_format(format)
+    file_id = str(uuid.uuid4())
+    input_video = f"{UPLOAD_DIR}/{file_id}.mp4"
+    audio_file = f"{UPLOAD_DIR}/{file_id}.wav"
+    extraction = None
+    try:
+        if EXTRACT_DURING_UPLOAD:
+            try:
+                extraction = PipeExtraction(audio_file)
+            except Exception as e:
+                print(f"Could not start extraction during upload: {e}")
+        try:
+            saved = await save_stream(request.stream(), input_video, tee=extraction)
+        except UploadError as ue:
+            raise HTTPException(status_code=ue.status_code, detail=ue.detail)
+
+        audio_ready = False
+        if extraction is not None:
+            audio_ready = await run_in_threadpool(extraction.finish)
+            extraction = None
+            if not audio_ready:
+                print("Extraction during upload failed; extracting from saved file")
+
+        burn_requested = str(burn).lower() in ("1", "true", "yes")
+        response_payload = await run_in_threadpool(
+            run_pipeline, file_id, input_video, language, source_lang, burn_requested,
+            audio_ready=audio_ready, media_hash=saved["sha256"], model_options=model_options,
+            burn_mode=burn_mode, languages=target_languages, subtitle_format=subtitle_format
+        )
+        return JSONResponse(response_payload)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error processing video: {str(e)}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Error processing video: {str(e)}")
+    finally:
+        if extraction is not None:
+            extraction.abort()
         if os.path.exists(input_video):
             os.remove(input_video)
 
@@ -453,59 +517,257 @@ async def process_video(video: UploadFile = File(...), target_lang: str = Form("
         target_lang: Target language for subtitles
         source_lang: Source language of audio (usually English from Whisper)
     """
+    # Unique filenames
+    file_id = str(uuid.uuid4())
+    input_video = f"{UPLOAD_DIR}/{file_id}.mp4"
+    audio_file = f"{UPLOAD_DIR}/{file_id}.wav"
+    srt_file = f"{UPLOAD_DIR}/{file_id}.srt"
+    final_video = f"{OUTPUT_DIR}/{file_id}_final.mp4"
     try:
-        # Unique filenames
-        file_id = str(uuid.uuid4())
-        input_video = f"{UPLOAD_DIR}/{file_id}.mp4"
-        audio_file = f"{UPLOAD_DIR}/{file_id}.wav"
-        srt_file = f"{UPLOAD_DIR}/{file_id}.srt"
-        final_video = f"{OUTPUT_DIR}/{file_id}_final.mp4"
 
-        # Save uploaded video
-        with open(input_video, "wb") as f:
-            f.write(await video.read())
+        # Stream uploaded video to disk in chunks
+        try:
+            await save_upload(video, input_video)
+        except UploadError as ue:
+            raise HTTPException(status_code=ue.status_code, detail=ue.detail)
 
-        # Step 1: Extract Audio
-        extract_audio(input_video, audio_file)
+        def _process():
+            # Step 1: Extract Audio
+            extract_audio(input_video, audio_file)
 
-        # Step 2: Transcribe + Translate (now with source language support)
-        text = translate_text(audio_file, target_lang, source_lang)
+            # Step 2: Transcribe + Translate (now with source language support)
+            text = translate_text(audio_file, target_lang, source_lang)
 
-        # Step 3: Create SRT
-        generate_srt(text, srt_file)
+            # Step 3: Create SRT
+            generate_srt(text, srt_file)
 
-        # Step 4: Burn Subtitles into Video
-        burn_subtitles(input_video, srt_file, final_video)
+            # Step 4: Burn Subtitles into Video
+            burn_subtitles(input_video, srt_file, final_video)
+            record_artifact(file_id, srt_file, "srt")
+            record_artifact(file_id, final_video, "video")
+
+        await run_in_threadpool(_process)
 
         return FileResponse(final_video, media_type="video/mp4", filename="output.mp4")
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error processing video: {str(e)}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
-
+    finally:
+        # The burned video is served from outputs/ and expires with the sweeper
+        for path in (input_video, audio_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+# ------------------ Job queue ------------------
+worker_pool = WorkerPool()
+storage_sweeper = StorageSweeper()
+
+@app.on_event("startup")
+async def start_workers():
+    worker_pool.start()
+    storage_sweeper.start()
+    # Loads PREWARM_MODELS in a background thread so /health answers immediately
+    registry.prewarm_in_background()
+
+@app.on_event("shutdown")
+async def stop_workers():
+    await run_in_threadpool(worker_pool.stop)
+    await run_in_threadpool(storage_sweeper.stop)
+
+@app.post("/jobs")
+async def submit_job(video: UploadFile = File(...), language: str = Form("english"), source_lang: str = Form("auto"), burn: str = Form("false"),
+                     whisper_model: str = Form(None), compute_type: str = Form(None), translation_model: str = Form(None),
+                     burn_mode: str = Form(None), languages: str = Form(None), format: str = Form(None),
+                     decoding: str = Form(None)):
+    """Queue a video for background processing and return its job id immediately.
+
+    Poll GET /jobs/{job_id} for the state and the result filenames. If an
+    identical upload with the same options is already queued or running, its
+    job id is returned instead of queueing a duplicate.
+    """
+    model_options = parse_model_options(whisper_model, compute_type, translation_model, decoding)
+    burn_mode = parse_burn_mode(burn_mode)
+    target_languages = parse_languages(languages)
+    subtitle_format = parse_subtitle_format(format)
+    if not video.filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+
+    job_id = str(uuid.uuid4())
+    input_video = f"{UPLOAD_DIR}/{job_id}.mp4"
+    try:
+        saved = await save_upload(video, input_video)
+    except UploadError as ue:
+        raise HTTPException(status_code=ue.status_code, detail=ue.detail)
+
+    burn_requested = str(burn).lower() in ("1", "true", "yes")
+    created_id = await run_in_threadpool(
+        create_or_attach_job, input_video, language, source_lang, burn_requested,
+        job_id=job_id, media_hash=saved["sha256"], options={"models": model_options, "burn_mode": burn_mode, "languages": target_languages,
+                                                        "format": subtitle_format}
+    )
+    if created_id != job_id:
+        # An identical job is already queued or running; share it
+        metrics.inc("jobs_coalesced_total")
+        os.remove(input_video)
+        job = await run_in_threadpool(get_job, created_id)
+        return JSONResponse({"job_id": created_id, "status": job["status"], "coalesced": True}, status_code=202)
+    return JSONResponse({"job_id": job_id, "status": "queued"}, status_code=202)
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Report the state of a queued job and, once done, where its results are."""
+    job = await run_in_threadpool(get_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    payload = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+    if job["status"] == "queued":
+        payload["queue_depth"] = await run_in_threadpool(queue_depth)
+    if job["status"] == "done" and job["result"]:
+        result = job["result"]
+        payload["subtitles"] = result.get("subtitles", [])
+        payload["srt_file"] = result.get("srt_file")
+        if result.get("tracks"):
+            payload["tracks"] = result["tracks"]
+        if result.get("burned_video"):
+            payload["burned_video"] = result["burned_video"]
+        if result.get("burn_error"):
+            payload["burn_error"] = result["burn_error"]
+    if job["status"] == "failed":
+        payload["error"] = job["error"]
+    return payload
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, last_event_id: str = Header(None, alias="Last-Event-ID")):
+    """Server-Sent Events stream of a job's progress and subtitle cues.
+
+    Emits "stage", "progress" (stage, percent, eta_seconds) and "cue" events as
+    the worker produces them, then a final "done" or "failed" event. Reconnecting
+    clients resume after Last-Event-ID.
+    """
+    job = await run_in_threadpool(get_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    try:
+        after_id = int(last_event_id) if last_event_id else 0
+    except ValueError:
+        after_id = 0
+
+    async def stream():
+        nonlocal after_id
+        idle = 0
+        while True:
+            events = await run_in_threadpool(get_job_events, job_id, after_id)
+            for ev in events:
+                after_id = ev["id"]
+                yield f"id: {ev['id']}\nevent: {ev['event']}\ndata: {json.dumps(ev['data'])}\n\n"
+                if ev["event"] in ("done", "failed"):
+                    return
+            if not events:
+                current = await run_in_threadpool(get_job, job_id)
+                if current["status"] in ("done", "failed"):
+                    # Finished without a terminal event (e.g. before events existed)
+                    data = current["result"] if current["status"] == "done" else {"error": current["error"]}
+                    yield f"event: {current['status']}\ndata: {json.dumps(data)}\n\n"
+                    return
+                idle += 1
+                if idle % 30 == 0:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                await asyncio.sleep(0.5)
+            else:
+                idle = 0
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics: stage durations, real-time factor, errors, uploads, queue and cache state"""
+    depth = await run_in_threadpool(queue_depth)
+    cache = await run_in_threadpool(cache_stats)
+    gauges = [
+        ("subtitle_queue_depth", "Jobs waiting in the queue", depth, None),
+        ("subtitle_models_loaded", "Models resident in memory", len(registry.loaded()), {"process": "api"}),
+        ("upload_inflight", "Distinct /upload pipeline runs in progress", len(upload_inflight), None),
+    ]
+    hasher = hasher_stats()
+    gauges.append(("password_hash_in_flight", "bcrypt hash/verify calls running or queued", hasher["in_flight"], None))
+    gauges.append(("password_hash_capacity", "Most bcrypt calls admitted before answering 429",
+                   hasher["max_in_flight"], None))
+    for layer, values in sorted(cache.items()):
+        gauges.append(("subtitle_cache_hit_ratio", "Result cache hits / lookups", values.get("hit_ratio", 0.0), {"layer": layer}))
+        gauges.append(("subtitle_cache_bytes", "Result cache size", values.get("bytes", 0), {"layer": layer}))
+    return PlainTextResponse(metrics.render(gauges), media_type="text/plain; version=0.0.4")
+
+@app.get("/storage/stats")
+async def get_storage_stats():
+    """Tracked artifact sizes, limits and the last sweep result"""
+    stats = await run_in_threadpool(storage_stats)
+    stats["last_sweep"] = storage_sweeper.last_run
+    return stats
+
+async def ensure_artifact(path):
+    """404 for unknown files, 410 for artifacts removed by the storage sweeper."""
+    if os.path.exists(path):
+        return
+    status = await run_in_threadpool(artifact_status, path)
+    if status == "swept":
+        raise HTTPException(status_code=410, detail="File expired and was removed. Please process the video again.")
+    raise HTTPException(status_code=404, detail="File not found")
 
 @app.get("/download/srt/{filename}")
-async def download_srt(filename: str):
-    """Serve generated SRT files from the uploads directory"""
+async def download_srt(filename: str, request: Request, format: str = None):
+    """Serve generated subtitle files from the uploads directory
+
+    With ?format=vtt|ass|json|srt the file is served in that format: the
+    matching file written by the pipeline when it exists, otherwise the SRT
+    converted cue by cue into a streamed response.
+    """
     safe_name = os.path.basename(filename)
     path = os.path.join(UPLOAD_DIR, safe_name)
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(path, media_type="text/plain", filename=safe_name)
+    stem, ext = os.path.splitext(safe_name)
+    fmt = parse_subtitle_format(format) if format else ext[1:].lower()
+    if fmt in SUBTITLE_FORMATS and fmt != ext[1:].lower():
+        target_name = f"{stem}.{fmt}"
+        target = os.path.join(UPLOAD_DIR, target_name)
+        if not os.path.exists(target):
+            await ensure_artifact(path)
+            if ext.lower() != ".srt":
+                raise HTTPException(status_code=400, detail="Only SRT files can be converted to another format")
+            writer = get_writer(fmt)
+            return StreamingResponse(
+                iterate_in_threadpool(writer.iter_text(read_srt(path))), media_type=writer.media_type,
+                headers={"Content-Disposition": f'attachment; filename="{target_name}"'},
+            )
+        safe_name, path = target_name, target
+    await ensure_artifact(path)
+    media_type = get_writer(fmt).media_type if fmt in SUBTITLE_FORMATS else "text/plain"
+    return file_download(request, path, media_type, filename=safe_name)
 
 
 @app.get("/download/output/{filename}")
-async def download_output(filename: str):
-    """Serve files from outputs directory (burned videos)"""
+async def download_output(filename: str, request: Request):
+    """Serve files from outputs directory (burned videos)
+
+    Supports Range requests (206) so players can seek and clients can resume,
+    and answers conditional requests with 304 via ETag / Last-Modified.
+    """
     safe_name = os.path.basename(filename)
     path = os.path.join(OUTPUT_DIR, safe_name)
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="File not found")
+    await ensure_artifact(path)
     media_type, _ = mimetypes.guess_type(path)
     if media_type is None:
         media_type = "application/octet-stream"
-    return FileResponse(path, media_type=media_type, filename=safe_name)
+    return file_download(request, path, media_type, filename=safe_name)
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run("main:app", host="0.0.0.0", port=port,reload=False)
@@ -0,0 +1,26 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# Settings are read at import time; point everything at a scratch directory
+# before any utils module is imported
+_scratch = tempfile.mkdtemp(prefix="subtitle_tests_")
+os.environ.update({
+    "DB_PATH": os.path.join(_scratch, "test.db"),
+    "UPLOAD_DIR": os.path.join(_scratch, "uploads"),
+    "OUTPUT_DIR": os.path.join(_scratch, "outputs"),
+    "CACHE_DIR": os.path.join(_scratch, "cache"),
+    "SCHEDULER_LOCK_DIR": os.path.join(_scratch, "slots"),
+    "LOG_JSON": "false",
+    "PREWARM_MODELS": "",
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def database():
+    """The shared pool, migrated to the latest schema."""
+    from utils.db import db, migrate
+    migrate(db)
+    return db
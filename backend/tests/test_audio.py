@@ -0,0 +1,37 @@
+import subprocess
+import sys
+import ffmpeg
+import numpy as np
+import pytest
+import utils.audio as audio
+
+
+def _fake_ffmpeg(monkeypatch, script):
+    def start(video_path):
+        return subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    monkeypatch.setattr(audio, "_start_pcm_pipe", start)
+
+
+def test_pcm_from_stdout_becomes_a_float32_array(monkeypatch):
+    # 3 s of samples plus a trailing partial sample that must be dropped
+    _fake_ffmpeg(monkeypatch, """
+import sys, numpy as np
+sys.stdout.buffer.write(np.arange(48000, dtype=np.float32).tobytes() + b"\\x00\\x01")
+""")
+    samples = audio.extract_audio_array("video.mp4")
+    assert samples.dtype == np.float32
+    assert np.array_equal(samples, np.arange(48000, dtype=np.float32))
+
+
+def test_stderr_flood_does_not_deadlock(monkeypatch):
+    # Far more than a pipe buffer of errors before any PCM, then a failure
+    _fake_ffmpeg(monkeypatch, """
+import sys
+sys.stderr.buffer.write(b"x" * 4_000_000)
+sys.stderr.flush()
+sys.stdout.buffer.write(b"\\x00" * 400_000)
+sys.exit(1)
+""")
+    with pytest.raises(ffmpeg.Error) as excinfo:
+        audio.extract_audio_array("corrupt.mp4")
+    assert len(excinfo.value.stderr) == 4_000_000
@@ -0,0 +1,49 @@
+import time
+import pytest
+from utils.cache import (
+    TRANSCRIPTION_LAYER, TRANSLATION_LAYER, cache_get, cache_put, cache_stats, get_cache_conn, init_cache, make_key,
+)
+
+
+@pytest.fixture
+def cache():
+    init_cache()
+    conn = get_cache_conn()
+    conn.execute("DELETE FROM cache_entries")
+    conn.execute("DELETE FROM cache_stats")
+    conn.commit()
+    conn.close()
+
+
+def test_key_covers_media_languages_and_model():
+    base = make_key(TRANSLATION_LAYER, "abc", "en", "fr", "whisper-small")
+    assert base == "translation|abc|en|fr|whisper-small"
+    assert make_key(TRANSLATION_LAYER, "abc", "en", "de", "whisper-small") != base
+    assert make_key(TRANSLATION_LAYER, "abd", "en", "fr", "whisper-small") != base
+    assert make_key(TRANSCRIPTION_LAYER, "abc", "en", "fr", "whisper-small") != base
+    assert make_key(TRANSCRIPTION_LAYER, "abc", None) == "transcription|abc|"
+
+
+def test_put_get_and_hit_ratio(cache):
+    key = make_key(TRANSCRIPTION_LAYER, "media", "en")
+    assert cache_get(TRANSCRIPTION_LAYER, key) is None
+    cache_put(TRANSCRIPTION_LAYER, key, {"segments": [{"start": 0, "end": 1, "text": "hi"}], "language": "en"})
+    assert cache_get(TRANSCRIPTION_LAYER, key)["language"] == "en"
+    stats = cache_stats()[TRANSCRIPTION_LAYER]
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    value = ["x" * 100]
+    cache_put(TRANSLATION_LAYER, "old", value)
+    time.sleep(0.01)
+    cache_put(TRANSLATION_LAYER, "recent", value)
+    time.sleep(0.01)
+    cache_get(TRANSLATION_LAYER, "old")
+    time.sleep(0.01)
+    cache_put(TRANSLATION_LAYER, "new", value, max_bytes=250)
+    assert cache_get(TRANSLATION_LAYER, "recent") is None
+    assert cache_get(TRANSLATION_LAYER, "old") == value
+    assert cache_get(TRANSLATION_LAYER, "new") == value
+    assert cache_stats()[TRANSLATION_LAYER]["evictions"] == 1
@@ -0,0 +1,112 @@
+import json
+import os
+import numpy as np
+import utils.chunking as chunking
+from utils.chunking import SAMPLE_RATE, executor_for, find_chunks, merge_chunk_segments
+from utils.decoding import new_counters
+from utils.jobs import WorkerPool
+
+
+def _words(*items):
+    return [{"start": s, "end": e, "word": w} for s, e, w in items]
+
+
+def test_short_audio_is_one_window():
+    audio = np.zeros(10 * SAMPLE_RATE, dtype=np.float32)
+    assert find_chunks(audio, chunk_seconds=30, overlap=2) == [(0.0, 10.0, 0.0, 10.0)]
+
+
+def test_windows_cut_at_silence_and_own_the_whole_timeline():
+    audio = np.full(100 * SAMPLE_RATE, 0.5, dtype=np.float32)
+    audio[int(28 * SAMPLE_RATE):int(29 * SAMPLE_RATE)] = 0.0
+    chunks = find_chunks(audio, chunk_seconds=30, overlap=2)
+    assert 28.0 <= chunks[0][3] <= 29.0
+    assert chunks[0][0] == 0.0
+    for (_, _, _, own_end), (win_start, _, own_start, _) in zip(chunks, chunks[1:]):
+        assert own_start == own_end
+        assert win_start == own_start - 2
+    assert chunks[-1][3] == float("inf")
+
+
+def test_overlap_words_are_kept_once():
+    first = [{"start": 0.0, "end": 11.0, "text": "a b c",
+              "words": _words((0.0, 4.0, " a"), (4.0, 9.0, " b"), (9.5, 11.0, " c"))}]
+    second = [{"start": 8.0, "end": 14.0, "text": "b c d",
+               "words": _words((8.0, 9.0, " b"), (9.5, 11.0, " c"), (11.0, 14.0, " d"))}]
+    merged = merge_chunk_segments([((0.0, 10.0), first), ((10.0, float("inf")), second)])
+    assert [s["text"] for s in merged] == ["a b", "c d"]
+    assert merged[0] == {"start": 0.0, "end": 9.0, "text": "a b"}
+    assert merged[1]["start"] == 9.5
+
+
+def test_segments_without_words_use_their_midpoint():
+    merged = merge_chunk_segments([
+        ((0.0, 10.0), [{"start": 8.0, "end": 11.0, "text": "kept"}, {"start": 9.0, "end": 13.0, "text": "next"}]),
+        ((10.0, 20.0), [{"start": 9.0, "end": 13.0, "text": "next"}]),
+    ])
+    assert [s["text"] for s in merged] == ["kept", "next"]
+
+
+def test_pools_are_shared_per_key_and_never_shut_down_while_held(monkeypatch):
+    class FakePool:
+        def __init__(self, **kwargs):
+            self.closed = False
+
+        def shutdown(self, wait=True):
+            self.closed = True
+
+    monkeypatch.setattr(chunking, "ProcessPoolExecutor", FakePool)
+    monkeypatch.setattr(chunking, "_pools", type(chunking._pools)())
+    monkeypatch.setattr(chunking.registry, "max_resident", 1)
+    with executor_for("small", "int8", 1) as small:
+        with executor_for("small", "int8", 1) as again:
+            assert again is small
+        with executor_for("base", "int8", 1) as base:
+            assert not small.closed
+        assert base.closed and not small.closed
+    assert not small.closed
+    with executor_for("base", "int8", 1):
+        pass
+    assert small.closed
+
+
+# ---------- chunked transcription inside a job worker (models replaced by stubs) ----------
+def _no_model(*args):
+    pass
+
+
+def _one_word_per_second(audio, offset, language, profile):
+    end = offset + len(audio) / SAMPLE_RATE
+    words = [{"start": t, "end": t + 1.0, "word": f" {t}"} for t in range(int(np.ceil(offset)), int(end))]
+    return [{"start": words[0]["start"], "end": words[-1]["end"], "text": "", "words": words}], "fr", \
+        new_counters(profile)
+
+
+def _french(windows):
+    return {"language": "fr", "probability": 1.0, "probabilities": {"fr": 1.0}, "windows": len(windows),
+            "seconds": 0.0}
+
+
+def _chunked_job_worker(worker_index, stop_event, metrics_queue, pool_size):
+    chunking._init_worker = _no_model
+    chunking._transcribe_window = _one_word_per_second
+    chunking._identify_windows = _french
+    audio = np.full(200 * SAMPLE_RATE, 0.1, dtype=np.float32)
+    language = chunking.identify_chunked(audio, "tiny", "int8", workers=2)["language"]
+    segments, detected = chunking.transcribe_chunked(audio, "tiny", "int8", workers=2, chunk_seconds=60)
+    chunking.shutdown_executors()
+    with open(os.environ["CHUNKED_WORKER_RESULT"], "w") as f:
+        json.dump({"language": language, "detected": detected, "segments": segments}, f)
+
+
+def test_chunked_transcription_runs_inside_a_job_worker(database, tmp_path, monkeypatch):
+    result_path = tmp_path / "result.json"
+    monkeypatch.setenv("CHUNKED_WORKER_RESULT", str(result_path))
+    pool = WorkerPool(size=1, target=_chunked_job_worker)
+    pool.start()
+    pool.stop(timeout=120)
+    result = json.loads(result_path.read_text())
+    assert result["language"] == result["detected"] == "fr"
+    assert len(result["segments"]) > 1
+    words = " ".join(s["text"] for s in result["segments"]).split()
+    assert words == [str(t) for t in range(200)]
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from utils import metrics
+from utils.coalesce import InFlight, request_key
+
+
+def test_request_key_is_stable_and_option_sensitive():
+    assert request_key("abc", "fr", {"burn": True, "mode": "hard"}) == \
+        request_key("abc", "fr", {"mode": "hard", "burn": True})
+    assert request_key("abc", "fr") != request_key("abc", "de")
+    assert request_key("abc", "fr") != request_key("abd", "fr")
+
+
+def test_concurrent_callers_share_one_run():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def main():
+        inflight = InFlight("test_share")
+        results = await asyncio.gather(*(inflight.run("k", work) for _ in range(3)))
+        return inflight, results
+
+    before = metrics.snapshot()
+    inflight, results = asyncio.run(main())
+    after = metrics.snapshot()
+    assert calls == [1]
+    assert sorted(results) == [("done", False), ("done", True), ("done", True)]
+    assert len(inflight) == 0
+    assert after["test_share_runs_total"] - before.get("test_share_runs_total", 0) == 1
+    assert after["test_share_coalesced_total"] - before.get("test_share_coalesced_total", 0) == 2
+
+
+def test_finished_key_runs_again():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        return len(calls)
+
+    async def main():
+        inflight = InFlight("test_again")
+        return await inflight.run("k", work), await inflight.run("k", work)
+
+    assert asyncio.run(main()) == ((1, False), (2, False))
+
+
+def test_errors_reach_every_caller_and_are_not_kept():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        inflight = InFlight("test_error")
+        results = await asyncio.gather(*(inflight.run("k", fail) for _ in range(2)), return_exceptions=True)
+        return inflight, results
+
+    inflight, results = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(inflight) == 0
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        inflight = InFlight("test_cancel")
+        leader = asyncio.ensure_future(inflight.run("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(inflight.run("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == ("done", True)
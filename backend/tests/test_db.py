@@ -0,0 +1,70 @@
+import sqlite3
+import pytest
+from utils.db import MIGRATIONS, ConnectionPool, migrate
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "app.db"), size=2)
+    yield pool
+    pool.close()
+
+
+def _tables(pool):
+    return {row["name"] for row in pool.fetchall("SELECT name FROM sqlite_master")}
+
+
+def test_migrate_reaches_latest_version_and_is_idempotent(pool):
+    migrate(pool)
+    assert pool.fetchone("PRAGMA user_version")[0] == MIGRATIONS[-1][0] == 8
+    assert {"users", "password_reset_tokens", "jobs", "job_events", "artifacts",
+            "idx_jobs_media", "idx_artifacts_live"} <= _tables(pool)
+    migrate(pool)
+    assert pool.fetchone("PRAGMA user_version")[0] == 8
+
+
+def test_migrate_upgrades_a_pre_versioned_jobs_table(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE jobs(id TEXT PRIMARY KEY, status TEXT NOT NULL, input_path TEXT NOT NULL, language TEXT,
+                          source_lang TEXT, burn INTEGER DEFAULT 0, user_id INTEGER, result TEXT, error TEXT,
+                          created_at TEXT, updated_at TEXT)
+    """)
+    conn.commit()
+    conn.close()
+    pool = ConnectionPool(path, size=1)
+    try:
+        migrate(pool)
+        columns = {row["name"] for row in pool.fetchall("PRAGMA table_info(jobs)")}
+        assert {"media_hash", "options"} <= columns
+        assert pool.fetchone("PRAGMA user_version")[0] == 8
+    finally:
+        pool.close()
+
+
+def test_connections_use_wal_and_are_reused(pool):
+    assert pool.fetchone("PRAGMA journal_mode")[0] == "wal"
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+
+
+def test_transaction_rolls_back_on_error(pool):
+    migrate(pool)
+    with pytest.raises(RuntimeError):
+        with pool.transaction() as conn:
+            conn.execute("INSERT INTO users(email, password) VALUES ('a@example.com', 'x')")
+            raise RuntimeError
+    assert pool.fetchone("SELECT COUNT(*) FROM users")[0] == 0
+    lastrowid, rowcount = pool.execute("INSERT INTO users(email, password) VALUES ('a@example.com', 'x')")
+    assert rowcount == 1 and pool.fetchone("SELECT id FROM users")[0] == lastrowid
+
+
+def test_failed_migration_keeps_the_previous_version(pool, monkeypatch):
+    migrate(pool)
+    monkeypatch.setattr("utils.db.MIGRATIONS", MIGRATIONS + [(9, "CREATE TABLE users(id INTEGER)")])
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(pool)
+    assert pool.fetchone("PRAGMA user_version")[0] == 8
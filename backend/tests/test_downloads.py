@@ -0,0 +1,93 @@
+import os
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from utils.downloads import file_download, parse_range
+
+SIZE = 1000
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("items=0-1", None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=900-", (900, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=990-2000", (990, 999)),
+    ("bytes=0-1,5-6", None),
+    ("bytes=abc-", None),
+    ("bytes=1000-", "unsatisfiable"),
+    ("bytes=50-10", "unsatisfiable"),
+    ("bytes=-0", "unsatisfiable"),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, SIZE) == expected
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "movie.mp4"
+    path.write_bytes(bytes(range(256)) * 4)
+
+    async def download(request):
+        return file_download(request, str(path), "video/mp4", filename="movie.mp4")
+
+    with TestClient(Starlette(routes=[Route("/file", download)])) as client:
+        yield client
+
+
+def test_full_download(client):
+    r = client.get("/file")
+    assert r.status_code == 200
+    assert r.content == bytes(range(256)) * 4
+    assert r.headers["content-length"] == "1024"
+    assert r.headers["accept-ranges"] == "bytes"
+    assert r.headers["content-disposition"] == 'attachment; filename="movie.mp4"'
+
+
+def test_range_request(client):
+    r = client.get("/file", headers={"Range": "bytes=10-19"})
+    assert r.status_code == 206
+    assert r.content == bytes(range(10, 20))
+    assert r.headers["content-range"] == "bytes 10-19/1024"
+    assert r.headers["content-length"] == "10"
+
+
+def test_unsatisfiable_range(client):
+    r = client.get("/file", headers={"Range": "bytes=5000-"})
+    assert r.status_code == 416
+    assert r.headers["content-range"] == "bytes */1024"
+
+
+def test_if_none_match_returns_304(client):
+    etag = client.get("/file").headers["etag"]
+    r = client.get("/file", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["etag"] == etag
+    assert client.get("/file", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_if_modified_since_returns_304(client):
+    last_modified = client.get("/file").headers["last-modified"]
+    assert client.get("/file", headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get("/file", headers={"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"}).status_code == 200
+
+
+def test_stale_if_range_sends_the_whole_file(client):
+    etag = client.get("/file").headers["etag"]
+    assert client.get("/file", headers={"Range": "bytes=0-9", "If-Range": etag}).status_code == 206
+    r = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert r.status_code == 200
+    assert len(r.content) == 1024
+
+
+def test_etag_changes_when_the_file_is_replaced(client, tmp_path):
+    etag = client.get("/file").headers["etag"]
+    path = tmp_path / "movie.mp4"
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert client.get("/file").headers["etag"] != etag
+    assert client.get("/file", headers={"If-None-Match": etag}).status_code == 200
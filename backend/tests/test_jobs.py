@@ -0,0 +1,56 @@
+import time
+from datetime import datetime
+from utils.jobs import (
+    add_job_event, add_job_events, create_or_attach_job, get_job, get_job_events, purge_finished_jobs, update_job,
+)
+
+
+def _finished_job(database, status, finished_at):
+    job_id = create_or_attach_job("uploads/missing.mp4")
+    update_job(job_id, status=status)
+    add_job_event(job_id, "cue", {"text": "hello"})
+    add_job_event(job_id, status, {})
+    database.execute("UPDATE jobs SET updated_at = ? WHERE id = ?",
+                     (datetime.utcfromtimestamp(finished_at).isoformat(), job_id))
+    return job_id
+
+
+def test_purge_drops_events_then_jobs(database):
+    now = time.time()
+    old = _finished_job(database, "done", now - 10 * 3600)
+    recent = _finished_job(database, "failed", now - 60)
+    running = create_or_attach_job("uploads/running.mp4")
+    add_job_event(running, "progress", {"percent": 10})
+    database.execute("UPDATE jobs SET updated_at = ? WHERE id = ?",
+                     (datetime.utcfromtimestamp(now - 10 * 3600).isoformat(), running))
+
+    events, jobs = purge_finished_jobs(now - 3600, now - 24 * 3600)
+    assert (events, jobs) == (2, 0)
+    assert get_job_events(old) == []
+    assert len(get_job_events(recent)) == 2
+    assert len(get_job_events(running)) == 1
+
+    purge_finished_jobs(now - 3600, now - 3600)
+    assert get_job(old) is None
+    assert get_job(recent) is not None
+    assert get_job(running) is not None
+
+
+def test_identical_unfinished_job_is_attached(database):
+    options = {"models": {"whisper": "small"}}
+    first = create_or_attach_job("uploads/a.mp4", "french", media_hash="abc", options=options)
+    assert create_or_attach_job("uploads/b.mp4", "french", media_hash="abc", options=options) == first
+    assert create_or_attach_job("uploads/c.mp4", "german", media_hash="abc", options=options) != first
+    assert create_or_attach_job("uploads/d.mp4", "french", media_hash="abc") != first
+    update_job(first, status="done")
+    assert create_or_attach_job("uploads/e.mp4", "french", media_hash="abc", options=options) != first
+
+
+def test_cue_batches_are_stored_as_individual_events_in_order(database):
+    job_id = create_or_attach_job("uploads/batch.mp4")
+    add_job_event(job_id, "stage", {"stage": "translating"})
+    add_job_events(job_id, [("cue", {"index": i, "text": f"cue {i}"}) for i in range(1, 4)])
+    events = get_job_events(job_id)
+    assert [e["event"] for e in events] == ["stage", "cue", "cue", "cue"]
+    assert [e["data"]["index"] for e in events[1:]] == [1, 2, 3]
+    assert get_job_events(job_id, after_id=events[1]["id"])[0]["data"]["index"] == 2
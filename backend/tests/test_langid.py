@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from utils.audio import SAMPLE_RATE
+from utils.langid import identify_language, identify_windows, is_auto, probe_windows
+
+
+class _Info:
+    def __init__(self, probs):
+        self.all_language_probs = sorted(probs.items(), key=lambda item: item[1], reverse=True)
+        self.language, self.language_probability = self.all_language_probs[0] if probs else (None, 0.0)
+
+
+class _FakeWhisper:
+    """Stands in for WhisperModel: returns one probability dict per call."""
+
+    def __init__(self, *probs):
+        self.probs = list(probs)
+        self.calls = 0
+
+    def transcribe(self, audio, **kwargs):
+        assert kwargs["language"] is None
+        probs = self.probs[min(self.calls, len(self.probs) - 1)]
+        self.calls += 1
+        return iter(()), _Info(probs)
+
+
+def _audio(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+@pytest.mark.parametrize("value", [None, "auto", " Auto ", "detect", ""])
+def test_auto_values(value):
+    assert is_auto(value)
+
+
+def test_named_language_is_not_auto():
+    assert not is_auto("english")
+    assert not is_auto("fr")
+
+
+def test_short_audio_is_probed_whole():
+    windows = probe_windows(_audio(5), seconds=30, windows=3)
+    assert [len(w) for w in windows] == [5 * SAMPLE_RATE]
+
+
+def test_probe_is_split_into_evenly_spaced_windows():
+    audio = np.arange(100 * SAMPLE_RATE, dtype=np.float32)
+    windows = probe_windows(audio, seconds=30, windows=3)
+    assert [len(w) for w in windows] == [10 * SAMPLE_RATE] * 3
+    assert windows[0][0] == 0
+    assert windows[1][0] == 45 * SAMPLE_RATE
+    assert windows[-1][-1] == audio[-1]
+
+
+def test_probabilities_are_averaged_over_windows():
+    model = _FakeWhisper({"en": 0.6, "de": 0.4}, {"en": 0.4, "de": 0.2, "nl": 0.4})
+    result = identify_windows(model, [_audio(1), _audio(1)], confident=0.9)
+    assert result["language"] == "en"
+    assert result["probability"] == 0.5
+    assert result["probabilities"] == {"en": 0.5, "de": 0.3, "nl": 0.2}
+    assert result["windows"] == 2
+
+
+def test_confident_window_stops_the_probe():
+    model = _FakeWhisper({"fr": 0.97, "en": 0.03})
+    result = identify_language(model, _audio(100), seconds=30, windows=3, confident=0.9)
+    assert model.calls == 1
+    assert (result["language"], result["windows"]) == ("fr", 1)
+
+
+def test_nothing_to_identify():
+    model = _FakeWhisper({})
+    assert identify_windows(model, [_audio(0)]) is None
+    assert model.calls == 0
+    assert identify_windows(model, [_audio(1)]) is None
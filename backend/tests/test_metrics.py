@@ -0,0 +1,92 @@
+import queue
+import threading
+import pytest
+from utils import metrics
+from utils.telemetry import span
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics(monkeypatch):
+    monkeypatch.setattr(metrics, "_counters", {})
+    monkeypatch.setattr(metrics, "_gauges", {})
+    monkeypatch.setattr(metrics, "_histograms", {})
+    monkeypatch.setattr(metrics, "_forward", None)
+
+
+def test_counters_render_with_help_type_and_escaped_labels():
+    metrics.inc("subtitle_stage_errors_total", stage="burn")
+    metrics.inc("subtitle_stage_errors_total", 2, stage="burn")
+    metrics.inc("custom_total", path='a"b\\c')
+    text = metrics.render()
+    assert "# HELP subtitle_stage_errors_total Pipeline failures by stage\n" \
+           "# TYPE subtitle_stage_errors_total counter\n" \
+           'subtitle_stage_errors_total{stage="burn"} 3\n' in text
+    assert "# HELP custom_total" not in text
+    assert 'custom_total{path="a\\"b\\\\c"} 1\n' in text
+    assert metrics.snapshot() == {"subtitle_stage_errors_total": 3, "custom_total": 1}
+
+
+def test_histogram_buckets_are_cumulative():
+    for value in (0.01, 0.3, 7, 5000):
+        metrics.observe("subtitle_stage_seconds", value, stage="transcribe")
+    lines = metrics.render().splitlines()
+    assert 'subtitle_stage_seconds_bucket{stage="transcribe",le="0.05"} 1' in lines
+    assert 'subtitle_stage_seconds_bucket{stage="transcribe",le="0.5"} 2' in lines
+    assert 'subtitle_stage_seconds_bucket{stage="transcribe",le="10"} 3' in lines
+    assert 'subtitle_stage_seconds_bucket{stage="transcribe",le="3600"} 3' in lines
+    assert 'subtitle_stage_seconds_bucket{stage="transcribe",le="+Inf"} 4' in lines
+    assert 'subtitle_stage_seconds_sum{stage="transcribe"} 5007.31' in lines
+    assert 'subtitle_stage_seconds_count{stage="transcribe"} 4' in lines
+
+
+def test_realtime_factor_uses_its_own_buckets():
+    metrics.observe("subtitle_realtime_factor", 0.6)
+    lines = metrics.render().splitlines()
+    assert "subtitle_realtime_factor_bucket{le=\"0.75\"} 1" in lines
+    assert "subtitle_realtime_factor_bucket{le=\"0.5\"} 0" in lines
+
+
+def test_recorded_and_scrape_time_gauges_share_one_header():
+    metrics.set_gauge("subtitle_models_loaded", 2, process="worker-0")
+    text = metrics.render([
+        ("subtitle_models_loaded", "", 1, {"process": "api"}),
+        ("subtitle_queue_depth", "Jobs waiting", 4.0, None),
+    ])
+    assert text.count("# TYPE subtitle_models_loaded gauge") == 1
+    lines = text.splitlines()
+    start = lines.index("# TYPE subtitle_models_loaded gauge")
+    assert lines[start + 1:start + 3] == ['subtitle_models_loaded{process="api"} 1',
+                                          'subtitle_models_loaded{process="worker-0"} 2']
+    assert "# HELP subtitle_queue_depth Jobs waiting" in lines
+    assert "subtitle_queue_depth 4" in lines
+
+
+def test_worker_metrics_are_forwarded_to_the_api_process():
+    q = queue.Queue()
+    metrics.forward_to(q)
+    metrics.inc("subtitle_pipeline_runs_total")
+    metrics.observe("subtitle_stage_seconds", 1.0, stage="extract")
+    assert metrics.snapshot() == {}
+    metrics.forward_to(None)
+    stop = threading.Event()
+    collector = metrics.collect_from(q, stop)
+    for _ in range(100):
+        if q.empty():
+            break
+        stop.wait(0.01)
+    stop.set()
+    collector.join(2)
+    assert metrics.snapshot() == {"subtitle_pipeline_runs_total": 1}
+    assert 'subtitle_stage_seconds_count{stage="extract"} 1' in metrics.render()
+
+
+def test_span_records_timings_and_errors():
+    timings = {}
+    with span("translate", timings):
+        pass
+    with pytest.raises(RuntimeError):
+        with span("translate", timings):
+            raise RuntimeError
+    assert set(timings) == {"translate"}
+    assert metrics.snapshot() == {"subtitle_stage_errors_total": 1}
+    assert 'subtitle_stage_seconds_count{stage="translate"} 2' in metrics.render()
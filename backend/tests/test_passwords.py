@@ -0,0 +1,48 @@
+import asyncio
+import threading
+import pytest
+import utils.passwords as passwords
+from utils.passwords import PasswordHasherBusy, hasher_stats, preprocess_password
+
+
+def test_prehash_fits_bcrypt_limit():
+    digest = preprocess_password("p" * 500)
+    assert len(digest) == 64
+    assert digest == preprocess_password("p" * 500) != preprocess_password("p" * 499)
+
+
+def test_calls_beyond_capacity_are_refused_then_admitted_again(monkeypatch):
+    monkeypatch.setattr(passwords, "_max_in_flight", 2)
+    release = threading.Event()
+
+    def slow_hash(value):
+        release.wait(5)
+        return value.upper()
+
+    async def main():
+        running = [asyncio.ensure_future(passwords._submit(slow_hash, "a")) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert hasher_stats()["in_flight"] == 2
+        with pytest.raises(PasswordHasherBusy):
+            await passwords._submit(slow_hash, "b")
+        release.set()
+        results = await asyncio.gather(*running)
+        assert hasher_stats()["in_flight"] == 0
+        return results, await passwords._submit(slow_hash, "c")
+
+    assert asyncio.run(main()) == (["A", "A"], "C")
+
+
+def test_failed_call_frees_its_place(monkeypatch):
+    monkeypatch.setattr(passwords, "_max_in_flight", 1)
+
+    def broken(value):
+        raise ValueError(value)
+
+    async def main():
+        with pytest.raises(ValueError):
+            await passwords._submit(broken, "x")
+        return hasher_stats()
+
+    stats = asyncio.run(main())
+    assert stats["in_flight"] == 0 and stats["max_in_flight"] == 1
@@ -0,0 +1,93 @@
+import threading
+import time
+from utils.resources import ResourceScheduler, detect_cores
+
+
+def _scheduler(tmp_path, enabled=True, cores=4, slots=2):
+    return ResourceScheduler(enabled=enabled, cores=cores, slots=slots, lock_dir=str(tmp_path / "slots"))
+
+
+def test_cores_are_split_between_slots(tmp_path):
+    scheduler = _scheduler(tmp_path, cores=8, slots=3)
+    assert scheduler.threads == 2
+    assert scheduler.stage_threads() == 2
+    assert _scheduler(tmp_path, cores=1, slots=4).threads == 1
+    assert scheduler.describe()["threads_per_stage"] == 2
+
+
+def test_disabled_scheduler_leaves_threads_to_the_libraries(tmp_path):
+    scheduler = _scheduler(tmp_path, enabled=False)
+    assert scheduler.stage_threads() == 0
+    assert scheduler.stage_threads(default=3) == 3
+    with scheduler.slot("transcribe") as threads:
+        assert threads == 0
+    assert not (tmp_path / "slots").exists()
+
+
+def test_slots_default_to_cores_over_minimum_threads(tmp_path):
+    scheduler = ResourceScheduler(enabled=True, cores=64, slots=0, lock_dir=str(tmp_path))
+    assert scheduler.slots >= 1
+    assert scheduler.threads == max(1, 64 // scheduler.slots)
+
+
+def test_detect_cores_is_at_least_one():
+    assert detect_cores() >= 1
+
+
+def test_slot_is_reentrant_within_a_thread(tmp_path):
+    scheduler = _scheduler(tmp_path, slots=1)
+    with scheduler.slot("translate") as outer:
+        # A second acquire would wait forever on the only slot
+        with scheduler.slot("transcribe") as inner:
+            assert inner == outer == 4
+    with scheduler.slot("burn"):
+        pass
+
+
+def test_one_slot_serializes_heavy_stages(tmp_path):
+    # Separate schedulers share the slot files, as processes do
+    first, second = _scheduler(tmp_path, slots=1), _scheduler(tmp_path, slots=1)
+    entered, release = threading.Event(), threading.Event()
+    order = []
+
+    def hold():
+        with first.slot("transcribe"):
+            order.append("first")
+            entered.set()
+            release.wait(5)
+            order.append("first done")
+
+    @second.heavy("burn")
+    def burn():
+        order.append("second")
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    entered.wait(5)
+    waiter = threading.Thread(target=burn)
+    waiter.start()
+    time.sleep(0.2)
+    assert order == ["first"]
+    release.set()
+    holder.join(5)
+    waiter.join(5)
+    assert order == ["first", "first done", "second"]
+
+
+def test_free_slots_run_concurrently(tmp_path):
+    scheduler = _scheduler(tmp_path, slots=2)
+    barrier = threading.Barrier(2, timeout=5)
+
+    @scheduler.heavy("translate")
+    def stage():
+        # Both threads must be inside their slot at once to pass the barrier
+        barrier.wait()
+        return True
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(stage())) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert results == [True, True]
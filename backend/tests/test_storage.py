@@ -0,0 +1,38 @@
+import os
+import time
+from utils.config import UPLOAD_DIR
+from utils.storage import artifact_status, record_artifact, sweep
+
+
+def _write(name, size=10, age=0):
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(UPLOAD_DIR, name)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    if age:
+        past = time.time() - age
+        os.utime(path, (past, past))
+    return path
+
+
+def test_untracked_files_in_use_are_not_evicted(database):
+    writing = _write("upload-in-progress.mp4", size=100)
+    leftover = _write("crash-leftover.wav", size=100, age=2 * 3600)
+    sweep(ttl=3600, quota=1)
+    assert os.path.exists(writing)
+    assert not os.path.exists(leftover)
+    assert artifact_status(leftover) == "swept"
+    os.remove(writing)
+
+
+def test_quota_evicts_oldest_recorded_artifacts(database):
+    old = _write("old.srt", size=60)
+    new = _write("new.srt", size=60)
+    record_artifact("a", old, "srt")
+    time.sleep(0.01)
+    record_artifact("b", new, "srt")
+    removed = sweep(ttl=3600, quota=100)
+    assert removed["quota"]["files"] == 1
+    assert not os.path.exists(old)
+    assert os.path.exists(new)
+    os.remove(new)
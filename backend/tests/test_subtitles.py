@@ -0,0 +1,99 @@
+import json
+import pytest
+from utils.subtitles import (
+    Cue, CueStore, clean_text, format_ass_time, format_srt_time, format_vtt_time, generate_srt, get_writer,
+    read_srt, write_subtitles,
+)
+
+
+def test_time_formats():
+    assert format_srt_time(3725.5) == "01:02:05,500"
+    assert format_vtt_time(3725.5) == "01:02:05.500"
+    assert format_ass_time(3725.5) == "1:02:05.50"
+
+
+def test_cue_store_round_trips_cues():
+    store = CueStore()
+    store.append(0, 1.5, " hello ")
+    store.append(2, 3, "world")
+    assert len(store) == 2
+    assert store[0].text == "hello"
+    assert store.texts() == ["hello", "world"]
+    assert store.to_dicts()[1] == {"time": "00:00:02,000 --> 00:00:03,000", "text": "world", "start": 2.0, "end": 3.0}
+
+
+@pytest.mark.parametrize("fmt", ["srt", "vtt", "ass", "json"])
+def test_writers_stream_to_file(tmp_path, fmt):
+    path = tmp_path / f"out.{fmt}"
+    count = write_subtitles([Cue(0, 1, "one"), Cue(1, 2, "two")], str(path), fmt)
+    assert count == 2
+    text = path.read_text(encoding="utf-8")
+    assert "one" in text and "two" in text
+    assert "".join(get_writer(fmt).iter_text([Cue(0, 1, "one"), Cue(1, 2, "two")])) == text
+
+
+def test_json_writer_is_valid_json(tmp_path):
+    path = tmp_path / "out.json"
+    write_subtitles([{"start": 0, "end": 1, "text": "a \"quoted\" line"}], str(path), "json")
+    assert json.loads(path.read_text(encoding="utf-8")) == [
+        {"index": 1, "start": 0.0, "end": 1.0, "text": "a \"quoted\" line"}
+    ]
+    write_subtitles([], str(path), "json")
+    assert json.loads(path.read_text(encoding="utf-8")) == []
+
+
+def test_ass_escapes_override_braces_and_newlines():
+    [line] = list(get_writer("ass").iter_text([Cue(0, 1, "{b}\nnext")]))[1:2]
+    assert line.endswith(",\\{b\\}\\Nnext\n")
+
+
+def test_empty_and_zero_length_cues_are_skipped_and_cues_sorted(tmp_path):
+    path = tmp_path / "out.srt"
+    count = write_subtitles([Cue(5, 6, "later"), Cue(1, 2, "  "), Cue(3, 3, "instant"), Cue(0, 1, "first")],
+                            str(path))
+    assert count == 2
+    assert path.read_text(encoding="utf-8") == (
+        "1\n00:00:00,000 --> 00:00:01,000\nfirst\n\n"
+        "2\n00:00:05,000 --> 00:00:06,000\nlater\n\n"
+    )
+
+
+def test_streaming_writer_skips_empty_cues(tmp_path):
+    path = tmp_path / "out.vtt"
+    with get_writer("vtt", str(path)) as writer:
+        writer.write(Cue(0, 1, ""))
+        writer.write(Cue(1, 2, "kept"))
+    assert writer.count == 1
+    assert path.read_text(encoding="utf-8") == "WEBVTT\n\n1\n00:00:01.000 --> 00:00:02.000\nkept\n\n"
+
+
+def test_read_srt_round_trip(tmp_path):
+    path = tmp_path / "round.srt"
+    cues = [Cue(0.5, 1.25, "first line\nsecond line"), Cue(62, 3725.5, "späť")]
+    write_subtitles(cues, str(path))
+    back = list(read_srt(str(path)))
+    assert [(c.start, c.end, c.text) for c in back] == [(c.start, c.end, c.text) for c in cues]
+
+
+def test_blank_lines_inside_a_cue_are_collapsed(tmp_path):
+    assert clean_text("  Hello\n\n \n world \n") == "Hello\n world"
+    store = CueStore()
+    store.append(0, 1, "Hello\n\nworld")
+    path = tmp_path / "blank.srt"
+    write_subtitles(store, str(path))
+    write_subtitles([{"start": 1, "end": 2, "text": "again\n\n\nhere"}], str(tmp_path / "dicts.srt"))
+    assert [c.text for c in read_srt(str(path))] == ["Hello\nworld"]
+    assert [c.text for c in read_srt(str(tmp_path / "dicts.srt"))] == ["again\nhere"]
+    vtt = "".join(get_writer("vtt").iter_text(read_srt(str(path))))
+    assert vtt == "WEBVTT\n\n1\n00:00:00.000 --> 00:00:01.000\nHello\nworld\n\n"
+
+
+def test_vtt_escapes_arrows_and_markup():
+    vtt = get_writer("vtt").format_cue(1, Cue(0, 1, "a --> b <i> & c"))
+    assert vtt.splitlines()[2] == "a --&gt; b &lt;i> &amp; c"
+
+
+def test_generate_srt_accepts_legacy_text(tmp_path):
+    path = tmp_path / "legacy.srt"
+    assert generate_srt("One. Two. Three", str(path)) == 3
+    assert [(c.start, c.end) for c in read_srt(str(path))] == [(0, 3), (3, 6), (6, 9)]
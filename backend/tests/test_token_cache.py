@@ -0,0 +1,62 @@
+import pytest
+import utils.token_cache as token_cache_module
+from utils.token_cache import TokenCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(token_cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_hit_until_ttl(clock):
+    cache = TokenCache(ttl=60, max_entries=10)
+    cache.put("tok", {"id": 1})
+    assert cache.get("tok") == {"id": 1}
+    clock[0] += 59
+    assert cache.get("tok") == {"id": 1}
+    clock[0] += 1
+    assert cache.get("tok") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_jwt_exp_caps_the_ttl(clock):
+    cache = TokenCache(ttl=60, max_entries=10)
+    cache.put("tok", {"id": 1}, token_exp=clock[0] + 5)
+    clock[0] += 5
+    assert cache.get("tok") is None
+
+
+def test_invalidate_user_revokes_only_their_tokens(clock):
+    cache = TokenCache(ttl=60, max_entries=10)
+    cache.put("a1", {"id": 1})
+    cache.put("a2", {"id": 1})
+    cache.put("b", {"id": 2})
+    assert cache.invalidate_user(1) == 2
+    assert cache.get("a1") is None and cache.get("a2") is None
+    assert cache.get("b") == {"id": 2}
+
+
+def test_least_recently_used_token_is_evicted(clock):
+    cache = TokenCache(ttl=60, max_entries=2)
+    cache.put("a", {"id": 1})
+    cache.put("b", {"id": 2})
+    cache.get("a")
+    cache.put("c", {"id": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"id": 1} and cache.get("c") == {"id": 3}
+
+
+def test_zero_ttl_disables_the_cache():
+    cache = TokenCache(ttl=0, max_entries=10)
+    cache.put("tok", {"id": 1})
+    assert cache.get("tok") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_raw_tokens_are_not_kept():
+    cache = TokenCache(ttl=60, max_entries=10)
+    cache.put("secret-token", {"id": 1})
+    assert "secret-token" not in cache._entries
+    assert TokenCache.key("secret-token") in cache._entries
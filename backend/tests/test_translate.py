@@ -0,0 +1,37 @@
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("faster_whisper")
+
+from utils.translate import _make_batches, _source_hint
+
+
+def test_batches_are_length_sorted_and_cover_every_segment():
+    lengths = [30, 5, 12, 7, 40, 5]
+    batches = _make_batches(lengths, batch_size=2, max_batch_tokens=10_000)
+    assert sorted(i for b in batches for i in b) == list(range(len(lengths)))
+    flat = [lengths[i] for b in batches for i in b]
+    assert flat == sorted(flat)
+    assert all(len(b) <= 2 for b in batches)
+
+
+def test_batch_closes_at_padded_token_budget():
+    # 3 x 40 padded tokens would exceed 100
+    batches = _make_batches([10, 40, 40, 40], batch_size=16, max_batch_tokens=100)
+    assert batches == [[0, 1], [2, 3]]
+
+
+def test_oversized_segment_gets_its_own_batch():
+    assert _make_batches([500, 3], batch_size=16, max_batch_tokens=100) == [[1], [0]]
+
+
+def test_no_segments_no_batches():
+    assert _make_batches([], batch_size=16, max_batch_tokens=100) == []
+
+
+def test_auto_source_is_left_to_language_identification():
+    assert _source_hint("auto") is None
+    assert _source_hint("AUTO") is None
+    assert _source_hint("English") == "en"
+    assert _source_hint("fr") == "fr"
@@ -0,0 +1,57 @@
+import pytest
+from utils.cache import (
+    MEMORY_LAYER, cache_stats, get_cache_conn, init_cache, memory_get_many, memory_put_many, normalize_text,
+)
+
+MODEL = "m2m100_418M"
+
+
+@pytest.fixture
+def memory():
+    init_cache()
+    conn = get_cache_conn()
+    conn.execute("DELETE FROM translation_memory")
+    conn.execute("DELETE FROM cache_stats")
+    conn.commit()
+    conn.close()
+
+
+def test_normalization_collapses_whitespace_and_composes_unicode():
+    assert normalize_text("  Hello \n\t world  ") == "Hello world"
+    assert normalize_text("Café") == "Café"
+    # Case and punctuation change meaning, so they are kept
+    assert normalize_text("Hello!") != normalize_text("hello")
+    assert normalize_text(None) == ""
+
+
+def test_lookup_matches_normalized_text_per_language_pair_and_model(memory):
+    memory_put_many([("Hello  world", "Bonjour le monde")], "en", "fr", MODEL)
+    assert memory_get_many([" Hello world\n"], "en", "fr", MODEL) == {"Hello world": "Bonjour le monde"}
+    assert memory_get_many(["Hello world"], "en", "de", MODEL) == {}
+    assert memory_get_many(["Hello world"], "en", "fr", "other-model") == {}
+
+
+def test_hits_and_misses_are_counted_once_per_distinct_line(memory):
+    memory_put_many([("one", "un"), ("two", "deux")], "en", "fr", MODEL)
+    found = memory_get_many(["one", "one ", "two", "three", ""], "en", "fr", MODEL)
+    assert found == {"one": "un", "two": "deux"}
+    stats = cache_stats()[MEMORY_LAYER]
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 2)
+    assert stats["hit_ratio"] == round(2 / 3, 4)
+    conn = get_cache_conn()
+    hits = dict(conn.execute("SELECT source_text, hits FROM translation_memory").fetchall())
+    conn.close()
+    assert hits == {"one": 1, "two": 1}
+
+
+def test_empty_pairs_are_not_stored(memory):
+    memory_put_many([("", "x"), ("  ", "y"), ("kept", ""), ("ok", "d'accord")], "en", "fr", MODEL)
+    assert memory_get_many(["kept", "ok"], "en", "fr", MODEL) == {"ok": "d'accord"}
+
+
+def test_least_recently_used_lines_are_evicted(memory):
+    memory_put_many([("a", "A"), ("b", "B")], "en", "fr", MODEL, max_entries=2)
+    memory_get_many(["a"], "en", "fr", MODEL)
+    memory_put_many([("c", "C")], "en", "fr", MODEL, max_entries=2)
+    assert memory_get_many(["a", "b", "c"], "en", "fr", MODEL) == {"a": "A", "c": "C"}
+    assert cache_stats()[MEMORY_LAYER]["evictions"] == 1
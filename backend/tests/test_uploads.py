@@ -0,0 +1,60 @@
+import asyncio
+import hashlib
+import io
+import pytest
+from starlette.datastructures import UploadFile
+from utils.uploads import UploadError, iter_upload_file, save_stream, save_upload
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+class _Tee:
+    def __init__(self):
+        self.data = b""
+
+    def write(self, chunk):
+        self.data += chunk
+
+
+def test_stream_is_saved_with_size_and_hash(tmp_path):
+    dest = tmp_path / "video.mp4"
+    tee = _Tee()
+    saved = asyncio.run(save_stream(_chunks(b"abc", b"", b"def"), str(dest), max_bytes=10, tee=tee))
+    assert saved == {"path": str(dest), "size": 6, "sha256": hashlib.sha256(b"abcdef").hexdigest()}
+    assert dest.read_bytes() == tee.data == b"abcdef"
+
+
+def test_oversized_upload_is_rejected_and_removed(tmp_path):
+    dest = tmp_path / "big.mp4"
+    with pytest.raises(UploadError) as excinfo:
+        asyncio.run(save_stream(_chunks(b"x" * 6, b"x" * 6), str(dest), max_bytes=10))
+    assert excinfo.value.status_code == 413
+    assert not dest.exists()
+
+
+def test_upload_at_the_limit_is_accepted(tmp_path):
+    saved = asyncio.run(save_stream(_chunks(b"x" * 10), str(tmp_path / "edge.mp4"), max_bytes=10))
+    assert saved["size"] == 10
+
+
+def test_empty_upload_is_rejected_and_removed(tmp_path):
+    dest = tmp_path / "empty.mp4"
+    with pytest.raises(UploadError) as excinfo:
+        asyncio.run(save_stream(_chunks(b""), str(dest)))
+    assert excinfo.value.status_code == 400
+    assert not dest.exists()
+
+
+def test_upload_file_is_read_in_chunks(tmp_path):
+    upload = UploadFile(io.BytesIO(b"0123456789"), filename="clip.mp4")
+
+    async def collect():
+        return [chunk async for chunk in iter_upload_file(upload, chunk_size=4)]
+
+    assert asyncio.run(collect()) == [b"0123", b"4567", b"89"]
+    upload.file.seek(0)
+    saved = asyncio.run(save_upload(upload, str(tmp_path / "clip.mp4")))
+    assert saved["size"] == 10
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from utils.audio import SAMPLE_RATE
+from utils.vad import SpeechMap
+
+
+def _map(regions_seconds, total_seconds=10):
+    audio = np.zeros(int(total_seconds * SAMPLE_RATE), dtype=np.float32)
+    regions = [(int(s * SAMPLE_RATE), int(e * SAMPLE_RATE)) for s, e in regions_seconds]
+    return SpeechMap(audio, regions)
+
+
+def test_speech_only_audio_is_concatenated():
+    speech = _map([(1, 2), (5, 7)])
+    assert len(speech.audio) == 3 * SAMPLE_RATE
+    assert speech.summary() == {"total_seconds": 10.0, "speech_seconds": 3.0, "skipped_seconds": 7.0}
+
+
+def test_times_inside_regions_map_back():
+    speech = _map([(1, 2), (5, 7)])
+    assert speech.to_original(0.5) == pytest.approx(1.5)
+    assert speech.to_original(1.5) == pytest.approx(5.5)
+    assert speech.to_original(2.5, end=True) == pytest.approx(6.5)
+
+
+def test_boundary_is_next_region_for_starts_previous_for_ends():
+    speech = _map([(1, 2), (5, 7)])
+    assert speech.to_original(1.0) == pytest.approx(5.0)
+    assert speech.to_original(1.0, end=True) == pytest.approx(2.0)
+
+
+def test_segment_ending_on_boundary_does_not_span_removed_silence():
+    speech = _map([(1, 2), (5, 7)])
+    [seg] = speech.remap_segments([{
+        "start": 0.2, "end": 1.0, "text": "hello",
+        "words": [{"start": 0.2, "end": 0.6, "word": " hel"}, {"start": 0.6, "end": 1.0, "word": "lo"}],
+    }])
+    assert seg["start"] == pytest.approx(1.2)
+    assert seg["end"] == pytest.approx(2.0)
+    assert seg["words"][-1]["end"] == pytest.approx(2.0)
+
+
+def test_whole_clip_region_keeps_the_array():
+    audio = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    speech = SpeechMap(audio, [(0, len(audio))])
+    assert speech.audio is audio
+    assert speech.to_original(0.25) == pytest.approx(0.25)
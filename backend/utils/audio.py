@@ -1,10 +1,114 @@
+import threading
 import ffmpeg
+import numpy as np
+from utils.resources import scheduler
+
+SAMPLE_RATE = 16000
+# Bytes read from ffmpeg's stdout per chunk (1 second of float32 mono audio)
+PIPE_CHUNK_BYTES = SAMPLE_RATE * 4
+
+
+def _thread_args():
+    # Cap ffmpeg at one stage's thread budget instead of one thread per core
+    threads = scheduler.stage_threads()
+    return {"threads": threads} if threads else {}
+
 
 def extract_audio(video_path, output_audio):
     (
         ffmpeg
         .input(video_path)
-        .output(output_audio, ac=1, ar=16000)
+        .output(output_audio, ac=1, ar=SAMPLE_RATE, **_thread_args())
         .overwrite_output()
         .run(quiet=True)
-    )
\ No newline at end of file
+    )
+
+
+def _start_pcm_pipe(video_path):
+    return (
+        ffmpeg
+        .input(video_path)
+        .output("pipe:", format="f32le", acodec="pcm_f32le", ac=1, ar=SAMPLE_RATE, **_thread_args())
+        .global_args("-loglevel", "error", "-nostdin")
+        .run_async(pipe_stdout=True, pipe_stderr=True)
+    )
+
+
+def extract_audio_array(video_path):
+    """Decode the audio track to a mono 16 kHz float32 array through ffmpeg's stdout.
+
+    The PCM bytes are collected into one buffer and viewed as a NumPy array
+    without a further copy, ready for WhisperModel.transcribe(). stderr is
+    drained on a separate thread so a flood of decoder errors cannot fill
+    its pipe and stall ffmpeg.
+    """
+    proc = _start_pcm_pipe(video_path)
+    errors = []
+    reader = threading.Thread(target=lambda: errors.append(proc.stderr.read()), daemon=True)
+    reader.start()
+    buf = bytearray()
+    try:
+        while True:
+            data = proc.stdout.read(PIPE_CHUNK_BYTES * 16)
+            if not data:
+                break
+            buf += data
+    except BaseException:
+        proc.kill()
+        raise
+    finally:
+        proc.stdout.close()
+        reader.join()
+        proc.stderr.close()
+    if proc.wait() != 0:
+        raise ffmpeg.Error("ffmpeg", b"", errors[0] if errors else b"")
+    usable = len(buf) - len(buf) % 4
+    return np.frombuffer(buf, dtype=np.float32, count=usable // 4)
+
+
+class PipeExtraction:
+    """Extract audio from a video that is fed to ffmpeg's stdin chunk by chunk.
+
+    Lets extraction run while an upload is still arriving. Containers that need
+    seeking (e.g. MP4 with the moov atom at the end) cannot be demuxed from a
+    pipe; in that case finish() returns False and the caller should fall back
+    to extract_audio() on the saved file.
+    """
+
+    def __init__(self, output_audio):
+        self.output_audio = output_audio
+        self.broken = False
+        self._proc = (
+            ffmpeg
+            .input("pipe:0")
+            .output(output_audio, ac=1, ar=16000, **_thread_args())
+            .global_args("-loglevel", "error")
+            .overwrite_output()
+            .run_async(pipe_stdin=True)
+        )
+
+    def write(self, chunk):
+        if self.broken:
+            return
+        try:
+            self._proc.stdin.write(chunk)
+        except (BrokenPipeError, OSError):
+            # ffmpeg gave up on this input; stop feeding it
+            self.broken = True
+
+    def finish(self):
+        """Close the pipe, wait for ffmpeg and report whether the audio is usable."""
+        try:
+            self._proc.stdin.close()
+        except (BrokenPipeError, OSError):
+            self.broken = True
+        returncode = self._proc.wait()
+        return returncode == 0 and not self.broken
+
+    def abort(self):
+        try:
+            self._proc.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        self._proc.kill()
+        self._proc.wait()
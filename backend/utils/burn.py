@@ -1,23 +1,148 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 import ffmpeg
+from utils.config import (
+    BURN_MODE, BURN_MODES, BURN_PRESET, BURN_CRF, BURN_THREADS, BURN_PARALLEL_SEGMENTS,
+)
+from utils.resources import scheduler
 
 
-def burn_subtitles(video_path, srt_path, output_path):
-    """Burn subtitles into the video while preserving the audio stream.
-
-    Uses ffmpeg to apply the subtitles video filter (`-vf subtitles=...`) and
-    copies the audio stream (`-c:a copy`) to avoid re-encoding or dropping audio.
-    """
+def _run(stream):
     try:
-        # Use the subtitles filter on the video and copy the audio stream
-        (
-            ffmpeg
-            .input(video_path)
-            .output(output_path, vf=f"subtitles={srt_path}", vcodec='libx264', acodec='copy')
-            .overwrite_output()
-            .run(quiet=True)
-        )
+        stream.overwrite_output().run(quiet=True)
     except ffmpeg.Error as e:
         # Log ffmpeg stderr for debugging
         err = e.stderr.decode() if isinstance(e.stderr, (bytes, bytearray)) else str(e)
         print(f"ffmpeg error while burning subtitles: {err}")
-        raise
\ No newline at end of file
+        raise
+
+
+def _x264_args(preset, crf, threads):
+    args = {"vcodec": "libx264", "preset": preset, "crf": crf, "acodec": "copy"}
+    if threads:
+        args["threads"] = threads
+    return args
+
+
+# mov_text language tags are ISO 639-2; keys are the codes used in translate.LANG_CODES
+ISO639_2 = {
+    "en": "eng", "hi": "hin", "fr": "fra", "es": "spa", "de": "deu", "pt": "por", "zh": "zho",
+    "ja": "jpn", "ko": "kor", "ru": "rus", "ar": "ara", "it": "ita", "nl": "nld", "pl": "pol",
+    "tr": "tur", "vi": "vie", "th": "tha",
+}
+
+
+def mux_subtitle_tracks(video_path, tracks, output_path):
+    """Add several SRTs as selectable mov_text tracks; audio and video are stream-copied.
+
+    Args:
+        video_path: Source video
+        tracks: List of (srt_path, language_code) pairs; the first is the default track
+        output_path: Where to write the MP4
+    """
+    video = ffmpeg.input(video_path)
+    streams = [video["v"], video["a?"]] + [ffmpeg.input(path)["s"] for path, _ in tracks]
+    metadata = {}
+    for i, (_, lang) in enumerate(tracks):
+        metadata[f"metadata:s:s:{i}"] = f"language={ISO639_2.get(lang, lang or 'und')}"
+        metadata[f"disposition:s:{i}"] = "default" if i == 0 else "0"
+    _run(ffmpeg.output(
+        *streams, output_path,
+        vcodec="copy", acodec="copy", scodec="mov_text", movflags="+faststart",
+        **metadata
+    ))
+
+
+def mux_soft_subtitles(video_path, srt_path, output_path):
+    """Add the SRT as a selectable mov_text track; audio and video are stream-copied."""
+    mux_subtitle_tracks(video_path, [(srt_path, None)], output_path)
+
+
+def burn_hard(video_path, srt_path, output_path, preset=BURN_PRESET, crf=BURN_CRF, threads=BURN_THREADS):
+    """Re-encode the video with the subtitles drawn in, copying the audio stream."""
+    threads = threads or scheduler.stage_threads()
+    _run(
+        ffmpeg
+        .input(video_path)
+        .output(output_path, vf=f"subtitles={srt_path}", movflags="+faststart", **_x264_args(preset, crf, threads))
+    )
+
+
+def _split_at_keyframes(video_path, workdir, pieces):
+    duration = float(ffmpeg.probe(video_path)["format"]["duration"])
+    segment_time = max(1.0, duration / pieces)
+    pattern = os.path.join(workdir, "piece_%04d.mp4")
+    listing = os.path.join(workdir, "pieces.csv")
+    # -c copy can only cut at keyframes, so pieces start where the segment muxer finds one
+    _run(
+        ffmpeg
+        .input(video_path)
+        .output(pattern, c="copy", f="segment", segment_time=segment_time,
+                segment_list=listing, segment_list_type="csv", reset_timestamps=1)
+    )
+    result = []
+    with open(listing) as f:
+        for line in f:
+            name, start, _ = line.strip().split(",")
+            result.append((os.path.join(workdir, name), float(start)))
+    return result
+
+
+def burn_parallel(video_path, srt_path, output_path, pieces=BURN_PARALLEL_SEGMENTS,
+                  preset=BURN_PRESET, crf=BURN_CRF):
+    """Split at keyframes, burn every piece in its own ffmpeg process, then concatenate."""
+    workdir = tempfile.mkdtemp(prefix="burn_")
+    try:
+        parts = _split_at_keyframes(video_path, workdir, pieces)
+        # Stay within the stage's thread budget: fewer pieces at once, each with a share of it
+        budget = scheduler.stage_threads(os.cpu_count() or 1)
+        concurrent = max(1, min(len(parts), budget))
+        threads = max(1, budget // concurrent)
+
+        def burn_piece(part):
+            piece_path, start = part
+            out = piece_path.replace(".mp4", "_burned.mp4")
+            # Shift to the original timeline so the right cues are drawn, then back to zero
+            vf = f"setpts=PTS+{start}/TB,subtitles={srt_path},setpts=PTS-STARTPTS"
+            _run(ffmpeg.input(piece_path).output(out, vf=vf, **_x264_args(preset, crf, threads)))
+            return out
+
+        with ThreadPoolExecutor(max_workers=concurrent) as pool:
+            burned = list(pool.map(burn_piece, parts))
+
+        concat_list = os.path.join(workdir, "concat.txt")
+        with open(concat_list, "w") as f:
+            for path in burned:
+                f.write(f"file '{path}'\n")
+        _run(ffmpeg.input(concat_list, f="concat", safe=0).output(output_path, c="copy", movflags="+faststart"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def burn_subtitles(video_path, srt_path, output_path, mode=BURN_MODE, tracks=None):
+    """Produce a video with subtitles.
+
+    Modes:
+      - "soft": mux the SRT as a mov_text track with stream copy (no re-encode)
+      - "hard": burn with libx264 using BURN_PRESET / BURN_CRF / BURN_THREADS
+      - "parallel": hard burn of keyframe-aligned pieces in parallel ffmpeg processes
+
+    Audio is always stream-copied, and the moov atom is written at the front
+    (+faststart) so playback can start before the download completes.
+
+    With tracks (a list of (srt_path, language_code)), "soft" muxes every
+    language as its own track; the hard modes burn srt_path only. The hard
+    modes re-encode, so they hold a resource scheduler slot while running.
+    """
+    if mode not in BURN_MODES:
+        raise ValueError(f"Unsupported burn mode '{mode}'. Choose one of: {', '.join(BURN_MODES)}")
+    if mode == "soft":
+        mux_subtitle_tracks(video_path, tracks or [(srt_path, None)], output_path)
+    elif mode == "parallel":
+        with scheduler.slot("burn"):
+            burn_parallel(video_path, srt_path, output_path)
+    else:
+        with scheduler.slot("burn"):
+            burn_hard(video_path, srt_path, output_path)
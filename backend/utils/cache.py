@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from utils.config import CACHE_DIR, CACHE_MAX_BYTES, TRANSLATION_MEMORY_MAX_ENTRIES
+
+# Results are stored in two layers so that a new target language for an
+# already-seen video reuses the transcription and only runs translation.
+TRANSCRIPTION_LAYER = "transcription"
+TRANSLATION_LAYER = "translation"
+# Per-segment translation memory; its hits/misses share the cache_stats table
+MEMORY_LAYER = "memory"
+
+CACHE_DB = os.path.join(CACHE_DIR, "results.db")
+
+
+def get_cache_conn():
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # WAL + busy timeout so several worker processes can read and write concurrently
+    conn = sqlite3.connect(CACHE_DB, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_cache():
+    conn = get_cache_conn()
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS cache_entries(
+            key TEXT PRIMARY KEY,
+            layer TEXT NOT NULL,
+            value TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL,
+            last_access REAL
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache_entries(last_access)")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS translation_memory(
+            key TEXT PRIMARY KEY,
+            src_lang TEXT NOT NULL,
+            tgt_lang TEXT NOT NULL,
+            model TEXT NOT NULL,
+            source_text TEXT NOT NULL,
+            target_text TEXT NOT NULL,
+            hits INTEGER DEFAULT 0,
+            created_at REAL,
+            last_access REAL
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_memory_lru ON translation_memory(last_access)")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS cache_stats(
+            layer TEXT NOT NULL,
+            name TEXT NOT NULL,
+            value INTEGER DEFAULT 0,
+            PRIMARY KEY(layer, name)
+        )
+    """)
+    conn.commit()
+    conn.close()
+
+
+def make_key(layer, *parts):
+    """Build a cache key from the layer name and its identifying parts."""
+    return "|".join([layer] + [str(p or "") for p in parts])
+
+
+def _bump(cur, layer, name, amount=1):
+    cur.execute("""
+        INSERT INTO cache_stats(layer, name, value) VALUES (?, ?, ?)
+        ON CONFLICT(layer, name) DO UPDATE SET value = value + excluded.value
+    """, (layer, name, amount))
+
+
+def cache_get(layer, key):
+    """Return the cached value for key (decoded from JSON), or None on a miss."""
+    conn = get_cache_conn()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT value FROM cache_entries WHERE key = ?", (key,))
+        row = cur.fetchone()
+        if row is None:
+            _bump(cur, layer, "misses")
+            conn.commit()
+            return None
+        cur.execute("UPDATE cache_entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        _bump(cur, layer, "hits")
+        conn.commit()
+        return json.loads(row["value"])
+    finally:
+        conn.close()
+
+
+def cache_put(layer, key, value, max_bytes=CACHE_MAX_BYTES):
+    """Store value under key, then evict least recently used entries over max_bytes."""
+    data = json.dumps(value)
+    size = len(data.encode("utf-8"))
+    now = time.time()
+    conn = get_cache_conn()
+    try:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute("""
+            INSERT OR REPLACE INTO cache_entries(key, layer, value, size, created_at, last_access)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (key, layer, data, size, now, now))
+        _evict(cur, max_bytes)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _evict(cur, max_bytes):
+    cur.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries")
+    total = cur.fetchone()[0]
+    if total <= max_bytes:
+        return
+    cur.execute("SELECT key, layer, size FROM cache_entries ORDER BY last_access ASC")
+    for row in cur.fetchall():
+        if total <= max_bytes:
+            break
+        cur.execute("DELETE FROM cache_entries WHERE key = ?", (row["key"],))
+        _bump(cur, row["layer"], "evictions")
+        total -= row["size"]
+
+
+def cache_stats():
+    """Hit/miss/eviction counters per layer plus current entry count and size."""
+    conn = get_cache_conn()
+    try:
+        cur = conn.cursor()
+        stats = {}
+        cur.execute("SELECT layer, name, value FROM cache_stats")
+        for row in cur.fetchall():
+            stats.setdefault(row["layer"], {})[row["name"]] = row["value"]
+        cur.execute("SELECT layer, COUNT(*) AS entries, COALESCE(SUM(size), 0) AS bytes FROM cache_entries GROUP BY layer")
+        for row in cur.fetchall():
+            layer = stats.setdefault(row["layer"], {})
+            layer["entries"] = row["entries"]
+            layer["bytes"] = row["bytes"]
+        cur.execute("""
+            SELECT COUNT(*) AS entries,
+                   COALESCE(SUM(LENGTH(source_text) + LENGTH(target_text)), 0) AS bytes
+            FROM translation_memory
+        """)
+        row = cur.fetchone()
+        if row["entries"]:
+            memory = stats.setdefault(MEMORY_LAYER, {})
+            memory["entries"] = row["entries"]
+            memory["bytes"] = row["bytes"]
+        for layer in stats.values():
+            hits = layer.get("hits", 0)
+            lookups = hits + layer.get("misses", 0)
+            layer["hit_ratio"] = round(hits / lookups, 4) if lookups else 0.0
+        return stats
+    finally:
+        conn.close()
+
+
+# ---------- translation memory ----------
+def normalize_text(text):
+    """Unicode NFC with whitespace collapsed; case and punctuation are kept."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+def _memory_key(src_lang, tgt_lang, model, normalized):
+    raw = "\x1f".join([model, src_lang, tgt_lang, normalized])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def memory_get_many(texts, src_lang, tgt_lang, model):
+    """Look up translations for several source texts at once.
+
+    Returns:
+        Dict mapping normalized source text -> stored translation (hits only)
+    """
+    wanted = {}
+    for text in texts:
+        norm = normalize_text(text)
+        if norm:
+            wanted[_memory_key(src_lang, tgt_lang, model, norm)] = norm
+    if not wanted:
+        return {}
+    conn = get_cache_conn()
+    try:
+        cur = conn.cursor()
+        found = {}
+        keys = list(wanted)
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            part = keys[i:i + 500]
+            cur.execute(
+                f"SELECT key, target_text FROM translation_memory WHERE key IN ({','.join('?' * len(part))})", part
+            )
+            for row in cur.fetchall():
+                found[row["key"]] = row["target_text"]
+        if found:
+            now = time.time()
+            cur.executemany(
+                "UPDATE translation_memory SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                [(now, k) for k in found],
+            )
+        _bump(cur, MEMORY_LAYER, "hits", len(found))
+        _bump(cur, MEMORY_LAYER, "misses", len(wanted) - len(found))
+        conn.commit()
+        return {wanted[k]: v for k, v in found.items()}
+    finally:
+        conn.close()
+
+
+def memory_put_many(pairs, src_lang, tgt_lang, model, max_entries=TRANSLATION_MEMORY_MAX_ENTRIES):
+    """Store (source_text, translation) pairs, evicting least recently used entries."""
+    now = time.time()
+    rows = []
+    for source, target in pairs:
+        norm = normalize_text(source)
+        if norm and target:
+            rows.append((_memory_key(src_lang, tgt_lang, model, norm), src_lang, tgt_lang, model, norm, target, now, now))
+    if not rows:
+        return
+    conn = get_cache_conn()
+    try:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        cur.executemany("""
+            INSERT OR REPLACE INTO translation_memory(key, src_lang, tgt_lang, model, source_text, target_text,
+                                                      created_at, last_access)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        cur.execute("SELECT COUNT(*) FROM translation_memory")
+        excess = cur.fetchone()[0] - max_entries
+        if excess > 0:
+            cur.execute("""
+                DELETE FROM translation_memory WHERE key IN (
+                    SELECT key FROM translation_memory ORDER BY last_access ASC LIMIT ?
+                )
+            """, (excess,))
+            _bump(cur, MEMORY_LAYER, "evictions", excess)
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,259 @@
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import numpy as np
+from utils.config import TRANSCRIBE_CHUNK_SECONDS, TRANSCRIBE_CHUNK_OVERLAP, TRANSCRIBE_WORKERS, DECODING_PROFILE
+from utils.audio import SAMPLE_RATE
+from utils.decoding import decode, merge_counters, new_counters
+from utils.langid import identify_windows, probe_windows
+from utils.models import registry
+from utils.resources import detect_cores, scheduler
+
+# Energy frames used to look for silence when picking cut points
+FRAME_SECONDS = 0.03
+# How far around each target cut point to search for the quietest frame
+SEARCH_SECONDS = 10.0
+
+
+def find_chunks(audio, chunk_seconds=TRANSCRIBE_CHUNK_SECONDS, overlap=TRANSCRIBE_CHUNK_OVERLAP,
+                sample_rate=SAMPLE_RATE):
+    """Split audio into windows cut at the quietest point near every chunk_seconds.
+
+    Args:
+        audio: Mono float32 samples
+        chunk_seconds: Target window length
+        overlap: Seconds added on both sides of every cut so words at a cut are
+            heard in full by at least one window
+
+    Returns:
+        List of (window_start, window_end, own_start, own_end) in seconds. The
+        "own" range is the part of the window whose words are kept when merging.
+    """
+    duration = len(audio) / sample_rate
+    if duration <= chunk_seconds * 1.5:
+        return [(0.0, duration, 0.0, duration)]
+
+    frame = int(FRAME_SECONDS * sample_rate)
+    n_frames = len(audio) // frame
+    energy = np.sqrt(np.mean(audio[:n_frames * frame].reshape(n_frames, frame) ** 2, axis=1))
+
+    cuts = [0.0]
+    target = chunk_seconds
+    while target < duration - chunk_seconds * 0.5:
+        lo = max(int((target - SEARCH_SECONDS) / FRAME_SECONDS), int(cuts[-1] / FRAME_SECONDS) + 1)
+        hi = min(int((target + SEARCH_SECONDS) / FRAME_SECONDS), n_frames)
+        cut = target if hi <= lo else (lo + int(np.argmin(energy[lo:hi]))) * FRAME_SECONDS
+        cuts.append(cut)
+        target = cut + chunk_seconds
+    cuts.append(duration)
+
+    chunks = []
+    for own_start, own_end in zip(cuts[:-1], cuts[1:]):
+        chunks.append((max(0.0, own_start - overlap), min(duration, own_end + overlap), own_start, own_end))
+    # The last window owns everything up to the end, including a word ending exactly at it
+    win_start, win_end, own_start, _ = chunks[-1]
+    chunks[-1] = (win_start, win_end, own_start, float("inf"))
+    return chunks
+
+
+def merge_chunk_segments(chunk_results):
+    """Merge per-window segments into one timeline without overlap duplicates.
+
+    Each word is kept only by the window that owns its midpoint, so words heard
+    twice in an overlap region appear once. Segments are rebuilt from the words
+    they keep and dropped when none remain.
+    """
+    merged = []
+    for (own_start, own_end), segments in chunk_results:
+        for seg in segments:
+            words = seg.get("words")
+            if not words:
+                mid = (seg["start"] + seg["end"]) / 2
+                if own_start <= mid < own_end:
+                    merged.append({"start": seg["start"], "end": seg["end"], "text": seg["text"]})
+                continue
+            kept = [w for w in words if own_start <= (w["start"] + w["end"]) / 2 < own_end]
+            if not kept:
+                continue
+            merged.append({
+                "start": kept[0]["start"],
+                "end": kept[-1]["end"],
+                "text": "".join(w["word"] for w in kept).strip(),
+            })
+    merged.sort(key=lambda s: s["start"])
+    return merged
+
+
+# ---------- worker process side ----------
+_worker_model = None
+
+
+def _init_worker(model_name, compute_type, cpu_threads):
+    global _worker_model
+    from faster_whisper import WhisperModel
+    _worker_model = WhisperModel(model_name, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def _transcribe_window(audio, offset, language, profile):
+    counters = new_counters(profile)
+    segments, info = decode(_worker_model, audio, profile, language, word_timestamps=True, counters=counters)
+    out = []
+    for s in segments:
+        s["start"] += offset
+        s["end"] += offset
+        for w in s["words"]:
+            w["start"] += offset
+            w["end"] += offset
+        out.append(s)
+    return out, info.language, counters
+
+
+def _identify_windows(windows):
+    return identify_windows(_worker_model, windows)
+
+
+# (model, compute type, workers, threads) -> [pool, callers using it], least recently used first
+_pools = OrderedDict()
+_pools_lock = threading.Lock()
+# Processes sharing this machine's cores for chunked transcription (set in job workers)
+_cpu_share = 1
+
+
+def share_cpus(processes):
+    """Size this process's pools to 1/processes of the cores when the resource scheduler is off.
+
+    Called by every job worker, so JOB_WORKERS pools of TRANSCRIBE_WORKERS
+    processes don't each size themselves to the whole machine.
+    """
+    global _cpu_share
+    _cpu_share = max(1, processes)
+
+
+def can_spawn_workers():
+    """Daemonic processes may not have children; they transcribe in-process instead."""
+    return not multiprocessing.current_process().daemon
+
+
+def _take_idle_pools():
+    """Remove least recently used idle pools beyond the model registry bound (hold _pools_lock)."""
+    stale = []
+    for key in list(_pools):
+        if len(_pools) <= registry.max_resident:
+            break
+        pool, users = _pools[key]
+        if users == 0:
+            del _pools[key]
+            stale.append(pool)
+    return stale
+
+
+def _shutdown_pools(pools):
+    for pool in pools:
+        print("Shutting down least recently used transcription pool")
+        pool.shutdown(wait=False)
+
+
+def shutdown_executors():
+    """Shut down every idle pool and wait for its processes to exit (at process exit)."""
+    with _pools_lock:
+        idle = [key for key, (_, users) in _pools.items() if users == 0]
+        pools = [_pools.pop(key)[0] for key in idle]
+    for pool in pools:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+@contextmanager
+def executor_for(model_name, compute_type, workers=TRANSCRIBE_WORKERS):
+    """Hold a process pool whose workers each hold their own Whisper model.
+
+    The pool shares one stage's thread budget when the resource scheduler is
+    on, and this process's share of the cores (see share_cpus()) when it is
+    off. One pool is kept per model and budget, at most registry.max_resident of
+    them, evicted least recently used first; a pool is never shut down while
+    a caller still holds it.
+    """
+    budget = scheduler.stage_threads(max(1, detect_cores() // _cpu_share))
+    workers = max(1, min(workers, budget))
+    cpu_threads = max(1, budget // workers)
+    key = (model_name, compute_type, workers, cpu_threads)
+    with _pools_lock:
+        entry = _pools.get(key)
+        if entry is None:
+            entry = [ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_name, compute_type, cpu_threads),
+            ), 0]
+            _pools[key] = entry
+        _pools.move_to_end(key)
+        entry[1] += 1
+        stale = _take_idle_pools()
+    _shutdown_pools(stale)
+    try:
+        yield entry[0]
+    finally:
+        with _pools_lock:
+            entry[1] -= 1
+            stale = _take_idle_pools()
+        _shutdown_pools(stale)
+
+
+def identify_chunked(audio, model_name, compute_type, workers=TRANSCRIBE_WORKERS):
+    """Run utils.langid in a worker process, so the API process needn't load Whisper for it.
+
+    Only the probe windows are sent to the worker.
+
+    Returns:
+        As utils.langid.identify_windows()
+    """
+    with executor_for(model_name, compute_type, workers) as executor:
+        return executor.submit(_identify_windows, probe_windows(audio)).result()
+
+
+def transcribe_chunked(audio, model_name, compute_type, language=None, workers=TRANSCRIBE_WORKERS,
+                       chunk_seconds=TRANSCRIBE_CHUNK_SECONDS, overlap=TRANSCRIBE_CHUNK_OVERLAP,
+                       on_window=None, profile=DECODING_PROFILE, counters=None):
+    """Transcribe long audio in parallel windows and merge them on the global timeline.
+
+    Args:
+        audio: Mono 16 kHz float32 samples
+        model_name / compute_type: Whisper model each worker loads
+        language: Source language code, or None to use the first window's detection
+        workers: Number of worker processes
+        chunk_seconds / overlap: Window length and overlap in seconds
+        on_window: Optional callback(segments, language, fraction_done) called for
+            each window, in timeline order, as soon as it is transcribed
+        profile: utils.decoding profile each window is decoded with
+        counters: Optional utils.decoding.new_counters() dict that receives
+            the segment / re-decode counts of every window
+
+    Returns:
+        (segments, detected_language)
+    """
+    chunks = find_chunks(audio, chunk_seconds, overlap)
+    with executor_for(model_name, compute_type, workers) as executor:
+        print(f"Chunked transcription: {len(chunks)} window(s) on {workers} worker(s)")
+
+        futures = []
+        for win_start, win_end, _, _ in chunks:
+            window = audio[int(win_start * SAMPLE_RATE):int(win_end * SAMPLE_RATE)]
+            futures.append(executor.submit(_transcribe_window, window, win_start, language, profile))
+
+        duration = len(audio) / SAMPLE_RATE
+        merged = []
+        detected = language
+        for (_, _, own_start, own_end), fut in zip(chunks, futures):
+            segments, lang, window_counters = fut.result()
+            if counters is not None:
+                merge_counters(counters, window_counters)
+            if detected is None:
+                detected = lang
+            # Ownership ranges don't overlap, so windows can be merged independently
+            window_segments = merge_chunk_segments([((own_start, own_end), segments)])
+            merged.extend(window_segments)
+            if on_window is not None:
+                on_window(window_segments, detected, min(1.0, own_end / duration))
+    return merged, detected
@@ -0,0 +1,56 @@
+import asyncio
+import hashlib
+import json
+from utils import metrics
+
+
+def request_key(media_hash, *params):
+    """Key identical work: same upload bytes plus the same processing options."""
+    raw = json.dumps([media_hash, *params], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class InFlight:
+    """Share one running coroutine between concurrent identical requests.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task instead of starting their own. The
+    task is shielded, so a leader whose client disconnects does not cancel
+    the work for the followers.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._tasks = {}
+
+    async def run(self, key, start):
+        """Await the result for key, calling start() only if nothing is running.
+
+        Args:
+            key: Result of request_key()
+            start: Zero-argument callable returning the coroutine to run
+
+        Returns:
+            (result, coalesced) where coalesced is True for attached callers
+        """
+        task = self._tasks.get(key)
+        coalesced = task is not None
+        if coalesced:
+            metrics.inc(f"{self.name}_coalesced_total")
+        else:
+            metrics.inc(f"{self.name}_runs_total")
+            task = asyncio.ensure_future(start())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        result = await asyncio.shield(task)
+        return result, coalesced
+
+    def _forget(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # Mark the exception retrieved in case every waiter went away
+            task.exception()
+
+    def __len__(self):
+        return len(self._tasks)
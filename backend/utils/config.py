@@ -0,0 +1,162 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Shared settings used by both the API process and the job workers.
+DB_PATH = os.getenv("DB_PATH", "users.db")
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+OUTPUT_DIR = os.getenv("OUTPUT_DIR", "outputs")
+
+# Number of worker processes running the subtitle pipeline for /jobs
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Seconds an idle worker waits before polling the queue again
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+
+# Upload ingestion: bodies are copied to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+# Largest accepted upload in bytes (default 500MB, same as the frontend limit)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(500 * 1024 * 1024)))
+# Start ffmpeg audio extraction while a raw-body upload is still arriving
+EXTRACT_DURING_UPLOAD = os.getenv("EXTRACT_DURING_UPLOAD", "true").lower() in ("1", "true", "yes")
+
+# On-disk result cache (transcriptions and translations keyed by media hash)
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_DIR = os.getenv("CACHE_DIR", "cache")
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+# Translation memory: exact-match segment translations shared across jobs
+# (same normalized text, languages and model), LRU-capped at this many entries
+TRANSLATION_MEMORY = os.getenv("TRANSLATION_MEMORY", "true").lower() in ("1", "true", "yes")
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", "200000"))
+
+# Batched M2M100 translation: max segments per generate() call and max
+# padded source tokens per batch (batch size x longest segment)
+TRANSLATION_BATCH_SIZE = int(os.getenv("TRANSLATION_BATCH_SIZE", "16"))
+TRANSLATION_MAX_BATCH_TOKENS = int(os.getenv("TRANSLATION_MAX_BATCH_TOKENS", "4096"))
+# Most target languages accepted in one request's `languages` list
+MAX_TARGET_LANGUAGES = int(os.getenv("MAX_TARGET_LANGUAGES", "8"))
+
+# Chunked transcription: long audio is split at silences into windows of about
+# TRANSCRIBE_CHUNK_SECONDS (+ overlap) and transcribed in a process pool
+CHUNKED_TRANSCRIPTION = os.getenv("CHUNKED_TRANSCRIPTION", "true").lower() in ("1", "true", "yes")
+TRANSCRIBE_CHUNK_SECONDS = float(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "120"))
+TRANSCRIBE_CHUNK_OVERLAP = float(os.getenv("TRANSCRIBE_CHUNK_OVERLAP", "2.0"))
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+# Streaming progress: Whisper hands over transcribed segments in groups of this
+# size. Cues needing translation are emitted once a full TRANSLATION_BATCH_SIZE
+# batch has been translated; untranslated cues are emitted right away.
+STREAM_FLUSH_SEGMENTS = int(os.getenv("STREAM_FLUSH_SEGMENTS", "4"))
+# Minimum seconds between two progress events for the same stage
+STREAM_PROGRESS_INTERVAL = float(os.getenv("STREAM_PROGRESS_INTERVAL", "1.0"))
+
+# "memory": ffmpeg pipes 16 kHz float32 PCM straight into Whisper (no .wav)
+# "file": write uploads/{id}.wav first (useful for debugging)
+AUDIO_EXTRACT_MODE = os.getenv("AUDIO_EXTRACT_MODE", "memory").lower()
+
+# Voice activity detection before transcription: "silero" (faster-whisper's
+# bundled model), "energy" (RMS threshold) or "off"
+VAD_MODE = os.getenv("VAD_MODE", "silero").lower()
+VAD_THRESHOLD = float(os.getenv("VAD_THRESHOLD", "0.5"))
+VAD_ENERGY_THRESHOLD_DB = float(os.getenv("VAD_ENERGY_THRESHOLD_DB", "-40"))
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "250"))
+VAD_MIN_SILENCE_MS = int(os.getenv("VAD_MIN_SILENCE_MS", "1000"))
+VAD_SPEECH_PAD_MS = int(os.getenv("VAD_SPEECH_PAD_MS", "300"))
+
+# Models. Defaults per deployment; /upload and /jobs can override them per request.
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "small")
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+TRANSLATION_MODEL = os.getenv("TRANSLATION_MODEL", "facebook/m2m100_418M")
+WHISPER_SIZES = ("tiny", "base", "small", "medium")
+WHISPER_COMPUTE_TYPES = ("int8", "int8_float16", "float32")
+TRANSLATION_MODELS = ("facebook/m2m100_418M", "facebook/m2m100_1.2B")
+# Whisper decoding profile (beam size, temperature fallback, thresholds; see
+# utils.decoding). "adaptive" decodes greedily and re-decodes low-confidence
+# segments with the accurate profile. Selectable per request with `decoding`.
+DECODING_PROFILE = os.getenv("DECODING_PROFILE", "balanced").lower()
+DECODING_PROFILES = ("fast", "balanced", "accurate", "adaptive")
+# Adaptive mode re-decodes a segment when avg_logprob is below this or
+# no_speech_prob is above ADAPTIVE_NO_SPEECH_THRESHOLD
+ADAPTIVE_LOGPROB_THRESHOLD = float(os.getenv("ADAPTIVE_LOGPROB_THRESHOLD", "-0.7"))
+ADAPTIVE_NO_SPEECH_THRESHOLD = float(os.getenv("ADAPTIVE_NO_SPEECH_THRESHOLD", "0.5"))
+# Audio context added on both sides of a re-decoded segment
+ADAPTIVE_PAD_SECONDS = float(os.getenv("ADAPTIVE_PAD_SECONDS", "0.3"))
+# Language identification when source_lang is "auto": Whisper's language
+# detector runs on LANGID_PROBE_SECONDS of speech split into LANGID_WINDOWS
+# evenly spaced windows, stopping after the first window whose top language
+# reaches LANGID_CONFIDENT. The result is passed to Whisper as the language.
+LANGID_PROBE_SECONDS = float(os.getenv("LANGID_PROBE_SECONDS", "30"))
+LANGID_WINDOWS = int(os.getenv("LANGID_WINDOWS", "3"))
+LANGID_CONFIDENT = float(os.getenv("LANGID_CONFIDENT", "0.9"))
+# Translation engine: "torch" runs the Hugging Face M2M100 model, "ctranslate2"
+# an int8 CTranslate2 conversion of it (create with
+# `python -m utils.translation_backends convert`) stored under CT2_MODEL_DIR
+TRANSLATION_BACKEND = os.getenv("TRANSLATION_BACKEND", "torch").lower()
+TRANSLATION_BACKENDS = ("torch", "ctranslate2")
+CT2_MODEL_DIR = os.getenv("CT2_MODEL_DIR", "models/ct2")
+CT2_COMPUTE_TYPE = os.getenv("CT2_COMPUTE_TYPE", "int8")
+# Beam size used by the CTranslate2 backend (M2M100's generation config uses 5)
+CT2_BEAM_SIZE = int(os.getenv("CT2_BEAM_SIZE", "5"))
+# Threads per translation call; 0 uses the resource scheduler's stage budget
+CT2_THREADS = int(os.getenv("CT2_THREADS", "0"))
+# Most models kept in memory at once per process; least recently used is unloaded
+MODEL_MAX_RESIDENT = int(os.getenv("MODEL_MAX_RESIDENT", "3"))
+# Comma-separated models loaded in the background at startup,
+# e.g. "whisper:small:int8,translation:facebook/m2m100_418M"
+PREWARM_MODELS = os.getenv("PREWARM_MODELS", "")
+
+# Subtitle output: "soft" muxes a mov_text track without re-encoding, "hard"
+# burns with libx264, "parallel" burns keyframe-aligned pieces concurrently
+BURN_MODE = os.getenv("BURN_MODE", "hard").lower()
+BURN_MODES = ("soft", "hard", "parallel")
+BURN_PRESET = os.getenv("BURN_PRESET", "veryfast")
+BURN_CRF = int(os.getenv("BURN_CRF", "23"))
+# 0 uses the resource scheduler's stage budget (or x264's own choice when it is off)
+BURN_THREADS = int(os.getenv("BURN_THREADS", "0"))
+BURN_PARALLEL_SEGMENTS = int(os.getenv("BURN_PARALLEL_SEGMENTS", str(max(2, (os.cpu_count() or 2) // 2))))
+
+# Resource scheduler: heavy stages (transcribe/translate, burn) take one of
+# HEAVY_STAGE_SLOTS machine-wide slots and run with CPU_CORES / slots threads,
+# so concurrent jobs don't oversubscribe the CPU. 0 means detect / derive:
+# cores from the affinity mask and cgroup quota, slots from cores and memory
+RESOURCE_SCHEDULER = os.getenv("RESOURCE_SCHEDULER", "true").lower() in ("1", "true", "yes")
+CPU_CORES = int(os.getenv("CPU_CORES", "0"))
+HEAVY_STAGE_SLOTS = int(os.getenv("HEAVY_STAGE_SLOTS", "0"))
+# Fewest threads a heavy stage should get when deriving the slot count
+STAGE_MIN_THREADS = int(os.getenv("STAGE_MIN_THREADS", "2"))
+# Memory a heavy stage may need (models + buffers) when deriving the slot count
+STAGE_MEMORY_BYTES = int(os.getenv("STAGE_MEMORY_BYTES", str(2 * 1024 * 1024 * 1024)))
+# Pin each /jobs worker process to its own block of cores
+PIN_WORKERS = os.getenv("PIN_WORKERS", "true").lower() in ("1", "true", "yes")
+# Lock files shared by every process on the machine, one per slot
+SCHEDULER_LOCK_DIR = os.getenv("SCHEDULER_LOCK_DIR", os.path.join(CACHE_DIR, "slots"))
+
+# SQLite access layer
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+# Password hashing runs in a bounded thread pool; requests beyond
+# workers + queue get 429 instead of stalling the event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(2, (os.cpu_count() or 2) // 2))))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "32"))
+
+# Verified-token cache for get_current_user. Entries live at most this many
+# seconds, which also bounds how long another process can honour a revoked token
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "60"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+
+# Storage lifecycle: artifacts in UPLOAD_DIR/OUTPUT_DIR older than the TTL are
+# swept, and when the total exceeds the quota the oldest go first (0 disables either)
+STORAGE_TTL_SECONDS = int(os.getenv("STORAGE_TTL_SECONDS", str(24 * 3600)))
+STORAGE_QUOTA_BYTES = int(os.getenv("STORAGE_QUOTA_BYTES", str(10 * 1024 * 1024 * 1024)))
+STORAGE_SWEEP_INTERVAL = float(os.getenv("STORAGE_SWEEP_INTERVAL", "300"))
+
+# Structured JSON log lines for pipeline spans (one object per line on stdout)
+LOG_JSON = os.getenv("LOG_JSON", "true").lower() in ("1", "true", "yes")
+
+# Subtitle output formats: every run writes SRT (used for burning and the
+# legacy srt_file field) plus the requested format when it differs
+SUBTITLE_FORMAT = os.getenv("SUBTITLE_FORMAT", "srt").lower()
+# Default style for ASS output (also used when burning an ASS file)
+ASS_FONT = os.getenv("ASS_FONT", "Arial")
+ASS_FONT_SIZE = int(os.getenv("ASS_FONT_SIZE", "54"))
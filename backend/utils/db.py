@@ -0,0 +1,217 @@
+import asyncio
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from utils.config import DB_PATH, DB_POOL_SIZE, DB_BUSY_TIMEOUT_MS
+
+# Pragmas applied to every pooled connection
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class ConnectionPool:
+    """Fixed-size pool of configured SQLite connections.
+
+    Connections are opened lazily up to `size`, configured for WAL and
+    busy_timeout, and keep sqlite3's per-connection statement cache warm so
+    repeated queries reuse their prepared statements.
+    """
+
+    def __init__(self, db_path=DB_PATH, size=DB_POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            timeout=DB_BUSY_TIMEOUT_MS / 1000,
+            cached_statements=256,
+            isolation_level=None,  # autocommit; transactions are explicit
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._open()
+                except Exception:
+                    self._opened -= 1
+                    raise
+        # Pool exhausted: wait for a connection to come back
+        return self._idle.get()
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        """Run several statements atomically; commits on success, rolls back on error."""
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    # ---------- blocking helpers ----------
+    def fetchone(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def fetchall(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def execute(self, sql, params=()):
+        """Run a write statement; returns (lastrowid, rowcount)."""
+        with self.connection() as conn:
+            cur = conn.execute(sql, params)
+            return cur.lastrowid, cur.rowcount
+
+    # ---------- async helpers (run off the event loop) ----------
+    async def afetchone(self, sql, params=()):
+        return await asyncio.to_thread(self.fetchone, sql, params)
+
+    async def afetchall(self, sql, params=()):
+        return await asyncio.to_thread(self.fetchall, sql, params)
+
+    async def aexecute(self, sql, params=()):
+        return await asyncio.to_thread(self.execute, sql, params)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._opened = 0
+
+
+# ---------- schema migrations ----------
+def _jobs_schema(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs(
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            input_path TEXT NOT NULL,
+            language TEXT,
+            source_lang TEXT,
+            burn INTEGER DEFAULT 0,
+            user_id INTEGER,
+            media_hash TEXT,
+            options TEXT,
+            result TEXT,
+            error TEXT,
+            created_at TEXT,
+            updated_at TEXT
+        )
+    """)
+    # Databases created before media_hash/options existed
+    existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+    for column in ("media_hash", "options"):
+        if column not in existing:
+            conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS job_events(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL,
+            event TEXT NOT NULL,
+            data TEXT,
+            created_at TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events(job_id, id)")
+
+
+# Ordered list of (version, step). A step is SQL text or a callable(conn).
+# Append new steps; never edit one that has shipped. The applied version is
+# stored in PRAGMA user_version.
+MIGRATIONS = [
+    (1, """
+        CREATE TABLE IF NOT EXISTS users(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            is_active INTEGER DEFAULT 1,
+            created_at TEXT,
+            updated_at TEXT
+        )
+    """),
+    (2, """
+        CREATE TABLE IF NOT EXISTS password_reset_tokens(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            token_hash TEXT NOT NULL,
+            expires_at TEXT NOT NULL,
+            used INTEGER DEFAULT 0,
+            created_at TEXT,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """),
+    (3, "CREATE INDEX IF NOT EXISTS idx_reset_tokens_hash ON password_reset_tokens(token_hash)"),
+    (4, _jobs_schema),
+    # Bumped on password change/reset; tokens carrying an older "ver" are revoked
+    (5, "ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"),
+    (6, """
+        CREATE TABLE IF NOT EXISTS artifacts(
+            path TEXT PRIMARY KEY,
+            job_id TEXT,
+            kind TEXT NOT NULL,
+            size INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            swept_at REAL,
+            swept_reason TEXT
+        )
+    """),
+    (7, "CREATE INDEX IF NOT EXISTS idx_artifacts_live ON artifacts(swept_at, created_at)"),
+    (8, "CREATE INDEX IF NOT EXISTS idx_jobs_media ON jobs(media_hash, status)"),
+]
+
+
+def migrate(pool):
+    """Apply pending migrations in order; safe to call from several processes."""
+    with pool.transaction(immediate=True) as conn:
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        for version, step in MIGRATIONS:
+            if version <= current:
+                continue
+            if callable(step):
+                step(conn)
+            else:
+                conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            print(f"[DB] Applied migration {version}")
+
+
+# One pool per process for the main application database
+db = ConnectionPool()
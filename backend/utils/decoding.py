@@ -0,0 +1,139 @@
+import time
+from utils.audio import SAMPLE_RATE
+from utils.config import ADAPTIVE_LOGPROB_THRESHOLD, ADAPTIVE_NO_SPEECH_THRESHOLD, ADAPTIVE_PAD_SECONDS
+
+_TEMPERATURE_FALLBACK = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+# Keyword arguments for WhisperModel.transcribe(). "balanced" matches the
+# previous hard-coded beam_size=5 with faster-whisper's defaults.
+PROFILES = {
+    "fast": {
+        "beam_size": 1,
+        "best_of": 1,
+        "temperature": 0.0,
+        "condition_on_previous_text": False,
+        "word_timestamps": False,
+        "compression_ratio_threshold": 2.4,
+        "log_prob_threshold": -1.0,
+        "no_speech_threshold": 0.6,
+    },
+    "balanced": {
+        "beam_size": 5,
+        "best_of": 5,
+        "temperature": _TEMPERATURE_FALLBACK,
+        "condition_on_previous_text": True,
+        "word_timestamps": False,
+        "compression_ratio_threshold": 2.4,
+        "log_prob_threshold": -1.0,
+        "no_speech_threshold": 0.6,
+    },
+    "accurate": {
+        "beam_size": 8,
+        "best_of": 8,
+        "temperature": _TEMPERATURE_FALLBACK,
+        "condition_on_previous_text": True,
+        "word_timestamps": True,
+        "compression_ratio_threshold": 2.2,
+        "log_prob_threshold": -0.8,
+        "no_speech_threshold": 0.6,
+    },
+}
+# Greedy first pass, then the accurate profile for low-confidence segments
+ADAPTIVE = "adaptive"
+
+
+def profile_options(profile):
+    """Return a copy of the transcribe() arguments for a profile ("adaptive" starts from "fast")."""
+    return dict(PROFILES["fast" if profile == ADAPTIVE else profile])
+
+
+def new_counters(profile):
+    return {"profile": profile, "segments": 0, "redecoded": 0, "dropped": 0, "redecode_seconds": 0.0}
+
+
+def merge_counters(total, part):
+    for key in ("segments", "redecoded", "dropped", "redecode_seconds"):
+        total[key] += part.get(key, 0)
+    return total
+
+
+def is_low_confidence(segment):
+    return (segment.avg_logprob < ADAPTIVE_LOGPROB_THRESHOLD
+            or segment.no_speech_prob > ADAPTIVE_NO_SPEECH_THRESHOLD)
+
+
+def _to_dict(segment, offset=0.0, words=False):
+    seg = {"start": segment.start + offset, "end": segment.end + offset, "text": segment.text.strip()}
+    if words:
+        seg["words"] = [{"start": w.start + offset, "end": w.end + offset, "word": w.word}
+                        for w in (segment.words or [])]
+    return seg
+
+
+def decode(model, audio, profile, language=None, word_timestamps=False, counters=None):
+    """Transcribe audio with a decoding profile.
+
+    Args:
+        model: Loaded faster-whisper WhisperModel
+        audio: Mono 16 kHz float32 samples
+        profile: "fast", "balanced", "accurate" or "adaptive"
+        language: Source language code, or None to let Whisper detect it
+        word_timestamps: Force word timestamps and include "words" in each segment
+        counters: Optional new_counters() dict updated as segments are decoded
+
+    Returns:
+        (segments, info) where segments is a lazy iterator of dicts with
+        'start', 'end' and 'text', as with WhisperModel.transcribe()
+    """
+    options = profile_options(profile)
+    options["word_timestamps"] = options["word_timestamps"] or word_timestamps
+    segments, info = model.transcribe(audio, language=language, **options)
+
+    def generate():
+        for s in segments:
+            if counters is not None:
+                counters["segments"] += 1
+            if profile == ADAPTIVE and is_low_confidence(s):
+                yield from _redecode(model, audio, s, language or info.language, word_timestamps, counters)
+            else:
+                yield _to_dict(s, words=word_timestamps)
+
+    return generate(), info
+
+
+def _redecode(model, audio, segment, language, words, counters):
+    """Decode one segment again with the accurate profile.
+
+    A little context is added around it; only words whose midpoint falls
+    inside the original segment are kept, so neighbours are not duplicated.
+    """
+    started = time.perf_counter()
+    window_start = max(0.0, segment.start - ADAPTIVE_PAD_SECONDS)
+    window = audio[int(window_start * SAMPLE_RATE):int((segment.end + ADAPTIVE_PAD_SECONDS) * SAMPLE_RATE)]
+    options = dict(PROFILES["accurate"], condition_on_previous_text=False, word_timestamps=True)
+    redecoded, _ = model.transcribe(window, language=language, **options)
+
+    kept = []
+    for s in redecoded:
+        inside = [w for w in (s.words or [])
+                  if segment.start <= window_start + (w.start + w.end) / 2 <= segment.end]
+        if not inside:
+            continue
+        seg = {"start": window_start + inside[0].start, "end": window_start + inside[-1].end,
+               "text": "".join(w.word for w in inside).strip()}
+        if words:
+            seg["words"] = [{"start": window_start + w.start, "end": window_start + w.end, "word": w.word}
+                            for w in inside]
+        kept.append(seg)
+
+    if counters is not None:
+        counters["redecoded"] += 1
+        counters["redecode_seconds"] += time.perf_counter() - started
+    if kept:
+        return kept
+    if segment.no_speech_prob > ADAPTIVE_NO_SPEECH_THRESHOLD:
+        # Nothing heard on a closer listen: the greedy text was most likely hallucinated
+        if counters is not None:
+            counters["dropped"] += 1
+        return []
+    return [_to_dict(segment, words=words)]
@@ -0,0 +1,150 @@
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import quote
+import anyio
+from starlette.responses import Response
+
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+def make_etag(stat):
+    # Artifacts are written once and never modified in place, so inode, size
+    # and mtime identify the bytes exactly without hashing multi-GB files
+    return f'"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """Parse a single "bytes=" range into an inclusive (start, end).
+
+    Returns:
+        (start, end), None when the header should be ignored (missing,
+        malformed or multi-range: the full file is sent), or "unsatisfiable"
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec:
+        return None
+    first, sep, last = spec.partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                return "unsatisfiable"
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return "unsatisfiable"
+    return start, min(end, size - 1)
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get("if-range")
+    return if_range is None or if_range in (etag, last_modified)
+
+
+class FileRangeResponse(Response):
+    """Send `length` bytes of a file starting at `offset`.
+
+    Uses the ASGI zero-copy extension (sendfile) when the server advertises
+    it, otherwise reads the file in READ_CHUNK_BYTES chunks off the event loop.
+    """
+
+    def __init__(self, path, offset, length, status_code, headers, media_type):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        super().__init__(content=None, status_code=status_code, headers=headers, media_type=media_type)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope.get("method") == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        with open(self.path, "rb") as f:
+            if "http.response.zerocopy" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopy", "file": f,
+                    "offset": self.offset, "count": self.length, "more_body": False,
+                })
+                return
+            await anyio.to_thread.run_sync(f.seek, self.offset)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await anyio.to_thread.run_sync(f.read, min(READ_CHUNK_BYTES, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shrank underneath us; close the body rather than hang
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def file_download(request, path, media_type, filename=None):
+    """Serve a file with Range/206, strong ETag, Last-Modified and 304 support.
+
+    Args:
+        request: The incoming starlette Request (for conditional/range headers)
+        path: File on disk; the caller has already checked it exists
+        media_type: Content-Type of the response
+        filename: Optional download name for Content-Disposition
+
+    Returns:
+        A 200, 206, 304 or 416 response
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = make_etag(stat)
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+    headers = {
+        "accept-ranges": "bytes",
+        "etag": etag,
+        "last-modified": last_modified,
+    }
+    if filename:
+        quoted = quote(filename)
+        if quoted != filename:
+            headers["content-disposition"] = f"attachment; filename*=utf-8''{quoted}"
+        else:
+            headers["content-disposition"] = f'attachment; filename="{filename}"'
+
+    if _not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if _if_range_matches(request, etag, last_modified):
+        byte_range = parse_range(request.headers.get("range"), size)
+    if byte_range == "unsatisfiable":
+        headers["content-range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        headers["content-length"] = str(size)
+        return FileRangeResponse(path, 0, size, 200, headers, media_type)
+
+    start, end = byte_range
+    length = end - start + 1
+    headers["content-range"] = f"bytes {start}-{end}/{size}"
+    headers["content-length"] = str(length)
+    return FileRangeResponse(path, start, length, 206, headers, media_type)
@@ -0,0 +1,280 @@
+import json
+import multiprocessing
+import os
+import signal
+import time
+import traceback
+import uuid
+from datetime import datetime
+from utils.config import JOB_WORKERS, JOB_POLL_INTERVAL
+from utils.db import db
+from utils import metrics
+
+# Job lifecycle: queued -> extracting -> transcribing -> translating -> burning -> done | failed
+JOB_STATES = ("queued", "extracting", "transcribing", "translating", "burning", "done", "failed")
+ACTIVE_STATES = ("extracting", "transcribing", "translating", "burning")
+
+
+def _row_to_job(row):
+    if row is None:
+        return None
+    job = dict(row)
+    job["burn"] = bool(job["burn"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    job["options"] = json.loads(job["options"]) if job.get("options") else {}
+    return job
+
+
+def create_or_attach_job(input_path, language="english", source_lang="auto", burn=False, user_id=None,
+                         job_id=None, media_hash=None, options=None):
+    """Return the id of an unfinished job for the same media and options, or queue a new one.
+
+    Without a media_hash the job is always queued. options holds extra
+    pipeline settings as JSON (e.g. {"models": {...}}). The lookup and
+    insert run in one immediate transaction so concurrent submissions from
+    several API processes cannot both create the job.
+    """
+    job_id = job_id or str(uuid.uuid4())
+    options_json = json.dumps(options or {})
+    now = datetime.utcnow().isoformat()
+    with db.transaction(immediate=True) as conn:
+        if media_hash:
+            row = conn.execute("""
+                SELECT id FROM jobs
+                WHERE media_hash = ? AND language = ? AND source_lang = ? AND burn = ? AND options = ?
+                  AND status NOT IN ('done', 'failed')
+                ORDER BY created_at LIMIT 1
+            """, (media_hash, language, source_lang, int(bool(burn)), options_json)).fetchone()
+            if row is not None:
+                return row["id"]
+        conn.execute("""
+            INSERT INTO jobs(id, status, input_path, language, source_lang, burn, user_id, media_hash, options,
+                             created_at, updated_at)
+            VALUES (?, 'queued', ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (job_id, input_path, language, source_lang, int(bool(burn)), user_id, media_hash,
+              options_json, now, now))
+    return job_id
+
+
+def get_job(job_id):
+    return _row_to_job(db.fetchone("SELECT * FROM jobs WHERE id = ?", (job_id,)))
+
+
+def update_job(job_id, status=None, result=None, error=None):
+    fields = ["updated_at = ?"]
+    params = [datetime.utcnow().isoformat()]
+    if status is not None:
+        fields.append("status = ?")
+        params.append(status)
+    if result is not None:
+        fields.append("result = ?")
+        params.append(json.dumps(result))
+    if error is not None:
+        fields.append("error = ?")
+        params.append(error)
+    params.append(job_id)
+    db.execute(f"UPDATE jobs SET {', '.join(fields)} WHERE id = ?", params)
+
+
+def add_job_event(job_id, event, data=None):
+    """Append a progress/cue event for streaming to clients."""
+    db.execute(
+        "INSERT INTO job_events(job_id, event, data, created_at) VALUES (?, ?, ?, ?)",
+        (job_id, event, json.dumps(data), datetime.utcnow().isoformat())
+    )
+
+
+def add_job_events(job_id, events):
+    """Append several (event, data) pairs in one transaction, e.g. a translated batch of cues."""
+    now = datetime.utcnow().isoformat()
+    with db.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO job_events(job_id, event, data, created_at) VALUES (?, ?, ?, ?)",
+            [(job_id, event, json.dumps(data), now) for event, data in events]
+        )
+
+
+def get_job_events(job_id, after_id=0, limit=500):
+    """Return events of a job with id greater than after_id, oldest first."""
+    rows = db.fetchall(
+        "SELECT id, event, data FROM job_events WHERE job_id = ? AND id > ? ORDER BY id LIMIT ?",
+        (job_id, after_id, limit)
+    )
+    return [{"id": r["id"], "event": r["event"], "data": json.loads(r["data"]) if r["data"] else None} for r in rows]
+
+
+def purge_finished_jobs(events_before, jobs_before):
+    """Delete the events of jobs finished before events_before and whole jobs finished before jobs_before.
+
+    Both are Unix timestamps. Called by the storage sweeper, so finished jobs
+    don't keep every cue and progress event in the database forever.
+
+    Returns:
+        (events deleted, jobs deleted)
+    """
+    events_cutoff = datetime.utcfromtimestamp(events_before).isoformat()
+    jobs_cutoff = datetime.utcfromtimestamp(jobs_before).isoformat()
+    with db.transaction() as conn:
+        events = conn.execute("""
+            DELETE FROM job_events WHERE job_id IN (
+                SELECT id FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?
+            )
+        """, (events_cutoff,)).rowcount
+        jobs = conn.execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?", (jobs_cutoff,)
+        ).rowcount
+    return events, jobs
+
+
+def claim_next_job():
+    """Atomically move the oldest queued job to 'extracting' and return it (or None)."""
+    with db.transaction(immediate=True) as conn:
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = 'extracting', updated_at = ? WHERE id = ?",
+            (datetime.utcnow().isoformat(), row["id"])
+        )
+    job = _row_to_job(row)
+    job["status"] = "extracting"
+    return job
+
+
+def requeue_interrupted_jobs():
+    """Put jobs that were mid-pipeline when the server stopped back in the queue."""
+    placeholders = ", ".join("?" for _ in ACTIVE_STATES)
+    _, count = db.execute(
+        f"UPDATE jobs SET status = 'queued', updated_at = ? WHERE status IN ({placeholders})",
+        (datetime.utcnow().isoformat(), *ACTIVE_STATES)
+    )
+    return count
+
+
+def queue_depth():
+    return db.fetchone("SELECT COUNT(*) FROM jobs WHERE status = 'queued'")[0]
+
+
+def run_job(job):
+    # Imported here so the API process never loads Whisper/M2M100 just to enqueue jobs
+    from utils.pipeline import run_pipeline
+
+    job_id = job["id"]
+
+    def on_stage(stage):
+        update_job(job_id, status=stage)
+        add_job_event(job_id, "stage", {"stage": stage})
+
+    def on_event(event, data):
+        if event == "cues":
+            # One write per translated batch; clients still get one "cue" event per cue
+            add_job_events(job_id, [("cue", cue) for cue in data])
+        else:
+            add_job_event(job_id, event, data)
+
+    try:
+        result = run_pipeline(
+            job_id,
+            job["input_path"],
+            language=job["language"],
+            source_lang=job["source_lang"],
+            burn=job["burn"],
+            on_stage=on_stage,
+            media_hash=job["media_hash"],
+            on_event=on_event,
+            model_options=job["options"].get("models"),
+            burn_mode=job["options"].get("burn_mode"),
+            languages=job["options"].get("languages"),
+            subtitle_format=job["options"].get("format"),
+        )
+        update_job(job_id, status="done", result=result)
+        done = {k: v for k, v in result.items() if k not in ("subtitles", "tracks")}
+        if result.get("tracks"):
+            done["tracks"] = [{k: v for k, v in t.items() if k != "subtitles"} for t in result["tracks"]]
+        add_job_event(job_id, "done", done)
+    except Exception as e:
+        print(f"[JOB {job_id}] Failed: {e}")
+        traceback.print_exc()
+        update_job(job_id, status="failed", error=str(e))
+        add_job_event(job_id, "failed", {"error": str(e)})
+    finally:
+        # Cleanup uploaded file, as /upload does
+        if os.path.exists(job["input_path"]):
+            os.remove(job["input_path"])
+
+
+def _terminate_with_children(signum, frame):
+    # WorkerPool.stop() terminated this worker mid-job; take the chunked
+    # transcription pool down with it instead of leaving orphans
+    for child in multiprocessing.active_children():
+        child.kill()
+    os._exit(128 + signum)
+
+
+def worker_loop(worker_index, stop_event, metrics_queue=None, pool_size=JOB_WORKERS):
+    """Entry point of a worker process: claim and run jobs until stop_event is set."""
+    print(f"[WORKER {worker_index}] Started")
+    signal.signal(signal.SIGTERM, _terminate_with_children)
+    from utils.resources import scheduler
+    pinned = scheduler.pin_worker(worker_index)
+    if pinned:
+        print(f"[WORKER {worker_index}] Pinned to cores {pinned}")
+    from utils.chunking import share_cpus, shutdown_executors
+    share_cpus(pool_size)
+    if metrics_queue is not None:
+        # Stage timings and errors show up on the API process's /metrics
+        metrics.forward_to(metrics_queue)
+    # Load PREWARM_MODELS before taking the first job
+    from utils.models import registry
+    registry.prewarm()
+    metrics.set_gauge("subtitle_models_loaded", len(registry.loaded()), process=f"worker-{worker_index}")
+    try:
+        while not stop_event.is_set():
+            job = claim_next_job()
+            if job is None:
+                stop_event.wait(JOB_POLL_INTERVAL)
+                continue
+            print(f"[WORKER {worker_index}] Running job {job['id']}")
+            started = time.time()
+            run_job(job)
+            print(f"[WORKER {worker_index}] Job {job['id']} finished in {time.time() - started:.1f}s")
+            metrics.set_gauge("subtitle_models_loaded", len(registry.loaded()), process=f"worker-{worker_index}")
+    finally:
+        shutdown_executors()
+    print(f"[WORKER {worker_index}] Stopped")
+
+
+class WorkerPool:
+    """Fixed-size pool of worker processes consuming the persistent job queue."""
+
+    def __init__(self, size=JOB_WORKERS, target=worker_loop):
+        self.size = size
+        self.target = target
+        # spawn so each worker loads its own models instead of inheriting a forked copy
+        self._ctx = multiprocessing.get_context("spawn")
+        self._stop = self._ctx.Event()
+        self._metrics = self._ctx.Queue()
+        self._procs = []
+
+    def start(self):
+        requeued = requeue_interrupted_jobs()
+        if requeued:
+            print(f"[JOBS] Re-queued {requeued} interrupted job(s)")
+        metrics.collect_from(self._metrics, self._stop)
+        for i in range(self.size):
+            # Not daemonic: workers start their own process pools for chunked transcription
+            p = self._ctx.Process(target=self.target, args=(i, self._stop, self._metrics, self.size))
+            p.start()
+            self._procs.append(p)
+
+    def stop(self, timeout=10):
+        """Ask the workers to finish their current job; terminate any still running after timeout."""
+        self._stop.set()
+        for p in self._procs:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+                p.join()
+        self._procs = []
@@ -0,0 +1,92 @@
+import time
+from utils.audio import SAMPLE_RATE
+from utils.config import LANGID_PROBE_SECONDS, LANGID_WINDOWS, LANGID_CONFIDENT
+
+# Spoken source languages that mean "detect it"
+AUTO = ("auto", "detect", "")
+# Part of the transcription cache key when the language was identified
+LANGID_ID = f"langid-{LANGID_PROBE_SECONDS:g}s-{LANGID_WINDOWS}w"
+
+
+def is_auto(source_lang):
+    return source_lang is None or source_lang.strip().lower() in AUTO
+
+
+def probe_windows(audio, seconds=LANGID_PROBE_SECONDS, windows=LANGID_WINDOWS):
+    """Split a probe of `seconds` into `windows` evenly spaced slices of the audio.
+
+    The first slice always starts at 0, so windows=1 probes the first
+    `seconds` of speech. Audio shorter than the probe is used whole.
+    """
+    windows = max(1, windows)
+    probe = int(seconds * SAMPLE_RATE)
+    if len(audio) <= probe or windows == 1:
+        return [audio[:probe]]
+    size = probe // windows
+    step = (len(audio) - size) / (windows - 1)
+    return [audio[int(i * step):int(i * step) + size] for i in range(windows)]
+
+
+def _window_probabilities(model, audio):
+    """Whisper's language probabilities for one window, as a {code: probability} dict.
+
+    WhisperModel.transcribe() runs language detection eagerly and returns the
+    segments as a lazy generator; it is never iterated, so nothing is decoded.
+    """
+    _, info = model.transcribe(audio, language=None, beam_size=1, vad_filter=False)
+    probs = dict(info.all_language_probs or [])
+    if not probs and info.language:
+        probs = {info.language: info.language_probability}
+    return probs
+
+
+def identify_windows(model, windows, confident=LANGID_CONFIDENT):
+    """Average Whisper's language probabilities over probe windows.
+
+    Args:
+        model: Loaded faster-whisper WhisperModel
+        windows: Sample arrays from probe_windows()
+        confident: Stop after a window whose top probability reaches this
+
+    Returns:
+        Dict with 'language', 'probability', 'probabilities' (top five,
+        averaged over the windows used), 'windows' and 'seconds' (probe
+        wall time), or None when nothing could be identified
+    """
+    started = time.perf_counter()
+    totals = {}
+    used = 0
+    for window in windows:
+        if len(window) == 0:
+            continue
+        probs = _window_probabilities(model, window)
+        for code, p in probs.items():
+            totals[code] = totals.get(code, 0.0) + p
+        used += 1
+        if probs and max(probs.values()) >= confident:
+            break
+    if not totals:
+        return None
+    ranked = sorted(((code, p / used) for code, p in totals.items()), key=lambda item: item[1], reverse=True)
+    language, probability = ranked[0]
+    return {
+        "language": language,
+        "probability": round(probability, 4),
+        "probabilities": {code: round(p, 4) for code, p in ranked[:5]},
+        "windows": used,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def identify_language(model, audio, seconds=LANGID_PROBE_SECONDS, windows=LANGID_WINDOWS,
+                      confident=LANGID_CONFIDENT):
+    """Identify the spoken language from a short probe of speech (see identify_windows()).
+
+    Args:
+        model: Loaded faster-whisper WhisperModel
+        audio: Mono 16 kHz float32 speech samples (after VAD)
+        seconds: Total probe length
+        windows: Number of evenly spaced windows the probe is split into
+        confident: Early-exit probability
+    """
+    return identify_windows(model, probe_windows(audio, seconds, windows), confident)
@@ -0,0 +1,166 @@
+import queue
+import threading
+
+# Seconds; covers a sub-second cache hit up to an hour-long burn
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+_HELP = {
+    "subtitle_stage_seconds": ("histogram", "Wall time spent in each pipeline stage"),
+    "subtitle_realtime_factor": ("histogram", "Processing seconds per second of audio"),
+    "subtitle_transcribe_realtime_factor": ("histogram", "Whisper seconds per second of audio, by decoding profile"),
+    "subtitle_slot_wait_seconds": ("histogram", "Time heavy stages waited for a resource scheduler slot"),
+    "subtitle_stage_errors_total": ("counter", "Pipeline failures by stage"),
+    "subtitle_pipeline_runs_total": ("counter", "Completed pipeline runs"),
+    "subtitle_languages_identified_total": ("counter", "Source languages identified for source_lang=auto"),
+    "upload_bytes_total": ("counter", "Bytes received by upload endpoints"),
+    "upload_runs_total": ("counter", "/upload requests that started a pipeline run"),
+    "upload_coalesced_total": ("counter", "/upload requests attached to an identical run"),
+    "jobs_coalesced_total": ("counter", "/jobs submissions attached to an identical job"),
+    "subtitle_models_loaded": ("gauge", "Models resident in memory per process"),
+}
+REALTIME_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10)
+
+_counters = {}
+_gauges = {}
+_histograms = {}
+_bucket_overrides = {"subtitle_realtime_factor": REALTIME_BUCKETS,
+                     "subtitle_transcribe_realtime_factor": REALTIME_BUCKETS}
+_lock = threading.Lock()
+# Set in job worker processes: observations are sent to the API process
+_forward = None
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _apply(kind, name, value, labels):
+    key = _key(name, labels)
+    with _lock:
+        if kind == "inc":
+            _counters[key] = _counters.get(key, 0) + value
+        elif kind == "gauge":
+            _gauges[key] = value
+        elif kind == "observe":
+            buckets = _bucket_overrides.get(name, DEFAULT_BUCKETS)
+            hist = _histograms.setdefault(key, {"buckets": [0] * len(buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    hist["buckets"][i] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+
+def _record(kind, name, value, labels):
+    if _forward is not None:
+        try:
+            _forward.put_nowait((kind, name, value, labels))
+            return
+        except Exception:
+            pass
+    _apply(kind, name, value, labels)
+
+
+def inc(name, value=1, **labels):
+    """Increment a counter."""
+    _record("inc", name, value, labels)
+
+
+def set_gauge(name, value, **labels):
+    _record("gauge", name, value, labels)
+
+
+def observe(name, value, **labels):
+    """Add a sample to a histogram."""
+    _record("observe", name, value, labels)
+
+
+def snapshot():
+    """Plain counter values keyed by name (labels ignored), for quick JSON checks."""
+    with _lock:
+        out = {}
+        for (name, _), value in _counters.items():
+            out[name] = out.get(name, 0) + value
+        return out
+
+
+def forward_to(q):
+    """Send this process's metrics to q instead of recording them locally."""
+    global _forward
+    _forward = q
+
+
+def collect_from(q, stop_event):
+    """Apply metrics forwarded by worker processes until stop_event is set."""
+    def run():
+        while not stop_event.is_set():
+            try:
+                kind, name, value, labels = q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            _apply(kind, name, value, labels)
+
+    t = threading.Thread(target=run, name="metrics-collector", daemon=True)
+    t.start()
+    return t
+
+
+def _labels(pairs, extra=None):
+    items = list(pairs) + (list(extra) if extra else [])
+    if not items:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in items)
+    return "{" + body + "}"
+
+
+def _fmt(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render(extra_gauges=None):
+    """Prometheus text exposition (version 0.0.4) of everything recorded.
+
+    Args:
+        extra_gauges: Optional list of (name, help, value, labels) gauges that
+            are read at scrape time (queue depth, cache ratios, ...)
+    """
+    lines = []
+    seen = set()
+
+    def header(name, kind, default_help=""):
+        if name in seen:
+            return
+        seen.add(name)
+        help_text = _HELP.get(name, (kind, default_help))[1]
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    with _lock:
+        counters = sorted(_counters.items())
+        gauges = sorted(_gauges.items())
+        histograms = sorted((k, dict(v, buckets=list(v["buckets"]))) for k, v in _histograms.items())
+
+    for (name, labels), value in counters:
+        header(name, "counter")
+        lines.append(f"{name}{_labels(labels)} {_fmt(value)}")
+    # Recorded and scrape-time gauges may share a name; keep each name contiguous
+    samples = [(name, labels, value, "") for (name, labels), value in gauges]
+    samples += [(name, tuple(sorted((labels or {}).items())), value, help_text)
+                for name, help_text, value, labels in extra_gauges or []]
+    for name, labels, value, help_text in sorted(samples, key=lambda s: (s[0], s[1])):
+        header(name, "gauge", help_text)
+        lines.append(f"{name}{_labels(labels)} {_fmt(value)}")
+    for (name, labels), hist in histograms:
+        header(name, "histogram")
+        buckets = _bucket_overrides.get(name, DEFAULT_BUCKETS)
+        for bound, count in zip(buckets, hist["buckets"]):
+            lines.append(f"{name}_bucket{_labels(labels, [('le', _fmt(float(bound)))])} {count}")
+        lines.append(f"{name}_bucket{_labels(labels, [('le', '+Inf')])} {hist['count']}")
+        lines.append(f"{name}_sum{_labels(labels)} {_fmt(round(hist['sum'], 6))}")
+        lines.append(f"{name}_count{_labels(labels)} {hist['count']}")
+    return "\n".join(lines) + "\n"
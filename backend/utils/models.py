@@ -0,0 +1,193 @@
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from utils.config import (
+    WHISPER_MODEL, WHISPER_COMPUTE_TYPE, TRANSLATION_MODEL,
+    WHISPER_SIZES, WHISPER_COMPUTE_TYPES, TRANSLATION_MODELS,
+    TRANSLATION_BACKEND, TRANSLATION_BACKENDS, DECODING_PROFILES, MODEL_MAX_RESIDENT, PREWARM_MODELS,
+)
+
+
+def _rss_bytes():
+    """Resident set size of this process (Linux), or None when unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+
+def validate_whisper(size, compute_type):
+    if size not in WHISPER_SIZES:
+        raise ValueError(f"Unsupported Whisper model '{size}'. Choose one of: {', '.join(WHISPER_SIZES)}")
+    if compute_type not in WHISPER_COMPUTE_TYPES:
+        raise ValueError(f"Unsupported compute type '{compute_type}'. Choose one of: {', '.join(WHISPER_COMPUTE_TYPES)}")
+
+
+def validate_translation(name, backend=TRANSLATION_BACKEND):
+    if name not in TRANSLATION_MODELS:
+        raise ValueError(f"Unsupported translation model '{name}'. Choose one of: {', '.join(TRANSLATION_MODELS)}")
+    if backend not in TRANSLATION_BACKENDS:
+        raise ValueError(f"Unsupported translation backend '{backend}'. Choose one of: {', '.join(TRANSLATION_BACKENDS)}")
+
+
+def build_model_options(whisper=None, compute_type=None, translation=None, decoding=None):
+    """Validate per-request model overrides; empty values fall back to the defaults.
+
+    Raises:
+        ValueError: for unsupported model names, compute types or decoding profiles
+    """
+    options = {}
+    if whisper or compute_type:
+        validate_whisper(whisper or WHISPER_MODEL, compute_type or WHISPER_COMPUTE_TYPE)
+    if whisper:
+        options["whisper"] = whisper
+    if compute_type:
+        options["compute_type"] = compute_type
+    if translation:
+        validate_translation(translation)
+        options["translation"] = translation
+    if decoding:
+        decoding = decoding.lower()
+        if decoding not in DECODING_PROFILES:
+            raise ValueError(f"Unsupported decoding profile '{decoding}'. Choose one of: {', '.join(DECODING_PROFILES)}")
+        options["decoding"] = decoding
+    return options
+
+
+def _load_whisper(size, compute_type):
+    from faster_whisper import WhisperModel
+    from utils.resources import scheduler
+    print(f"Loading Whisper model '{size}' ({compute_type})...")
+    # 0 keeps CTranslate2's own default when the resource scheduler is off
+    return WhisperModel(size, device="cpu", compute_type=compute_type,
+                        cpu_threads=scheduler.stage_threads(), num_workers=1)
+
+
+def _load_translation(name, backend=TRANSLATION_BACKEND):
+    if backend == "ctranslate2":
+        from utils.translation_backends import load_ctranslate2
+        return load_ctranslate2(name)
+    from transformers import M2M100ForConditionalGeneration, M2M100Tokenizer
+    from utils.resources import configure_torch, scheduler
+    configure_torch(scheduler.stage_threads())
+    print(f"Loading translation model '{name}'...")
+    tok = M2M100Tokenizer.from_pretrained(name)
+    mod = M2M100ForConditionalGeneration.from_pretrained(name)
+    mod.eval()
+    return tok, mod
+
+
+def _torch_model_bytes(model):
+    return sum(p.numel() * p.element_size() for p in model.parameters())
+
+
+class ModelRegistry:
+    """Lazily loads models on first use and keeps at most max_resident in memory.
+
+    Keys are tuples like ("whisper", "small", "int8") or ("translation", name, backend).
+    Loads of the same key are serialized; different keys can load concurrently.
+    """
+
+    def __init__(self, max_resident=MODEL_MAX_RESIDENT):
+        self.max_resident = max_resident
+        self._models = OrderedDict()
+        self._info = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def _get(self, key, loader):
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self._info[key]["last_used"] = time.time()
+                return self._models[key]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key]
+            rss_before = _rss_bytes()
+            started = time.time()
+            model = loader()
+            load_seconds = time.time() - started
+            rss_after = _rss_bytes()
+
+            memory = None
+            if key[0] == "translation":
+                engine = model[1]
+                memory = engine.memory_bytes() if hasattr(engine, "memory_bytes") else _torch_model_bytes(engine)
+            elif rss_before is not None and rss_after is not None:
+                memory = max(0, rss_after - rss_before)
+
+            with self._lock:
+                self._models[key] = model
+                self._info[key] = {
+                    "loaded_at": time.time(),
+                    "last_used": time.time(),
+                    "load_seconds": round(load_seconds, 2),
+                    "memory_bytes": memory,
+                }
+                self._evict()
+            print(f"Model {key} loaded in {load_seconds:.1f}s")
+            return model
+
+    def _evict(self):
+        while len(self._models) > self.max_resident:
+            key, _ = self._models.popitem(last=False)
+            self._info.pop(key, None)
+            print(f"Unloading least recently used model {key}")
+        gc.collect()
+
+    def whisper(self, size=None, compute_type=None):
+        size = size or WHISPER_MODEL
+        compute_type = compute_type or WHISPER_COMPUTE_TYPE
+        validate_whisper(size, compute_type)
+        return self._get(("whisper", size, compute_type), lambda: _load_whisper(size, compute_type))
+
+    def translation(self, name=None, backend=None):
+        name = name or TRANSLATION_MODEL
+        backend = backend or TRANSLATION_BACKEND
+        validate_translation(name, backend)
+        return self._get(("translation", name, backend), lambda: _load_translation(name, backend))
+
+    def loaded(self):
+        """Describe resident models, most recently used last."""
+        with self._lock:
+            out = []
+            for key in self._models:
+                info = dict(self._info.get(key, {}))
+                info["kind"] = key[0]
+                info["name"] = ":".join(key[1:])
+                out.append(info)
+            return out
+
+    def prewarm(self, spec=PREWARM_MODELS):
+        """Load models listed like "whisper:small:int8,translation:facebook/m2m100_418M"."""
+        for item in [s.strip() for s in spec.split(",") if s.strip()]:
+            kind, _, rest = item.partition(":")
+            try:
+                if kind == "whisper":
+                    size, _, compute_type = rest.partition(":")
+                    self.whisper(size or None, compute_type or None)
+                elif kind == "translation":
+                    self.translation(rest or None)
+                else:
+                    print(f"Unknown model kind in PREWARM_MODELS: {item}")
+            except Exception as e:
+                print(f"Failed to prewarm {item}: {e}")
+
+    def prewarm_in_background(self, spec=PREWARM_MODELS):
+        if not spec:
+            return None
+        t = threading.Thread(target=self.prewarm, args=(spec,), daemon=True)
+        t.start()
+        return t
+
+
+# One registry per process (API process and each job worker)
+registry = ModelRegistry()
@@ -0,0 +1,54 @@
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from passlib.context import CryptContext
+from utils.config import PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# bcrypt releases the GIL while hashing, so threads give real parallelism
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_max_in_flight = PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE
+_in_flight = 0
+_lock = threading.Lock()
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hash/verify calls are already running or queued."""
+
+
+def preprocess_password(raw_password: str) -> str:
+    """
+    Fix bcrypt 72-byte limit by pre-hashing with SHA-256 before bcrypt.
+    """
+    return hashlib.sha256(raw_password.encode("utf-8")).hexdigest()
+
+
+async def _submit(fn, *args):
+    global _in_flight
+    with _lock:
+        if _in_flight >= _max_in_flight:
+            raise PasswordHasherBusy()
+        _in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, fn, *args)
+    finally:
+        with _lock:
+            _in_flight -= 1
+
+
+async def hash_password(raw_password: str) -> str:
+    """bcrypt-hash a password off the event loop."""
+    return await _submit(pwd_context.hash, preprocess_password(raw_password))
+
+
+async def verify_password(raw_password: str, stored_hash: str) -> bool:
+    """Check a password against its stored bcrypt hash off the event loop."""
+    return await _submit(pwd_context.verify, preprocess_password(raw_password), stored_hash)
+
+
+def hasher_stats():
+    """Current load of the hashing pool, exported as gauges on /metrics."""
+    return {"in_flight": _in_flight, "max_in_flight": _max_in_flight, "workers": PASSWORD_HASH_WORKERS}
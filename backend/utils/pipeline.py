@@ -0,0 +1,171 @@
+import os
+import time
+import traceback
+from contextlib import ExitStack
+from utils.audio import extract_audio, extract_audio_array
+from utils.translate import translate_text, translate_text_multi
+from utils.subtitles import get_writer, write_subtitles
+from utils.burn import burn_subtitles
+from utils.storage import record_artifact, remove_artifact
+from utils.telemetry import job_context, log_json, span
+from utils import metrics
+from utils.config import UPLOAD_DIR, OUTPUT_DIR, AUDIO_EXTRACT_MODE, BURN_MODE, SUBTITLE_FORMAT
+
+
+def run_pipeline(file_id, input_video, language="english", source_lang="auto", burn=False, on_stage=None, audio_ready=False, media_hash=None,
+                 on_event=None, model_options=None, burn_mode=None, languages=None, subtitle_format=None):
+    """Run extract -> transcribe/translate -> SRT -> (optional) burn for one video.
+
+    Shared by the synchronous /upload endpoint and the /jobs worker processes.
+
+    Args:
+        file_id: Unique id used to name the artifacts
+        input_video: Path to the saved upload
+        language: Target language for subtitles
+        source_lang: Source language of the audio, or "auto" to identify it
+        burn: Whether to burn subtitles into the video
+        on_stage: Optional callback called with the name of each stage as it starts
+        audio_ready: True when uploads/{file_id}.wav was already extracted during upload
+        media_hash: SHA-256 of the uploaded bytes, used as the result cache key
+        on_event: Optional callback(event, data) receiving incremental "cues"
+            (a list of cue dicts per batch) and "progress" events while
+            subtitles are generated
+        model_options: Optional per-request Whisper/translation model overrides
+        burn_mode: "soft", "hard" or "parallel" (default BURN_MODE)
+        languages: Optional list of target languages. With more than one,
+            Whisper runs once, one SRT is written per language and
+            payload["tracks"] lists them; soft burning muxes every track.
+            The first language also fills the single-language fields.
+        subtitle_format: "srt", "vtt", "ass" or "json" (default SUBTITLE_FORMAT).
+            The SRT is always written; another format is written alongside it
+            and reported as payload["subtitle_file"]. Hard burns use the ASS
+            file when format is "ass" so its styling is kept.
+
+    Each stage is timed (utils.telemetry spans); the breakdown is returned in
+    payload["stats"]["timings"] together with the real-time factor. The SRT
+    and burned video are recorded with utils.storage so the sweeper
+    can expire them; the intermediate .wav is removed once transcribed.
+    For a single language, cues are written to the subtitle files as they are
+    produced, so a streaming run never holds the formatted text in memory.
+
+    Returns:
+        Response payload dict with subtitles and artifact filenames
+    """
+    def stage(name):
+        if on_stage is not None:
+            on_stage(name)
+
+    audio_file = f"{UPLOAD_DIR}/{file_id}.wav"
+    srt_file = f"{UPLOAD_DIR}/{file_id}.srt"
+    final_video = f"{OUTPUT_DIR}/{file_id}_final.mp4"
+    stats = {"timings": {}}
+    timings = stats["timings"]
+    started = time.perf_counter()
+    fmt = (subtitle_format or SUBTITLE_FORMAT).lower()
+
+    def subtitle_outputs(stem):
+        # (path, format) pairs to write; just the SRT when that is the requested format
+        return list(dict.fromkeys(((f"{UPLOAD_DIR}/{stem}.srt", "srt"), (f"{UPLOAD_DIR}/{stem}.{fmt}", fmt))))
+
+    with job_context(file_id):
+        log_json("pipeline_start", language=language, source_lang=source_lang, burn=bool(burn))
+
+        # Step 1: Extract Audio
+        stage("extracting")
+        if audio_ready:
+            audio = audio_file
+        elif AUDIO_EXTRACT_MODE == "file":
+            with span("extract", timings):
+                extract_audio(input_video, audio_file)
+            audio = audio_file
+        else:
+            # PCM piped from ffmpeg straight into Whisper, no .wav round-trip
+            with span("extract", timings):
+                audio = extract_audio_array(input_video)
+
+        # Steps 2-3: Transcribe + Translate (spans recorded inside translate_text)
+        # and write the subtitle files, one set per language in multi-target mode
+        tracks = []
+        multi = bool(languages) and len(languages) > 1
+        if multi:
+            by_language = translate_text_multi(audio, languages, source_lang, on_stage=on_stage, media_hash=media_hash,
+                                               on_event=on_event, stats=stats, model_options=model_options)
+            with span("srt", timings):
+                for code, cues in by_language.items():
+                    outputs = subtitle_outputs(f"{file_id}.{code}")
+                    for path, path_fmt in outputs:
+                        write_subtitles(cues, path, path_fmt)
+                        record_artifact(file_id, path, "srt")
+                    tracks.append({"language": code, "srt_file": os.path.basename(outputs[0][0]),
+                                   "subtitle_file": os.path.basename(outputs[-1][0]), "cues": cues})
+            srt_file = f"{UPLOAD_DIR}/{tracks[0]['srt_file']}"
+            subtitle_file = f"{UPLOAD_DIR}/{tracks[0]['subtitle_file']}"
+            cues = tracks[0]["cues"]
+        else:
+            language = languages[0] if languages else language
+            outputs = subtitle_outputs(file_id)
+            srt_file, subtitle_file = outputs[0][0], outputs[-1][0]
+            # Each cue goes to disk as soon as it is translated
+            with ExitStack() as open_writers:
+                writers = [open_writers.enter_context(get_writer(path_fmt, path)) for path, path_fmt in outputs]
+                cues = translate_text(audio, language, source_lang, on_stage=on_stage, media_hash=media_hash,
+                                      on_event=on_event, stats=stats, model_options=model_options,
+                                      on_cue=lambda cue: [writer.write(cue) for writer in writers])
+                with span("srt", timings):
+                    open_writers.close()
+            for path, _ in outputs:
+                record_artifact(file_id, path, "srt")
+        if audio is audio_file:
+            # The .wav is only needed for transcription
+            remove_artifact(audio_file)
+
+        payload = {
+            "status": "success",
+            "subtitles": cues.to_dicts(),
+            "srt_file": os.path.basename(srt_file),
+            "subtitle_file": os.path.basename(subtitle_file),
+            "format": fmt,
+            "stats": stats
+        }
+        if multi:
+            payload["tracks"] = [{"language": t["language"], "srt_file": t["srt_file"],
+                                  "subtitle_file": t["subtitle_file"], "subtitles": t["cues"].to_dicts()}
+                                 for t in tracks]
+
+        # Optionally burn subtitles into video
+        if burn:
+            stage("burning")
+            try:
+                with span("burn", timings):
+                    mode = burn_mode or BURN_MODE
+                    # libass keeps the ASS styling when burning; soft tracks are mov_text from the SRT
+                    burn_source = subtitle_file if fmt == "ass" and mode != "soft" else srt_file
+                    burn_subtitles(input_video, burn_source, final_video, mode=mode,
+                                   tracks=[(f"{UPLOAD_DIR}/{t['srt_file']}", t["language"]) for t in tracks] or None)
+                record_artifact(file_id, final_video, "video")
+                payload["burned_video"] = os.path.basename(final_video)
+            except Exception as be:
+                # Log burn error but still return subtitles
+                print(f"Error burning subtitles: {be}")
+                traceback.print_exc()
+                payload["burn_error"] = str(be)
+
+        timings["total"] = round(time.perf_counter() - started, 3)
+        audio_seconds = stats.get("vad", {}).get("total_seconds")
+        decoding = stats.get("decoding", {})
+        profile = decoding.get("profile", "unknown")
+        if audio_seconds:
+            stats["audio_seconds"] = audio_seconds
+            stats["realtime_factor"] = round(timings["total"] / audio_seconds, 3)
+            metrics.observe("subtitle_realtime_factor", stats["realtime_factor"], profile=profile)
+            if "transcribe" in timings and decoding:
+                # Whisper alone, so decoding profiles can be compared directly
+                decoding["realtime_factor"] = round(timings["transcribe"] / audio_seconds, 3)
+                metrics.observe("subtitle_transcribe_realtime_factor", decoding["realtime_factor"], profile=profile)
+        language_id = stats.get("language_id")
+        if language_id and not language_id.get("cached"):
+            metrics.inc("subtitle_languages_identified_total", language=language_id["language"])
+        metrics.inc("subtitle_pipeline_runs_total")
+        log_json("pipeline_done", timings=timings, realtime_factor=stats.get("realtime_factor"), decoding=decoding)
+
+    return payload
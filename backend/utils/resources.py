@@ -0,0 +1,186 @@
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from utils import metrics
+from utils.config import (
+    RESOURCE_SCHEDULER, CPU_CORES, HEAVY_STAGE_SLOTS, STAGE_MIN_THREADS, STAGE_MEMORY_BYTES,
+    PIN_WORKERS, SCHEDULER_LOCK_DIR,
+)
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows
+    fcntl = None
+
+
+def detect_cores():
+    """CPUs this process may use: affinity mask, capped by a cgroup v2 CPU quota."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cores = min(cores, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cores)
+
+
+def detect_memory():
+    """Memory available to this process in bytes (MemTotal, capped by a cgroup v2 limit), or None."""
+    total = None
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    total = int(line.split()[1]) * 1024
+                    break
+    except OSError:
+        pass
+    try:
+        with open("/sys/fs/cgroup/memory.max") as f:
+            limit = f.read().strip()
+        if limit != "max":
+            total = min(total, int(limit)) if total else int(limit)
+    except (OSError, ValueError):
+        pass
+    return total
+
+
+class ResourceScheduler:
+    """Splits the machine's cores between concurrent heavy pipeline stages.
+
+    Transcription/translation and burning each hold one of `slots` slots
+    while they run, and every library is sized to `threads` = cores / slots:
+    Whisper's cpu_threads, torch.set_num_threads, CTranslate2 and ffmpeg's
+    -threads. Slots are flock()ed files in SCHEDULER_LOCK_DIR, so the API
+    process and all job workers share them, and a crashed process frees its
+    slot automatically. With RESOURCE_SCHEDULER disabled nothing is limited
+    and thread counts are left to the libraries.
+    """
+
+    def __init__(self, enabled=RESOURCE_SCHEDULER, cores=CPU_CORES, slots=HEAVY_STAGE_SLOTS,
+                 lock_dir=SCHEDULER_LOCK_DIR):
+        self.enabled = enabled
+        self.cores = cores or detect_cores()
+        self.memory = detect_memory()
+        if not slots:
+            slots = max(1, self.cores // max(1, STAGE_MIN_THREADS))
+            if self.memory:
+                slots = min(slots, max(1, self.memory // STAGE_MEMORY_BYTES))
+        self.slots = slots
+        self.threads = max(1, self.cores // self.slots)
+        self.lock_dir = lock_dir
+        self._local = threading.local()
+        # Fallback when flock is unavailable: slots are only shared within this process
+        self._semaphore = threading.BoundedSemaphore(self.slots)
+
+    def stage_threads(self, default=0):
+        """Thread budget for one heavy stage (default when the scheduler is off)."""
+        return self.threads if self.enabled else default
+
+    def _try_lock(self):
+        os.makedirs(self.lock_dir, exist_ok=True)
+        for i in range(self.slots):
+            fd = os.open(os.path.join(self.lock_dir, f"slot-{i}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except OSError:
+                os.close(fd)
+        return None
+
+    @contextmanager
+    def slot(self, stage):
+        """Hold a heavy-stage slot for the duration of the block.
+
+        Re-entrant within a thread, so a stage that calls another heavy
+        function keeps the slot it already has.
+        """
+        if not self.enabled or getattr(self._local, "depth", 0):
+            self._local.depth = getattr(self._local, "depth", 0) + 1
+            try:
+                yield self.stage_threads()
+            finally:
+                self._local.depth -= 1
+            return
+
+        started = time.perf_counter()
+        fd = None
+        if fcntl is not None:
+            delay = 0.05
+            fd = self._try_lock()
+            while fd is None:
+                time.sleep(delay)
+                delay = min(delay * 2, 0.5)
+                fd = self._try_lock()
+        else:
+            self._semaphore.acquire()
+        waited = time.perf_counter() - started
+        metrics.observe("subtitle_slot_wait_seconds", waited, stage=stage)
+        if waited > 1:
+            print(f"[SCHED] {stage} waited {waited:.1f}s for a free slot")
+
+        self._local.depth = 1
+        try:
+            yield self.threads
+        finally:
+            self._local.depth = 0
+            if fd is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+            else:
+                self._semaphore.release()
+
+    def heavy(self, stage):
+        """Decorator form of slot()."""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.slot(stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def pin_worker(self, index):
+        """Restrict job worker `index` (and the processes it spawns) to its own block of cores."""
+        if not (self.enabled and PIN_WORKERS and hasattr(os, "sched_setaffinity")):
+            return None
+        available = sorted(os.sched_getaffinity(0))
+        block = max(1, min(self.threads, len(available)))
+        start = (index * block) % len(available)
+        cores = {available[(start + i) % len(available)] for i in range(block)}
+        os.sched_setaffinity(0, cores)
+        return sorted(cores)
+
+    def describe(self):
+        return {
+            "enabled": self.enabled,
+            "cores": self.cores,
+            "memory_bytes": self.memory,
+            "slots": self.slots,
+            "threads_per_stage": self.threads,
+        }
+
+
+def configure_torch(threads):
+    """Size PyTorch's thread pools to a stage budget (no-op for 0)."""
+    if not threads:
+        return
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        # Only allowed before torch has started any inter-op work
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+
+# One scheduler per process; the slots themselves are machine-wide
+scheduler = ResourceScheduler()
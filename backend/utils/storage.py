@@ -0,0 +1,208 @@
+import os
+import shutil
+import threading
+import time
+from utils.config import (
+    UPLOAD_DIR, OUTPUT_DIR, STORAGE_TTL_SECONDS, STORAGE_QUOTA_BYTES, STORAGE_SWEEP_INTERVAL,
+)
+from utils.db import db
+from utils.jobs import purge_finished_jobs
+
+# Swept rows are kept this many TTLs so downloads can answer 410 instead of 404
+SWEPT_RETENTION_TTLS = 7
+# Untracked files modified more recently than this (or than the TTL, when one
+# is set) are left alone: uploads are written before any job or artifact row exists
+UNTRACKED_GRACE_SECONDS = 3600
+
+
+def _key(path):
+    return os.path.abspath(path)
+
+
+def record_artifact(job_id, path, kind):
+    """Register a file produced for a job so the sweeper can expire it.
+
+    Args:
+        job_id: Job or file id the artifact belongs to
+        path: Path of the file on disk
+        kind: Short label such as "input", "audio", "srt" or "video"
+    """
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return
+    db.execute(
+        """
+        INSERT INTO artifacts(path, job_id, kind, size, created_at) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(path) DO UPDATE SET size = excluded.size, created_at = excluded.created_at,
+            swept_at = NULL, swept_reason = NULL
+        """,
+        (_key(path), job_id, kind, size, time.time()),
+    )
+
+
+def remove_artifact(path, reason="released"):
+    """Delete a file now (e.g. an intermediate .wav) and mark its record swept."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"[STORAGE] Could not remove {path}: {e}")
+        return False
+    db.execute(
+        "UPDATE artifacts SET swept_at = ?, swept_reason = ? WHERE path = ? AND swept_at IS NULL",
+        (time.time(), reason, _key(path)),
+    )
+    return True
+
+
+def artifact_status(path):
+    """Return "present", "swept" or None when the path was never recorded."""
+    if os.path.exists(path):
+        return "present"
+    row = db.fetchone("SELECT swept_at FROM artifacts WHERE path = ?", (_key(path),))
+    if row is None:
+        return None
+    return "swept" if row["swept_at"] is not None else "missing"
+
+
+def _pending_inputs():
+    # Inputs of queued/running jobs must survive even if they outlive the TTL
+    rows = db.fetchall("SELECT input_path FROM jobs WHERE status NOT IN ('done', 'failed')")
+    return {_key(r["input_path"]) for r in rows}
+
+
+def _untracked_files(tracked):
+    for directory in (UPLOAD_DIR, OUTPUT_DIR):
+        if not os.path.isdir(directory):
+            continue
+        for entry in os.scandir(directory):
+            if entry.is_file() and _key(entry.path) not in tracked:
+                yield entry
+
+
+def sweep(ttl=STORAGE_TTL_SECONDS, quota=STORAGE_QUOTA_BYTES, now=None):
+    """Expire artifacts older than ttl, then evict oldest-first down to quota.
+
+    Files in UPLOAD_DIR/OUTPUT_DIR that were never recorded (left over from
+    crashes or older versions) are adopted with their mtime once they have not
+    been modified for the TTL (UNTRACKED_GRACE_SECONDS without one), so files
+    still being uploaded or waiting for their job row are never evicted.
+    Events of jobs that finished more than ttl ago are deleted along with their
+    outputs, and the job rows themselves after SWEPT_RETENTION_TTLS ttls.
+
+    Returns:
+        Dict with the number of files and bytes removed per reason
+    """
+    now = now or time.time()
+    protected = _pending_inputs()
+    tracked = {r["path"] for r in db.fetchall("SELECT path FROM artifacts")}
+
+    grace = ttl or UNTRACKED_GRACE_SECONDS
+    for entry in _untracked_files(tracked):
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        if now - st.st_mtime < grace:
+            continue
+        db.execute(
+            "INSERT OR IGNORE INTO artifacts(path, job_id, kind, size, created_at) VALUES (?, NULL, 'untracked', ?, ?)",
+            (_key(entry.path), st.st_size, st.st_mtime),
+        )
+
+    live = db.fetchall(
+        "SELECT path, size, created_at FROM artifacts WHERE swept_at IS NULL ORDER BY created_at ASC"
+    )
+    removed = {"ttl": {"files": 0, "bytes": 0}, "quota": {"files": 0, "bytes": 0}, "missing": 0,
+               "job_events": 0, "jobs": 0}
+    remaining = []
+    for row in live:
+        if not os.path.exists(row["path"]):
+            db.execute("UPDATE artifacts SET swept_at = ?, swept_reason = 'missing' WHERE path = ?", (now, row["path"]))
+            removed["missing"] += 1
+        elif row["path"] in protected:
+            continue
+        elif ttl and now - row["created_at"] > ttl:
+            if remove_artifact(row["path"], reason="ttl"):
+                removed["ttl"]["files"] += 1
+                removed["ttl"]["bytes"] += row["size"]
+        else:
+            remaining.append(row)
+
+    total = sum(r["size"] for r in remaining)
+    for row in remaining:
+        if not quota or total <= quota:
+            break
+        if remove_artifact(row["path"], reason="quota"):
+            removed["quota"]["files"] += 1
+            removed["quota"]["bytes"] += row["size"]
+            total -= row["size"]
+
+    if ttl:
+        db.execute(
+            "DELETE FROM artifacts WHERE swept_at IS NOT NULL AND swept_at < ?",
+            (now - ttl * SWEPT_RETENTION_TTLS,),
+        )
+        removed["job_events"], removed["jobs"] = purge_finished_jobs(now - ttl, now - ttl * SWEPT_RETENTION_TTLS)
+
+    if removed["ttl"]["files"] or removed["quota"]["files"]:
+        print(f"[STORAGE] Swept {removed['ttl']['files']} expired and {removed['quota']['files']} over-quota files")
+    return removed
+
+
+def storage_stats():
+    """Live and swept artifact totals per kind plus the configured limits."""
+    rows = db.fetchall("""
+        SELECT kind, swept_at IS NOT NULL AS swept, COUNT(*) AS files, COALESCE(SUM(size), 0) AS bytes
+        FROM artifacts GROUP BY kind, swept
+    """)
+    live = {}
+    swept = {}
+    for r in rows:
+        target = swept if r["swept"] else live
+        target[r["kind"]] = {"files": r["files"], "bytes": r["bytes"]}
+    stats = {
+        "live": live,
+        "swept": swept,
+        "live_bytes": sum(v["bytes"] for v in live.values()),
+        "ttl_seconds": STORAGE_TTL_SECONDS,
+        "quota_bytes": STORAGE_QUOTA_BYTES,
+    }
+    try:
+        stats["disk_free_bytes"] = shutil.disk_usage(OUTPUT_DIR).free
+    except OSError:
+        stats["disk_free_bytes"] = None
+    return stats
+
+
+class StorageSweeper:
+    """Background thread running sweep() every STORAGE_SWEEP_INTERVAL seconds."""
+
+    def __init__(self, interval=STORAGE_SWEEP_INTERVAL):
+        self.interval = interval
+        self.last_run = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.last_run = {"at": time.time(), "removed": sweep()}
+            except Exception as e:
+                print(f"[STORAGE] Sweep failed: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="storage-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -1,5 +1,297 @@
-import srt
-from datetime import timedelta
+import json
+import re
+from array import array
+from utils.config import ASS_FONT, ASS_FONT_SIZE
+
+
+# A blank line ends an SRT/WebVTT cue, so runs of them inside a cue are collapsed
+_BLANK_LINES = re.compile(r"\n\s*\n")
+
+
+def clean_text(text):
+    """Strip cue text and collapse blank lines inside it, as srt.compose() used to."""
+    return _BLANK_LINES.sub("\n", (text or "").strip())
+
+
+# ---------- compact cue representation ----------
+class Cue:
+    """One subtitle cue. Times are seconds on the original timeline."""
+
+    __slots__ = ("start", "end", "text")
+
+    def __init__(self, start, end, text):
+        self.start = float(start)
+        self.end = float(end)
+        self.text = text
+
+    def to_dict(self):
+        """API shape used by /upload, /jobs and the frontend."""
+        return {
+            "time": f"{format_srt_time(self.start)} --> {format_srt_time(self.end)}",
+            "text": self.text,
+            "start": self.start,
+            "end": self.end,
+        }
+
+
+class CueStore:
+    """Append-only list of cues backed by two float arrays and a text list.
+
+    Much smaller than a dict per cue, and cues can be streamed to a writer
+    as they are appended.
+    """
+
+    def __init__(self, cues=None):
+        self._starts = array("d")
+        self._ends = array("d")
+        self._texts = []
+        for cue in cues or ():
+            self.append(cue.start, cue.end, cue.text)
+
+    def append(self, start, end, text):
+        self._starts.append(float(start))
+        self._ends.append(float(end))
+        self._texts.append(clean_text(text))
+        return Cue(self._starts[-1], self._ends[-1], self._texts[-1])
+
+    def __len__(self):
+        return len(self._texts)
+
+    def __getitem__(self, i):
+        return Cue(self._starts[i], self._ends[i], self._texts[i])
+
+    def __iter__(self):
+        for i in range(len(self._texts)):
+            yield Cue(self._starts[i], self._ends[i], self._texts[i])
+
+    def texts(self):
+        return list(self._texts)
+
+    def to_dicts(self):
+        return [cue.to_dict() for cue in self]
+
+
+def as_cues(items):
+    """Yield Cues from a CueStore, Cues, subtitle dicts or plain strings.
+
+    Items without start/end get consecutive 3 second slots, as before.
+    """
+    for i, item in enumerate(items):
+        if isinstance(item, Cue):
+            yield item
+            continue
+        if isinstance(item, dict):
+            content = item.get("text", "")
+            start, end = item.get("start"), item.get("end")
+        else:
+            content, start, end = str(item), None, None
+        if start is None or end is None:
+            start, end = i * 3, i * 3 + 3
+        yield Cue(start, end, clean_text(content))
+
+
+# ---------- timestamps ----------
+def _split(seconds):
+    millis = int(round(max(0.0, seconds) * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return hours, minutes, secs, millis
+
+
+def format_srt_time(seconds):
+    """Seconds -> "HH:MM:SS,mmm"."""
+    return "%02d:%02d:%02d,%03d" % _split(seconds)
+
+
+def format_vtt_time(seconds):
+    """Seconds -> "HH:MM:SS.mmm"."""
+    return "%02d:%02d:%02d.%03d" % _split(seconds)
+
+
+def format_ass_time(seconds):
+    """Seconds -> "H:MM:SS.cc" (centiseconds)."""
+    hours, minutes, secs, millis = _split(seconds)
+    return "%d:%02d:%02d.%02d" % (hours, minutes, secs, millis // 10)
+
+
+# ---------- streaming writers ----------
+class SubtitleWriter:
+    """Write cues one at a time; subclasses provide header/format_cue/footer.
+
+    Use as a context manager around a path, or iter_text() to stream the
+    formatted text (e.g. into an HTTP response) without building it in memory.
+    Cues with no text or no duration are skipped and not numbered, as
+    srt.compose() used to do. write() keeps the order it is called in;
+    write_subtitles() sorts first. The streaming pipeline needs no sort:
+    transcribe_audio() yields segments in timeline order, chunk windows
+    included.
+    """
+
+    extension = ""
+    media_type = "text/plain"
+
+    def __init__(self, path=None):
+        self.path = path
+        self.count = 0
+        self._file = None
+
+    def header(self):
+        return ""
+
+    def format_cue(self, index, cue):
+        raise NotImplementedError
+
+    def footer(self):
+        return ""
+
+    def __enter__(self):
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write(self.header())
+        return self
+
+    @staticmethod
+    def keep(cue):
+        return bool(cue.text and cue.text.strip()) and cue.end > cue.start
+
+    def write(self, cue):
+        if not self.keep(cue):
+            return
+        self.count += 1
+        self._file.write(self.format_cue(self.count, cue))
+
+    def flush(self):
+        self._file.flush()
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self._file.write(self.footer())
+        finally:
+            self._file.close()
+
+    def iter_text(self, cues):
+        yield self.header()
+        for cue in cues:
+            if not self.keep(cue):
+                continue
+            self.count += 1
+            yield self.format_cue(self.count, cue)
+        yield self.footer()
+
+
+class SrtWriter(SubtitleWriter):
+    extension = "srt"
+    media_type = "text/plain"
+
+    def format_cue(self, index, cue):
+        return f"{index}\n{format_srt_time(cue.start)} --> {format_srt_time(cue.end)}\n{cue.text}\n\n"
+
+
+class VttWriter(SubtitleWriter):
+    extension = "vtt"
+    media_type = "text/vtt"
+
+    def header(self):
+        return "WEBVTT\n\n"
+
+    def format_cue(self, index, cue):
+        # "-->" would be read as a timing line; "&" and "<" start entities and tags
+        text = cue.text.replace("&", "&amp;").replace("<", "&lt;").replace("-->", "--&gt;")
+        return f"{index}\n{format_vtt_time(cue.start)} --> {format_vtt_time(cue.end)}\n{text}\n\n"
+
+
+class AssWriter(SubtitleWriter):
+    extension = "ass"
+    media_type = "text/x-ssa"
+
+    def header(self):
+        return (
+            "[Script Info]\n"
+            "ScriptType: v4.00+\n"
+            "PlayResX: 1920\n"
+            "PlayResY: 1080\n"
+            "WrapStyle: 0\n"
+            "ScaledBorderAndShadow: yes\n"
+            "\n"
+            "[V4+ Styles]\n"
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+            "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, "
+            "Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n"
+            f"Style: Default,{ASS_FONT},{ASS_FONT_SIZE},&H00FFFFFF,&H000000FF,&H00000000,&H80000000,"
+            "0,0,0,0,100,100,0,0,1,3,1,2,60,60,50,1\n"
+            "\n"
+            "[Events]\n"
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+        )
+
+    def format_cue(self, index, cue):
+        text = cue.text.replace("\\", "\\\\").replace("{", "\\{").replace("}", "\\}").replace("\n", "\\N")
+        return f"Dialogue: 0,{format_ass_time(cue.start)},{format_ass_time(cue.end)},Default,,0,0,0,,{text}\n"
+
+
+class JsonWriter(SubtitleWriter):
+    extension = "json"
+    media_type = "application/json"
+
+    def header(self):
+        return "["
+
+    def format_cue(self, index, cue):
+        item = json.dumps({"index": index, "start": cue.start, "end": cue.end, "text": cue.text}, ensure_ascii=False)
+        return ("\n" if index == 1 else ",\n") + item
+
+    def footer(self):
+        return "\n]\n" if self.count else "]\n"
+
+
+WRITERS = {w.extension: w for w in (SrtWriter, VttWriter, AssWriter, JsonWriter)}
+SUBTITLE_FORMATS = tuple(WRITERS)
+
+
+def get_writer(fmt, path=None):
+    """Return a writer for "srt", "vtt", "ass" or "json"."""
+    try:
+        return WRITERS[fmt](path)
+    except KeyError:
+        raise ValueError(f"Unsupported subtitle format '{fmt}'. Choose one of: {', '.join(SUBTITLE_FORMATS)}")
+
+
+def write_subtitles(cues, output_file, fmt="srt"):
+    """Write cues (CueStore, Cues or subtitle dicts) to output_file in fmt, ordered by start time.
+
+    Returns:
+        The number of cues written (empty and zero-length cues are skipped)
+    """
+    with get_writer(fmt, output_file) as writer:
+        for cue in sorted(as_cues(cues), key=lambda c: c.start):
+            writer.write(cue)
+    return writer.count
+
+
+def read_srt(path):
+    """Yield Cues from an SRT file without loading it whole."""
+    def parse_time(value):
+        hms, _, millis = value.strip().partition(",")
+        h, m, s = hms.split(":")
+        return int(h) * 3600 + int(m) * 60 + int(s) + int(millis or 0) / 1000
+
+    timing, lines = None, []
+    with open(path, encoding="utf-8") as f:
+        for raw in f:
+            line = raw.rstrip("\r\n")
+            if timing is None:
+                if "-->" in line:
+                    start, _, end = line.partition("-->")
+                    timing = (parse_time(start), parse_time(end.split()[0]))
+                continue
+            if line.strip():
+                lines.append(line)
+                continue
+            yield Cue(timing[0], timing[1], "\n".join(lines))
+            timing, lines = None, []
+    if timing is not None:
+        yield Cue(timing[0], timing[1], "\n".join(lines))
 
 
 def generate_srt(text_or_subs, output_file):
@@ -7,58 +299,12 @@ def generate_srt(text_or_subs, output_file):
 
     Accepts either:
       - a string (old behavior): splits into sentences and assigns 3s durations
-      - a list of subtitle dicts (new behavior) where each item contains
+      - a CueStore, or a list of Cues / subtitle dicts where each item contains
         'text' and optionally 'start' and 'end' (seconds)
+
+    Cues are written one at a time rather than composed into one string.
     """
-    subs = []
-
-    # If input is a list of subtitle objects (from translate.py), use timestamps
-    if isinstance(text_or_subs, list):
-        for i, item in enumerate(text_or_subs):
-            # support either dict-like or simple strings
-            if isinstance(item, dict):
-                content = item.get("text", "")
-                start_sec = item.get("start")
-                end_sec = item.get("end")
-            else:
-                content = str(item)
-                start_sec = None
-                end_sec = None
-
-            # Fallback durations when start/end not provided
-            if start_sec is None or end_sec is None:
-                duration = 3
-                start = i * duration
-                end = start + duration
-            else:
-                start = float(start_sec)
-                end = float(end_sec)
-
-            sub = srt.Subtitle(
-                index=i + 1,
-                start=timedelta(seconds=start),
-                end=timedelta(seconds=end),
-                content=content.strip()
-            )
-            subs.append(sub)
-
-    else:
+    if isinstance(text_or_subs, str):
         # Legacy behavior: split a block of text into short subtitles
-        text = str(text_or_subs)
-        lines = [l.strip() for l in text.split(". ") if l.strip()]
-        start = 0
-        for i, line in enumerate(lines):
-            duration = 3  # each subtitle lasts 3 seconds
-            sub = srt.Subtitle(
-                index=i + 1,
-                start=timedelta(seconds=start),
-                end=timedelta(seconds=start + duration),
-                content=line
-            )
-            subs.append(sub)
-            start += duration
-
-    srt_text = srt.compose(subs)
-
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(srt_text)
\ No newline at end of file
+        text_or_subs = [l.strip() for l in text_or_subs.split(". ") if l.strip()]
+    return write_subtitles(text_or_subs, output_file, "srt")
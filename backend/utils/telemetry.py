@@ -0,0 +1,62 @@
+import contextvars
+import json
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from utils import metrics
+from utils.config import LOG_JSON
+
+# Job (or /upload file) id that log lines and spans are attributed to
+current_job = contextvars.ContextVar("current_job", default=None)
+
+
+def log_json(event, **fields):
+    """Write one structured log line: {"ts", "event", "job_id", ...fields}."""
+    if not LOG_JSON:
+        return
+    record = {"ts": datetime.utcnow().isoformat(timespec="milliseconds") + "Z", "event": event}
+    job_id = fields.pop("job_id", None) or current_job.get()
+    if job_id:
+        record["job_id"] = job_id
+    record.update(fields)
+    sys.stdout.write(json.dumps(record, default=str) + "\n")
+    sys.stdout.flush()
+
+
+def record_stage(stage, seconds, timings=None, status="ok"):
+    """Account `seconds` of wall time to a pipeline stage.
+
+    Observes subtitle_stage_seconds{stage}, adds the time to the timings dict
+    (accumulating if the stage repeats) and logs a "span" line.
+    """
+    metrics.observe("subtitle_stage_seconds", seconds, stage=stage)
+    if status != "ok":
+        metrics.inc("subtitle_stage_errors_total", stage=stage)
+    if timings is not None:
+        timings[stage] = round(timings.get(stage, 0.0) + seconds, 3)
+    log_json("span", stage=stage, duration_ms=round(seconds * 1000, 1), status=status)
+
+
+@contextmanager
+def span(stage, timings=None):
+    """Time the enclosed block as `stage`; failures count as stage errors."""
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - started, timings, status)
+
+
+@contextmanager
+def job_context(job_id):
+    """Attribute spans and log lines in this thread/task to job_id."""
+    token = current_job.set(job_id)
+    try:
+        yield
+    finally:
+        current_job.reset(token)
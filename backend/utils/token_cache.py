@@ -0,0 +1,82 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from utils.config import TOKEN_CACHE_TTL, TOKEN_CACHE_SIZE
+
+
+class TokenCache:
+    """Bounded TTL cache of verified JWTs.
+
+    Keys are SHA-256 digests of the raw token so tokens are never held in
+    memory as-is. A hit means the signature was already checked and the
+    token_version matched the database, so the request needs neither a
+    decode nor a query. Entries expire after `ttl` seconds or at the JWT's
+    own exp, whichever is sooner.
+    """
+
+    def __init__(self, ttl=TOKEN_CACHE_TTL, max_entries=TOKEN_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token):
+        """Return the cached user dict for this token, or None."""
+        if self.ttl <= 0:
+            return None
+        key = self.key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return user
+
+    def put(self, token, user, token_exp=None):
+        """Cache a verified token.
+
+        Args:
+            token: raw JWT
+            user: dict with at least "id"
+            token_exp: the JWT's exp claim (unix seconds), if any
+        """
+        if self.ttl <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, float(token_exp))
+        key = self.key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        """Drop every cached token belonging to user_id."""
+        with self._lock:
+            stale = [k for k, (_, user) in self._entries.items() if user.get("id") == user_id]
+            for k in stale:
+                del self._entries[k]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "ttl_seconds": self.ttl}
+
+
+# One cache per API process
+token_cache = TokenCache()
@@ -1,9 +1,54 @@
-from faster_whisper import WhisperModel
-from transformers import M2M100ForConditionalGeneration, M2M100Tokenizer
-from functools import lru_cache
+from faster_whisper import decode_audio
+import faster_whisper
+import transformers
+import torch
+from transformers.modeling_outputs import BaseModelOutput
+from utils.config import CACHE_ENABLED, TRANSLATION_BATCH_SIZE, TRANSLATION_MAX_BATCH_TOKENS, TRANSLATION_MEMORY
+from utils.config import CHUNKED_TRANSCRIPTION, TRANSCRIBE_CHUNK_SECONDS
+from utils.config import STREAM_FLUSH_SEGMENTS, STREAM_PROGRESS_INTERVAL
+from utils.config import WHISPER_MODEL, WHISPER_COMPUTE_TYPE, TRANSLATION_MODEL, TRANSLATION_BACKEND, DECODING_PROFILE
+import time
+from utils.chunking import SAMPLE_RATE, can_spawn_workers, identify_chunked, transcribe_chunked
+from utils.vad import VAD_MODE, VAD_ID, speech_only
+from utils.cache import TRANSCRIPTION_LAYER, TRANSLATION_LAYER, make_key, cache_get, cache_put
+from utils.cache import normalize_text, memory_get_many, memory_put_many
+from utils.models import registry
+from utils.decoding import decode, new_counters
+from utils.langid import LANGID_ID, identify_language, is_auto
+from utils.resources import scheduler
+from utils.translation_backends import ct2_model_id
+from utils.telemetry import record_stage, span
+from utils.subtitles import CueStore
+
+
+def _model_choice(model_options):
+    """Resolve per-request model overrides against the deployment defaults.
+
+    model_options may contain "whisper", "compute_type" and "translation".
+    """
+    model_options = model_options or {}
+    return (
+        model_options.get("whisper") or WHISPER_MODEL,
+        model_options.get("compute_type") or WHISPER_COMPUTE_TYPE,
+        model_options.get("translation") or TRANSLATION_MODEL,
+    )
+
+
+def _decoding_choice(model_options):
+    """Whisper decoding profile for the request ("decoding" in model_options)."""
+    return (model_options or {}).get("decoding") or DECODING_PROFILE
+
+
+# Model identities (name + library version) used in result cache keys
+def whisper_model_id(size, compute_type, profile=DECODING_PROFILE):
+    return f"whisper-{size}-{compute_type}-{profile}@faster-whisper-{faster_whisper.__version__}"
+
+
+def translation_model_id(name, backend=TRANSLATION_BACKEND):
+    if backend == "ctranslate2":
+        return ct2_model_id(name)
+    return f"{name}@transformers-{transformers.__version__}"
 
-# Load whisper for transcription
-whisper = WhisperModel("small", device="cpu", compute_type="int8")
 
 # Language code mapping
 LANG_CODES = {
@@ -26,28 +71,14 @@ LANG_CODES = {
     "thai": "th"
 }
 
-@lru_cache(maxsize=1)
-def get_m2m_model():
-    """Load and cache the M2M100 multilingual model and tokenizer."""
+def get_m2m_model(name=None):
+    """Return the (tokenizer, model) pair from the model registry, loading it on first use."""
     try:
-        print("Loading M2M100 multilingual translation model...")
-        tok = M2M100Tokenizer.from_pretrained("facebook/m2m100_418M")
-        mod = M2M100ForConditionalGeneration.from_pretrained("facebook/m2m100_418M")
-        print("M2M100 model loaded successfully")
-        return tok, mod
+        return registry.translation(name)
     except Exception as e:
         print(f"Error loading M2M100 model: {e}")
         return None, None
 
-def format_timestamp(seconds):
-    """Convert seconds to SRT timestamp format"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millis = int((seconds % 1) * 1000)
-    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
-
-
 def translate_segment(text, tokenizer, model, src_lang, tgt_lang):
     """Translate a single text segment using M2M100.
     
@@ -89,95 +120,510 @@ def translate_segment(text, tokenizer, model, src_lang, tgt_lang):
         return text
 
 
-def translate_text(audio_file, target_lang="english", source_lang=None):
+def _make_batches(lengths, batch_size, max_batch_tokens):
+    """Group segment indices into batches of similar length.
+
+    Indices are sorted by token length so each batch pads to a similar size.
+    A batch is closed when it reaches batch_size segments or when its padded
+    size (count x longest) would exceed max_batch_tokens.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches = []
+    current = []
+    longest = 0
+    for i in order:
+        candidate_longest = max(longest, lengths[i])
+        if current and (len(current) >= batch_size or candidate_longest * (len(current) + 1) > max_batch_tokens):
+            batches.append(current)
+            current = []
+            candidate_longest = lengths[i]
+        current.append(i)
+        longest = candidate_longest
+    if current:
+        batches.append(current)
+    return batches
+
+
+def translate_batch(texts, tokenizer, model, src_lang, tgt_lang,
+                    batch_size=TRANSLATION_BATCH_SIZE, max_batch_tokens=TRANSLATION_MAX_BATCH_TOKENS):
+    """Translate many segments with padded, length-sorted generate() batches.
+
+    Args:
+        texts: List of segment texts
+        tokenizer: M2M100Tokenizer instance
+        model: M2M100ForConditionalGeneration instance, or a utils.translation_backends
+            engine (TRANSLATION_BACKEND=ctranslate2) which is called instead
+        src_lang: Source language code
+        tgt_lang: Target language code
+        batch_size: Max segments per generate() call
+        max_batch_tokens: Max padded source tokens per generate() call
+
+    Returns:
+        List of translated texts in the original order. If a batch fails, its
+        segments are retried one by one so only the failing segment keeps its
+        original text.
+    """
+    if getattr(model, "backend", "torch") != "torch":
+        # utils.translation_backends engine (e.g. CTranslate2) does its own batching
+        return model.translate_batch(texts, tokenizer, src_lang, tgt_lang, batch_size, max_batch_tokens)
+
+    results = list(texts)
+    todo = [i for i, t in enumerate(texts) if t and t.strip()]
+    if not todo:
+        return results
+
+    tokenizer.src_lang = src_lang
+    try:
+        forced_bos = tokenizer.get_lang_id(tgt_lang)
+    except Exception:
+        print(f"Warning: Target language '{tgt_lang}' not found in M2M100; will use default decoding")
+        forced_bos = None
+
+    lengths = [len(ids) for ids in tokenizer([texts[i] for i in todo], truncation=True, max_length=1024)["input_ids"]]
+    for batch in _make_batches(lengths, batch_size, max_batch_tokens):
+        idx = [todo[b] for b in batch]
+        try:
+            encoded = tokenizer([texts[i] for i in idx], return_tensors="pt", padding=True,
+                                truncation=True, max_length=1024)
+            gen_kwargs = {"max_length": 1024}
+            if forced_bos is not None:
+                gen_kwargs["forced_bos_token_id"] = forced_bos
+            with torch.inference_mode():
+                generated = model.generate(**encoded, **gen_kwargs)
+            decoded = tokenizer.batch_decode(generated, skip_special_tokens=True)
+            for i, translated in zip(idx, decoded):
+                results[i] = translated
+        except Exception as e:
+            print(f"Batch translation error ({src_lang}->{tgt_lang}): {e}; retrying {len(idx)} segment(s) individually")
+            for i in idx:
+                results[i] = translate_segment(texts[i], tokenizer, model, src_lang, tgt_lang)
+    return results
+
+
+def translate_with_memory(texts, tokenizer, model, src_lang, tgt_lang, model_id, stats=None):
+    """Translate texts, answering repeated lines from the translation memory.
+
+    Each distinct normalized line is looked up once; only the misses go to
+    translate_batch(), and their results are stored for later jobs.
+
+    Args:
+        texts: List of segment texts
+        tokenizer, model: Loaded M2M100 pair
+        src_lang, tgt_lang: Language codes
+        model_id: translation_model_id() of the model, part of the memory key
+        stats: Optional per-job dict; "translation_memory" gets lookups/hits/hit_ratio
+
+    Returns:
+        List of translated texts in the original order
+    """
+    if not TRANSLATION_MEMORY:
+        return translate_batch(texts, tokenizer, model, src_lang, tgt_lang)
+
+    norms = [normalize_text(t) for t in texts]
+    distinct = list(dict.fromkeys(n for n in norms if n))
+    try:
+        known = memory_get_many(distinct, src_lang, tgt_lang, model_id)
+    except Exception as e:
+        print(f"Translation memory lookup failed: {e}")
+        known = {}
+
+    misses = [n for n in distinct if n not in known]
+    if misses:
+        translated = translate_batch(misses, tokenizer, model, src_lang, tgt_lang)
+        # A segment that failed to translate comes back unchanged; don't remember it
+        fresh = [(src, out) for src, out in zip(misses, translated) if out and out != src]
+        known.update(zip(misses, translated))
+        try:
+            memory_put_many(fresh, src_lang, tgt_lang, model_id)
+        except Exception as e:
+            print(f"Translation memory store failed: {e}")
+
+    if stats is not None:
+        tm = stats.setdefault("translation_memory", {"lookups": 0, "hits": 0})
+        tm["lookups"] += len(distinct)
+        tm["hits"] += len(distinct) - len(misses)
+        tm["hit_ratio"] = round(tm["hits"] / tm["lookups"], 4) if tm["lookups"] else 0.0
+    return [known.get(n, t) if n else t for n, t in zip(norms, texts)]
+
+
+def translate_batch_multi(texts, tokenizer, model, src_lang, tgt_langs, need=None,
+                          batch_size=TRANSLATION_BATCH_SIZE, max_batch_tokens=TRANSLATION_MAX_BATCH_TOKENS):
+    """Translate texts into several target languages, running the encoder once per batch.
+
+    M2M100's encoder output depends only on the source, so each length-sorted
+    batch is encoded once and decoded per target with its forced BOS token.
+
+    Args:
+        texts: List of segment texts
+        tokenizer, model: Loaded M2M100 pair
+        src_lang: Source language code
+        tgt_langs: Target language codes
+        need: Optional {tgt: set of indices} limiting which texts each target
+            decodes (e.g. translation memory misses); default is all of them
+
+    Returns:
+        Dict {tgt: list of translated texts in the original order}
+    """
+    if getattr(model, "backend", "torch") != "torch":
+        return model.translate_batch_multi(texts, tokenizer, src_lang, tgt_langs, need, batch_size, max_batch_tokens)
+
+    results = {tgt: list(texts) for tgt in tgt_langs}
+    todo = [i for i, t in enumerate(texts) if t and t.strip()]
+    if not todo or not tgt_langs:
+        return results
+
+    tokenizer.src_lang = src_lang
+    forced = {}
+    for tgt in tgt_langs:
+        try:
+            forced[tgt] = tokenizer.get_lang_id(tgt)
+        except Exception:
+            print(f"Warning: Target language '{tgt}' not found in M2M100; will use default decoding")
+            forced[tgt] = None
+
+    lengths = [len(ids) for ids in tokenizer([texts[i] for i in todo], truncation=True, max_length=1024)["input_ids"]]
+    for batch in _make_batches(lengths, batch_size, max_batch_tokens):
+        idx = [todo[b] for b in batch]
+        try:
+            encoded = tokenizer([texts[i] for i in idx], return_tensors="pt", padding=True,
+                                truncation=True, max_length=1024)
+            with torch.inference_mode():
+                hidden = model.get_encoder()(**encoded).last_hidden_state
+                for tgt in tgt_langs:
+                    rows = [r for r, i in enumerate(idx) if need is None or i in need.get(tgt, ())]
+                    if not rows:
+                        continue
+                    mask = encoded["attention_mask"]
+                    states = hidden
+                    if len(rows) < len(idx):
+                        select = torch.tensor(rows)
+                        mask, states = mask[select], hidden[select]
+                    gen_kwargs = {"max_length": 1024}
+                    if forced[tgt] is not None:
+                        gen_kwargs["forced_bos_token_id"] = forced[tgt]
+                    # generate() expands encoder_outputs for beam search in place, so wrap it fresh per target
+                    generated = model.generate(encoder_outputs=BaseModelOutput(last_hidden_state=states),
+                                               attention_mask=mask, **gen_kwargs)
+                    decoded = tokenizer.batch_decode(generated, skip_special_tokens=True)
+                    for r, translated in zip(rows, decoded):
+                        results[tgt][idx[r]] = translated
+        except Exception as e:
+            print(f"Multi-target batch error ({src_lang}->{','.join(tgt_langs)}): {e}; translating per target")
+            for tgt in tgt_langs:
+                wanted = [i for i in idx if need is None or i in need.get(tgt, ())]
+                for i, translated in zip(wanted, translate_batch([texts[i] for i in wanted], tokenizer, model,
+                                                                 src_lang, tgt)):
+                    results[tgt][i] = translated
+    return results
+
+
+def translate_with_memory_multi(texts, tokenizer, model, src_lang, tgt_langs, model_id, stats=None):
+    """translate_with_memory() for several targets sharing one encoder pass.
+
+    Returns:
+        Dict {tgt: list of translated texts in the original order}
+    """
+    if not TRANSLATION_MEMORY:
+        return translate_batch_multi(texts, tokenizer, model, src_lang, tgt_langs)
+
+    norms = [normalize_text(t) for t in texts]
+    distinct = list(dict.fromkeys(n for n in norms if n))
+    known = {}
+    for tgt in tgt_langs:
+        try:
+            known[tgt] = memory_get_many(distinct, src_lang, tgt, model_id)
+        except Exception as e:
+            print(f"Translation memory lookup failed: {e}")
+            known[tgt] = {}
+
+    # Encode every line some target still needs; decode only its own misses
+    misses = {tgt: {j for j, n in enumerate(distinct) if n not in known[tgt]} for tgt in tgt_langs}
+    union = sorted(set().union(*misses.values()))
+    if union:
+        position = {j: k for k, j in enumerate(union)}
+        need = {tgt: {position[j] for j in misses[tgt]} for tgt in tgt_langs}
+        sources = [distinct[j] for j in union]
+        translated = translate_batch_multi(sources, tokenizer, model, src_lang, tgt_langs, need=need)
+        for tgt in tgt_langs:
+            fresh = []
+            for k in need[tgt]:
+                src, out = sources[k], translated[tgt][k]
+                known[tgt][src] = out
+                if out and out != src:
+                    fresh.append((src, out))
+            try:
+                memory_put_many(fresh, src_lang, tgt, model_id)
+            except Exception as e:
+                print(f"Translation memory store failed: {e}")
+
+    if stats is not None:
+        tm = stats.setdefault("translation_memory", {"lookups": 0, "hits": 0})
+        for tgt in tgt_langs:
+            tm["lookups"] += len(distinct)
+            tm["hits"] += len(distinct) - len(misses[tgt])
+        tm["hit_ratio"] = round(tm["hits"] / tm["lookups"], 4) if tm["lookups"] else 0.0
+    return {tgt: [known[tgt].get(n, t) if n else t for n, t in zip(norms, texts)] for tgt in tgt_langs}
+
+
+def _cue_store(segments, texts, on_cue=None):
+    """Pair segment timings with (translated) texts, passing each cue to on_cue."""
+    store = CueStore()
+    for seg, text in zip(segments, texts):
+        cue = store.append(seg["start"], seg["end"], text)
+        if on_cue is not None:
+            on_cue(cue)
+    return store
+
+
+def transcribe_audio(audio_file, source_lang=None, media_hash=None, on_segments=None,
+                     flush_every=STREAM_FLUSH_SEGMENTS, stats=None, model_options=None):
+    """Transcribe audio with Whisper, reusing a cached transcription when possible.
+
+    A VAD pre-pass (VAD_MODE) drops silence and music first; Whisper and the
+    chunking logic only see the detected speech, and timestamps are mapped back
+    to the original timeline. Without a source language, utils.langid
+    identifies it on a short probe of that speech and Whisper is told the
+    result instead of detecting it again.
+
+    Args:
+        audio_file: Path to audio file, or a mono 16 kHz float32 NumPy array
+        source_lang: Optional source language code; None to identify it
+        media_hash: SHA-256 of the uploaded media; enables the result cache
+        on_segments: Optional callback(segments, detected_lang, fraction_done)
+            called with new segments as soon as they are transcribed
+        flush_every: Segments per on_segments call on the single-model path
+        stats: Optional dict that receives per-job statistics (e.g. "vad",
+            "language_id")
+        model_options: Optional per-request model overrides (see _model_choice)
+
+    Returns:
+        (segments, detected_lang) where segments is a list of dicts with
+        'start', 'end' and 'text'
+    """
+    whisper_size, compute_type, _ = _model_choice(model_options)
+    profile = _decoding_choice(model_options)
+    key = None
+    if CACHE_ENABLED and media_hash:
+        key = make_key(TRANSCRIPTION_LAYER, media_hash, source_lang or LANGID_ID,
+                       whisper_model_id(whisper_size, compute_type, profile), VAD_ID)
+        cached = cache_get(TRANSCRIPTION_LAYER, key)
+        if cached is not None:
+            print("Transcription cache hit")
+            if stats is not None:
+                stats["decoding"] = {"profile": profile, "cached": True}
+                if cached.get("vad"):
+                    stats["vad"] = dict(cached["vad"], cached=True)
+                if cached.get("language_id"):
+                    stats["language_id"] = dict(cached["language_id"], cached=True)
+            if on_segments is not None:
+                on_segments(cached["segments"], cached["language"], 1.0)
+            return cached["segments"], cached["language"]
+
+    if isinstance(audio_file, str):
+        audio = decode_audio(audio_file, sampling_rate=SAMPLE_RATE)
+    else:
+        # Already-decoded 16 kHz float32 samples (AUDIO_EXTRACT_MODE=memory)
+        audio = audio_file
+
+    # Only speech regions are transcribed
+    speech = speech_only(audio, VAD_MODE)
+    vad_summary = dict(speech.summary(), mode=VAD_MODE)
+    if stats is not None:
+        stats["vad"] = vad_summary
+    audio = speech.audio
+    duration = len(audio) / SAMPLE_RATE
+    counters = new_counters(profile)
+    chunked = CHUNKED_TRANSCRIPTION and duration > TRANSCRIBE_CHUNK_SECONDS * 1.5
+    if chunked and not can_spawn_workers():
+        print("Daemonic process: transcribing long audio in-process instead of in chunks")
+        chunked = False
+
+    language_id = None
+    if duration > 0 and source_lang is None:
+        # A sub-stage of "transcribe": observed and logged, but kept out of the
+        # timings breakdown so it isn't counted twice (see stats["language_id"])
+        with span("langid"):
+            if chunked:
+                language_id = identify_chunked(audio, whisper_size, compute_type)
+            else:
+                language_id = identify_language(registry.whisper(whisper_size, compute_type), audio)
+        if language_id is not None:
+            source_lang = language_id["language"]
+            print(f"Identified language: {source_lang} (p={language_id['probability']:.2f}, "
+                  f"{language_id['windows']} window(s))")
+            if stats is not None:
+                stats["language_id"] = language_id
+
+    if duration == 0:
+        print("VAD found no speech; skipping transcription")
+        segments, detected = [], None
+    elif chunked:
+        # Long audio: transcribe silence-aligned windows in parallel worker processes
+        on_window = None
+        if on_segments is not None:
+            on_window = lambda batch, lang, fraction: on_segments(speech.remap_segments(batch), lang, fraction)
+        segments, detected = transcribe_chunked(
+            audio, whisper_size, compute_type, language=source_lang,
+            on_window=on_window, profile=profile, counters=counters
+        )
+        segments = speech.remap_segments(segments)
+    else:
+        # segments is a lazy generator: decoding happens as we iterate
+        whisper = registry.whisper(whisper_size, compute_type)
+        lazy_segments, info = decode(whisper, audio, profile, language=source_lang, counters=counters)
+        # faster-whisper's TranscriptionInfo; its language is source_lang when one was given
+        detected = getattr(info, "language", None) or source_lang
+
+        segments = []
+        pending = []
+        for s in lazy_segments:
+            seg = {"start": speech.to_original(s["start"]), "end": speech.to_original(s["end"], end=True),
+                   "text": s["text"]}
+            segments.append(seg)
+            if on_segments is not None:
+                pending.append(seg)
+                if len(pending) >= flush_every:
+                    on_segments(pending, detected, min(1.0, s["end"] / duration))
+                    pending = []
+        if on_segments is not None and pending:
+            on_segments(pending, detected, 1.0)
+
+    counters["redecode_seconds"] = round(counters["redecode_seconds"], 3)
+    if stats is not None:
+        stats["decoding"] = counters
+
+    if key is not None:
+        cache_put(TRANSCRIPTION_LAYER, key, {"segments": segments, "language": detected, "vad": vad_summary,
+                                             "language_id": language_id})
+    return segments, detected
+
+
+def translate_segments(segments, src_lang, tgt_lang, tokenizer, model, media_hash=None, model_options=None,
+                       stats=None):
+    """Translate transcribed segments, reusing a cached translation when possible.
+
+    On a whole-video cache miss, individual lines still come from the
+    translation memory when they were translated before.
+
+    Returns:
+        List of translated texts in the same order as segments
+    """
+    key = None
+    if CACHE_ENABLED and media_hash:
+        key = _translation_key(media_hash, src_lang, tgt_lang, model_options)
+        cached = cache_get(TRANSLATION_LAYER, key)
+        if cached is not None:
+            print("Translation cache hit")
+            return cached
+
+    model_id = translation_model_id(_model_choice(model_options)[2])
+    texts = translate_with_memory([seg["text"] for seg in segments], tokenizer, model, src_lang, tgt_lang,
+                                  model_id, stats)
+
+    if key is not None:
+        cache_put(TRANSLATION_LAYER, key, texts)
+    return texts
+
+
+def _translation_key(media_hash, src_lang, tgt_lang, model_options):
+    whisper_size, compute_type, translation = _model_choice(model_options)
+    return make_key(TRANSLATION_LAYER, media_hash, src_lang, tgt_lang,
+                    whisper_model_id(whisper_size, compute_type, _decoding_choice(model_options)), VAD_ID,
+                    translation_model_id(translation))
+
+
+def _source_hint(source_lang):
+    """Language code for a source_lang option; None for "auto" (identify it from the audio)."""
+    if is_auto(source_lang):
+        return None
+    return LANG_CODES.get(source_lang.lower(), source_lang.lower())
+
+
+def _resolve_source(detected_src, src_hint):
+    # Allow user override
+    if src_hint:
+        detected_src = src_hint
+    if not detected_src:
+        detected_src = "en"
+    return detected_src
+
+
+@scheduler.heavy("transcribe")
+def translate_text(audio_file, target_lang="english", source_lang=None, on_stage=None, media_hash=None,
+                   on_event=None, stats=None, model_options=None, on_cue=None):
     """
     Transcribe audio and translate to the requested target language using M2M100.
 
     Flow:
-      1. Transcribe with Whisper (detects and transcribes in source language)
-      2. If source_language == target_language: return as-is
+      1. Transcribe with Whisper in the source language (identified on a
+         short probe when source_lang is "auto" or missing)
+      2. If source_language == target_language: return as-is, without loading M2M100
       3. Else: use M2M100 to translate source -> target directly
 
     Args:
-        audio_file: Path to audio file
+        audio_file: Path to audio file, or a mono 16 kHz float32 NumPy array
         target_lang: Target language name or code for subtitles
-        source_lang: Optional user-provided source language (will attempt to use if provided)
+        source_lang: Source language name or code; "auto" or None to identify it
+        on_stage: Optional callback notified with "transcribing" / "translating"
+        media_hash: Optional SHA-256 of the uploaded media, used as the result cache key
+        on_event: Optional callback(event, data). When given, subtitles are
+            translated and emitted while Whisper is still running: one "cues"
+            event (a list of cue dicts) per translated batch, interleaved with
+            "progress" events (stage, percent, ETA)
+        stats: Optional dict that receives per-job statistics
+        model_options: Optional per-request overrides: {"whisper": "base",
+            "compute_type": "int8", "translation": "facebook/m2m100_418M"}
+        on_cue: Optional callback receiving each utils.subtitles.Cue as soon
+            as it exists, e.g. a subtitle writer streaming it to disk
+
+    Transcription and translation together hold one resource scheduler slot.
 
     Returns:
-        List of subtitle dictionaries with time and text
+        CueStore with the subtitles (use .to_dicts() for the API shape)
     """
     try:
         # Map language names to codes
         tgt_code = LANG_CODES.get(target_lang.lower(), target_lang.lower())
+        src_hint = _source_hint(source_lang)
 
         print(f"=== Transcription & Translation Pipeline ===")
         print(f"Target language: {target_lang} ({tgt_code})")
 
+        timings = stats.setdefault("timings", {}) if stats is not None else None
+        if on_event is not None:
+            return _translate_streaming(audio_file, tgt_code, src_hint, on_stage, media_hash, on_event, stats,
+                                        model_options, on_cue)
+
         # Transcribe audio (Whisper detects source language)
         print("Transcribing audio with Whisper...")
-        segments, info = whisper.transcribe(audio_file, beam_size=5)
-
-        # Determine detected source language from Whisper
-        detected_src = None
-        if info and isinstance(info, dict):
-            detected_src = info.get("language") or info.get("lang")
-        
-        # Allow user override
-        if source_lang:
-            detected_src = LANG_CODES.get(source_lang.lower(), source_lang.lower())
-        
-        if not detected_src:
-            detected_src = "en"
+        if on_stage is not None:
+            on_stage("transcribing")
+        with span("transcribe", timings):
+            segments, detected_src = transcribe_audio(audio_file, src_hint, media_hash, stats=stats,
+                                                      model_options=model_options)
+        detected_src = _resolve_source(detected_src, src_hint)
 
         print(f"Detected source language: {detected_src}")
 
-        subtitles = []
-
-        # If source == target, no translation needed
-        if detected_src == tgt_code:
-            print(f"Source and target languages match; returning transcription as-is")
-            for segment in segments:
-                start_time = format_timestamp(segment.start)
-                end_time = format_timestamp(segment.end)
-                time_str = f"{start_time} --> {end_time}"
-                subtitles.append({
-                    "time": time_str,
-                    "text": segment.text.strip(),
-                    "start": segment.start,
-                    "end": segment.end
-                })
-            return subtitles
-
-        # Load M2M100 model
-        tokenizer, model = get_m2m_model()
-        if tokenizer is None or model is None:
-            print("ERROR: Failed to load M2M100 model; returning original transcription")
-            for segment in segments:
-                start_time = format_timestamp(segment.start)
-                end_time = format_timestamp(segment.end)
-                time_str = f"{start_time} --> {end_time}"
-                subtitles.append({
-                    "time": time_str,
-                    "text": segment.text.strip(),
-                    "start": segment.start,
-                    "end": segment.end
-                })
-            return subtitles
-
-        # Translate each segment from source -> target
-        print(f"Translating {detected_src} -> {tgt_code}...")
-        for segment in segments:
-            translated_text = translate_segment(segment.text, tokenizer, model, detected_src, tgt_code)
-            start_time = format_timestamp(segment.start)
-            end_time = format_timestamp(segment.end)
-            time_str = f"{start_time} --> {end_time}"
-
-            subtitles.append({
-                "time": time_str,
-                "text": translated_text.strip(),
-                "start": segment.start,
-                "end": segment.end
-            })
+        # If source == target (or nothing was said), no translation needed
+        if detected_src == tgt_code or not segments:
+            print("No translation needed; returning transcription as-is")
+            return _cue_store(segments, [seg["text"] for seg in segments], on_cue)
+
+        if on_stage is not None:
+            on_stage("translating")
+        with span("translate", timings):
+            # Load M2M100 model
+            tokenizer, model = get_m2m_model(_model_choice(model_options)[2])
+            if tokenizer is None or model is None:
+                print("ERROR: Failed to load M2M100 model; returning original transcription")
+                return _cue_store(segments, [seg["text"] for seg in segments], on_cue)
+
+            # Translate each segment from source -> target
+            print(f"Translating {detected_src} -> {tgt_code}...")
+            texts = translate_segments(segments, detected_src, tgt_code, tokenizer, model, media_hash, model_options,
+                                       stats)
+        subtitles = _cue_store(segments, texts, on_cue)
 
         print(f"Translation complete: {len(subtitles)} subtitle(s) generated")
         return subtitles
@@ -186,4 +632,188 @@ def translate_text(audio_file, target_lang="english", source_lang=None):
         print(f"Error in translate_text: {e}")
         import traceback
         traceback.print_exc()
-        raise
\ No newline at end of file
+        raise
+
+
+def _translate_streaming(audio_file, tgt_code, src_hint, on_stage, media_hash, on_event, stats=None,
+                         model_options=None, on_cue=None):
+    """Translate segments as Whisper yields them and emit each cue.
+
+    Segments are buffered until a full translation batch (TRANSLATION_BATCH_SIZE)
+    is available, so translate_batch() still sorts and pads whole batches.
+    """
+    started = time.time()
+    subtitles = CueStore()
+    state = {"src": None, "tokenizer": None, "model": None, "last_progress": 0.0, "translate_seconds": 0.0,
+             "buffer": [], "translating": False}
+
+    def progress(stage, fraction):
+        now = time.time()
+        if fraction < 1.0 and now - state["last_progress"] < STREAM_PROGRESS_INTERVAL:
+            return
+        state["last_progress"] = now
+        elapsed = now - started
+        eta = elapsed / fraction * (1.0 - fraction) if fraction > 0 else None
+        on_event("progress", {
+            "stage": stage,
+            "percent": round(fraction * 100, 1),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+        })
+
+    def emit(batch, texts):
+        cues = []
+        for seg, text in zip(batch, texts):
+            cue = subtitles.append(seg["start"], seg["end"], text)
+            if on_cue is not None:
+                on_cue(cue)
+            cues.append(dict(cue.to_dict(), index=len(subtitles)))
+        if cues:
+            on_event("cues", cues)
+
+    def translate(batch, final):
+        src = state["src"]
+        texts = [seg["text"] for seg in batch]
+        translate_started = time.perf_counter()
+        if state["model"] is None:
+            state["tokenizer"], state["model"] = get_m2m_model(_model_choice(model_options)[2])
+        if state["model"] is not None:
+            if not state["translating"]:
+                state["translating"] = True
+                if on_stage is not None:
+                    on_stage("translating")
+            if final and not subtitles:
+                # Whole transcript at once (e.g. a transcription cache hit): try the translation cache
+                texts = translate_segments(batch, src, tgt_code, state["tokenizer"], state["model"], media_hash,
+                                           model_options, stats)
+            else:
+                texts = translate_with_memory(texts, state["tokenizer"], state["model"], src, tgt_code,
+                                              translation_model_id(_model_choice(model_options)[2]), stats)
+        state["translate_seconds"] += time.perf_counter() - translate_started
+        emit(batch, texts)
+
+    def handle(batch, detected, fraction):
+        if state["src"] is None:
+            state["src"] = _resolve_source(detected, src_hint)
+            print(f"Detected source language: {state['src']}")
+        if state["src"] == tgt_code:
+            emit(batch, [seg["text"] for seg in batch])
+            progress("transcribing", fraction)
+            return
+        state["buffer"].extend(batch)
+        if state["buffer"] and (len(state["buffer"]) >= TRANSLATION_BATCH_SIZE or fraction >= 1.0):
+            ready, state["buffer"] = state["buffer"], []
+            translate(ready, fraction >= 1.0)
+        progress("translating", fraction)
+
+    print("Transcribing audio with Whisper (streaming)...")
+    if on_stage is not None:
+        on_stage("transcribing")
+    progress("transcribing", 0.0)
+    timings = stats.setdefault("timings", {}) if stats is not None else None
+    # Translation runs inside Whisper's callback; split the wall time between the two
+    whisper_started = time.perf_counter()
+    status = "error"
+    try:
+        segments, _ = transcribe_audio(audio_file, src_hint, media_hash, on_segments=handle, stats=stats,
+                                       model_options=model_options)
+        if state["buffer"]:
+            ready, state["buffer"] = state["buffer"], []
+            translate(ready, True)
+            progress("translating", 1.0)
+        status = "ok"
+    finally:
+        elapsed = time.perf_counter() - whisper_started
+        record_stage("transcribe", max(0.0, elapsed - state["translate_seconds"]), timings, status)
+        if state["translate_seconds"]:
+            record_stage("translate", state["translate_seconds"], timings)
+
+    src = state["src"] or _resolve_source(None, src_hint)
+    if CACHE_ENABLED and media_hash and src != tgt_code and state["model"] is not None:
+        key = _translation_key(media_hash, src, tgt_code, model_options)
+        cache_put(TRANSLATION_LAYER, key, subtitles.texts())
+
+    print(f"Streaming translation complete: {len(subtitles)} subtitle(s) generated")
+    return subtitles
+
+
+@scheduler.heavy("transcribe")
+def translate_text_multi(audio_file, target_langs, source_lang=None, on_stage=None, media_hash=None,
+                         on_event=None, stats=None, model_options=None):
+    """Transcribe once and translate into several target languages.
+
+    Targets whose whole-video translation is cached are reused; the rest go
+    through the translation memory and translate_batch_multi(), which shares
+    each batch's encoder pass across targets.
+
+    Args:
+        audio_file: Path to audio file, or a mono 16 kHz float32 NumPy array
+        target_langs: List of target language names or codes
+        source_lang: Source language name or code; "auto" or None to identify it
+        on_stage, media_hash, stats, model_options: As for translate_text
+        on_event: Optional callback(event, data); receives one "cues" event
+            per target once it is done (cue dicts tagged with "language"),
+            plus "progress"
+
+    Returns:
+        Dict {language code: CueStore}, in target_langs order
+    """
+    tgt_codes = list(dict.fromkeys(LANG_CODES.get(l.lower(), l.lower()) for l in target_langs))
+    src_hint = _source_hint(source_lang)
+    timings = stats.setdefault("timings", {}) if stats is not None else None
+    print(f"=== Multi-target pipeline: {', '.join(tgt_codes)} ===")
+
+    if on_stage is not None:
+        on_stage("transcribing")
+    with span("transcribe", timings):
+        segments, detected_src = transcribe_audio(audio_file, src_hint, media_hash, stats=stats,
+                                                  model_options=model_options)
+    src = _resolve_source(detected_src, src_hint)
+    print(f"Detected source language: {src}")
+    texts = [seg["text"] for seg in segments]
+
+    translated = {}
+    pending = []
+    for code in tgt_codes:
+        if code == src:
+            translated[code] = texts
+            continue
+        if CACHE_ENABLED and media_hash:
+            cached = cache_get(TRANSLATION_LAYER, _translation_key(media_hash, src, code, model_options))
+            if cached is not None:
+                translated[code] = cached
+                continue
+        pending.append(code)
+
+    if pending and segments:
+        if on_stage is not None:
+            on_stage("translating")
+        with span("translate", timings):
+            translation = _model_choice(model_options)[2]
+            tokenizer, model = get_m2m_model(translation)
+            if model is None:
+                print("ERROR: Failed to load M2M100 model; returning original transcription")
+                for code in pending:
+                    translated[code] = texts
+            else:
+                print(f"Translating {src} -> {', '.join(pending)}...")
+                results = translate_with_memory_multi(texts, tokenizer, model, src, pending,
+                                                      translation_model_id(translation), stats)
+                for code in pending:
+                    translated[code] = results[code]
+                    if CACHE_ENABLED and media_hash:
+                        cache_put(TRANSLATION_LAYER, _translation_key(media_hash, src, code, model_options),
+                                  results[code])
+    for code in pending:
+        translated.setdefault(code, texts)
+
+    tracks = {}
+    for n, code in enumerate(tgt_codes):
+        subs = _cue_store(segments, translated[code])
+        tracks[code] = subs
+        if on_event is not None:
+            if len(subs):
+                on_event("cues", [dict(cue.to_dict(), index=i + 1, language=code) for i, cue in enumerate(subs)])
+            on_event("progress", {"stage": "translating", "percent": round((n + 1) / len(tgt_codes) * 100, 1),
+                                  "eta_seconds": None, "language": code})
+    print(f"Multi-target translation complete: {len(segments)} segment(s) x {len(tgt_codes)} language(s)")
+    return tracks
@@ -0,0 +1,183 @@
+"""Translation backends for M2M100.
+
+Every backend is loaded through utils.models.registry.translation() as a
+(tokenizer, model) pair. The "torch" backend returns the Hugging Face model
+and utils.translate drives model.generate() itself. Any other backend returns
+an object with a `backend` name and these methods, which utils.translate
+calls instead:
+
+    translate_batch(texts, tokenizer, src_lang, tgt_lang, batch_size, max_batch_tokens)
+        -> list of translations in the original order
+    translate_batch_multi(texts, tokenizer, src_lang, tgt_langs, need, batch_size, max_batch_tokens)
+        -> {tgt: list of translations}
+    memory_bytes() -> approximate model size, shown by /models
+
+Converting a cached Hugging Face model for the "ctranslate2" backend (offline,
+reads HF_HOME):
+
+    python -m utils.translation_backends convert --model facebook/m2m100_418M --quantization int8
+"""
+import argparse
+import os
+import sys
+from importlib import metadata
+from utils.config import CT2_MODEL_DIR, CT2_COMPUTE_TYPE, CT2_BEAM_SIZE, CT2_THREADS
+
+
+def ct2_model_dir(name, quantization=CT2_COMPUTE_TYPE):
+    """Where the converted copy of a Hugging Face model lives, e.g. models/ct2/facebook--m2m100_418M-int8."""
+    return os.path.join(CT2_MODEL_DIR, f"{name.replace('/', '--')}-{quantization}")
+
+
+def ct2_model_id(name, quantization=CT2_COMPUTE_TYPE):
+    """Model identity for cache keys: converted outputs differ from the PyTorch ones."""
+    try:
+        version = metadata.version("ctranslate2")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    return f"{name}@ctranslate2-{version}-{quantization}"
+
+
+class CTranslate2M2M100:
+    """M2M100 converted to CTranslate2, running int8 on CPU.
+
+    CTranslate2 batches by token count and sorts by length internally, so
+    max_batch_tokens maps to its "tokens" batch type. It cannot reuse encoder
+    output between calls, so several targets are decoded one call each. A
+    failed call is retried one segment at a time, like translate_batch(), so
+    only the failing segment keeps its original text.
+    """
+
+    backend = "ctranslate2"
+
+    def __init__(self, model_dir, compute_type=CT2_COMPUTE_TYPE, threads=CT2_THREADS, beam_size=CT2_BEAM_SIZE):
+        import ctranslate2
+        from utils.resources import scheduler
+        threads = threads or scheduler.stage_threads()
+        self.model_dir = model_dir
+        self.beam_size = beam_size
+        self.translator = ctranslate2.Translator(model_dir, device="cpu", compute_type=compute_type,
+                                                 inter_threads=1, intra_threads=threads)
+
+    def memory_bytes(self):
+        try:
+            return os.path.getsize(os.path.join(self.model_dir, "model.bin"))
+        except OSError:
+            return None
+
+    def translate_batch(self, texts, tokenizer, src_lang, tgt_lang, batch_size=None, max_batch_tokens=None):
+        return self.translate_batch_multi(texts, tokenizer, src_lang, [tgt_lang], None, batch_size,
+                                          max_batch_tokens)[tgt_lang]
+
+    def translate_batch_multi(self, texts, tokenizer, src_lang, tgt_langs, need=None, batch_size=None,
+                              max_batch_tokens=None):
+        results = {tgt: list(texts) for tgt in tgt_langs}
+        todo = [i for i, t in enumerate(texts) if t and t.strip()]
+        if not todo:
+            return results
+
+        tokenizer.src_lang = src_lang
+        tokens = {i: tokenizer.convert_ids_to_tokens(tokenizer.encode(texts[i], truncation=True, max_length=1024))
+                  for i in todo}
+        options = {"beam_size": self.beam_size, "max_decoding_length": 1024}
+        if max_batch_tokens:
+            options.update(max_batch_size=max_batch_tokens, batch_type="tokens")
+        elif batch_size:
+            options["max_batch_size"] = batch_size
+
+        for tgt in tgt_langs:
+            rows = [i for i in todo if need is None or i in need.get(tgt, ())]
+            if not rows:
+                continue
+            try:
+                prefix = tokenizer.get_lang_token(tgt)
+            except Exception:
+                print(f"Warning: Target language '{tgt}' not found in M2M100; will use default decoding")
+                prefix = None
+            try:
+                output = self._translate_rows([tokens[i] for i in rows], prefix, options)
+            except Exception as e:
+                print(f"CTranslate2 translation error ({src_lang}->{tgt}): {e}; "
+                      f"retrying {len(rows)} segment(s) individually")
+                output = []
+                for i in rows:
+                    try:
+                        output.extend(self._translate_rows([tokens[i]], prefix, options))
+                    except Exception as e:
+                        print(f"CTranslate2 translation error ({src_lang}->{tgt}): {e}")
+                        output.append(None)
+            for i, hypothesis in zip(rows, output):
+                if hypothesis is not None:
+                    results[tgt][i] = tokenizer.decode(tokenizer.convert_tokens_to_ids(hypothesis),
+                                                       skip_special_tokens=True)
+        return results
+
+    def _translate_rows(self, rows, prefix, options):
+        """Translate tokenized rows; returns the best hypothesis of each without the language token."""
+        output = self.translator.translate_batch(rows, target_prefix=[[prefix]] * len(rows) if prefix else None,
+                                                 **options)
+        hypotheses = []
+        for result in output:
+            hypothesis = result.hypotheses[0]
+            if prefix and hypothesis[:1] == [prefix]:
+                hypothesis = hypothesis[1:]
+            hypotheses.append(hypothesis)
+        return hypotheses
+
+
+def load_ctranslate2(name, compute_type=CT2_COMPUTE_TYPE):
+    """Load a converted model and the tokenizer saved next to it."""
+    from transformers import M2M100Tokenizer
+    model_dir = ct2_model_dir(name, compute_type)
+    if not os.path.exists(os.path.join(model_dir, "model.bin")):
+        raise FileNotFoundError(
+            f"No CTranslate2 model at {model_dir}; run "
+            f"`python -m utils.translation_backends convert --model {name} --quantization {compute_type}`"
+        )
+    print(f"Loading translation model '{name}' (CTranslate2 {compute_type})...")
+    tokenizer = M2M100Tokenizer.from_pretrained(model_dir)
+    return tokenizer, CTranslate2M2M100(model_dir, compute_type)
+
+
+def convert_m2m100(name, quantization=CT2_COMPUTE_TYPE, output_dir=None, force=False):
+    """Convert a Hugging Face M2M100 checkpoint to CTranslate2 and save its tokenizer alongside.
+
+    Args:
+        name: Hub name or local path of the checkpoint
+        quantization: CTranslate2 weight type (int8, int8_float32, float32, ...)
+        output_dir: Destination (default ct2_model_dir(name, quantization))
+        force: Overwrite an existing conversion
+
+    Returns:
+        The output directory
+    """
+    from ctranslate2.converters import TransformersConverter
+    from transformers import M2M100Tokenizer
+    output_dir = output_dir or ct2_model_dir(name, quantization)
+    print(f"Converting {name} -> {output_dir} ({quantization})...")
+    TransformersConverter(name, low_cpu_mem_usage=True).convert(output_dir, quantization=quantization, force=force)
+    M2M100Tokenizer.from_pretrained(name).save_pretrained(output_dir)
+    return output_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage translation backend models")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert = sub.add_parser("convert", help="convert a cached Hugging Face M2M100 model to CTranslate2")
+    convert.add_argument("--model", default=os.getenv("TRANSLATION_MODEL", "facebook/m2m100_418M"))
+    convert.add_argument("--quantization", default=CT2_COMPUTE_TYPE)
+    convert.add_argument("--output", help="output directory (default under CT2_MODEL_DIR)")
+    convert.add_argument("--force", action="store_true", help="overwrite an existing conversion")
+    convert.add_argument("--online", action="store_true", help="allow downloading from the Hugging Face Hub")
+    args = parser.parse_args(argv)
+
+    if not args.online:
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+    path = convert_m2m100(args.model, args.quantization, args.output, args.force)
+    print(f"Done. Set TRANSLATION_BACKEND=ctranslate2 (CT2_MODEL_DIR={CT2_MODEL_DIR}) to use {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import asyncio
+import hashlib
+import os
+from utils.config import UPLOAD_CHUNK_SIZE, MAX_UPLOAD_BYTES
+from utils import metrics
+
+
+class UploadError(Exception):
+    """Raised when an upload is rejected; carries the HTTP status to return."""
+
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+async def iter_upload_file(upload, chunk_size=UPLOAD_CHUNK_SIZE):
+    """Yield an UploadFile's contents in fixed-size chunks."""
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def save_stream(chunks, dest_path, max_bytes=MAX_UPLOAD_BYTES, tee=None):
+    """Copy an async stream of byte chunks to disk without buffering it in memory.
+
+    Args:
+        chunks: Async iterator of bytes (UploadFile chunks or request.stream())
+        dest_path: File to write
+        max_bytes: Reject the upload once it grows past this many bytes
+        tee: Optional object with write(chunk), e.g. a PipeExtraction, fed every chunk
+
+    Returns:
+        Dict with the saved path, size in bytes and SHA-256 hex digest
+
+    Raises:
+        UploadError: 413 when too large, 400 when empty. The partial file is removed.
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    try:
+        with open(dest_path, "wb") as f:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadError(413, f"File exceeds the {max_bytes // (1024 * 1024)}MB upload limit")
+                sha256.update(chunk)
+                # Disk and pipe writes can block; keep them off the event loop
+                await asyncio.to_thread(f.write, chunk)
+                if tee is not None:
+                    await asyncio.to_thread(tee.write, chunk)
+        if size == 0:
+            raise UploadError(400, "File is empty")
+    except BaseException:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+    metrics.inc("upload_bytes_total", size)
+    return {"path": dest_path, "size": size, "sha256": sha256.hexdigest()}
+
+
+async def save_upload(upload, dest_path, max_bytes=MAX_UPLOAD_BYTES):
+    """Stream a FastAPI UploadFile to dest_path in chunks. See save_stream()."""
+    return await save_stream(iter_upload_file(upload), dest_path, max_bytes=max_bytes)
@@ -0,0 +1,139 @@
+import bisect
+import numpy as np
+from utils.audio import SAMPLE_RATE
+from utils.config import (
+    VAD_MODE, VAD_THRESHOLD, VAD_ENERGY_THRESHOLD_DB,
+    VAD_MIN_SPEECH_MS, VAD_MIN_SILENCE_MS, VAD_SPEECH_PAD_MS,
+)
+
+ENERGY_FRAME_SECONDS = 0.03
+
+# Identifies the VAD settings in transcription cache keys
+VAD_ID = f"vad-{VAD_MODE}-{VAD_THRESHOLD}-{VAD_ENERGY_THRESHOLD_DB}-{VAD_MIN_SPEECH_MS}-{VAD_MIN_SILENCE_MS}-{VAD_SPEECH_PAD_MS}"
+
+
+def _silero_regions(audio):
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+    options = VadOptions(
+        threshold=VAD_THRESHOLD,
+        min_speech_duration_ms=VAD_MIN_SPEECH_MS,
+        min_silence_duration_ms=VAD_MIN_SILENCE_MS,
+        speech_pad_ms=VAD_SPEECH_PAD_MS,
+    )
+    return [(ts["start"], ts["end"]) for ts in get_speech_timestamps(audio, options)]
+
+
+def _energy_regions(audio):
+    frame = int(ENERGY_FRAME_SECONDS * SAMPLE_RATE)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return []
+    rms = np.sqrt(np.mean(audio[:n_frames * frame].reshape(n_frames, frame) ** 2, axis=1))
+    db = 20 * np.log10(np.maximum(rms, 1e-10))
+    voiced = db > VAD_ENERGY_THRESHOLD_DB
+
+    regions = []
+    start = None
+    for i, v in enumerate(voiced):
+        if v and start is None:
+            start = i
+        elif not v and start is not None:
+            regions.append([start * frame, i * frame])
+            start = None
+    if start is not None:
+        regions.append([start * frame, n_frames * frame])
+
+    # Bridge short pauses, drop blips, then pad like the Silero path does
+    min_silence = VAD_MIN_SILENCE_MS * SAMPLE_RATE // 1000
+    min_speech = VAD_MIN_SPEECH_MS * SAMPLE_RATE // 1000
+    pad = VAD_SPEECH_PAD_MS * SAMPLE_RATE // 1000
+    merged = []
+    for r in regions:
+        if merged and r[0] - merged[-1][1] < min_silence:
+            merged[-1][1] = r[1]
+        else:
+            merged.append(r)
+    padded = []
+    for s, e in merged:
+        if e - s < min_speech:
+            continue
+        s, e = max(0, s - pad), min(len(audio), e + pad)
+        if padded and s <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], e)
+        else:
+            padded.append((s, e))
+    return padded
+
+
+def detect_speech(audio, mode=VAD_MODE):
+    """Return speech regions as (start_sample, end_sample) pairs.
+
+    With mode "off" the whole clip is one region.
+    """
+    if mode == "off" or len(audio) == 0:
+        return [(0, len(audio))]
+    if mode == "energy":
+        return _energy_regions(audio)
+    return _silero_regions(audio)
+
+
+class SpeechMap:
+    """Concatenated speech-only audio plus the mapping back to original timestamps."""
+
+    def __init__(self, audio, regions):
+        self.regions = regions
+        if len(regions) == 1 and regions[0] == (0, len(audio)):
+            # Nothing to skip: keep the original array instead of copying it
+            self.audio = audio
+        else:
+            self.audio = np.concatenate([audio[s:e] for s, e in regions]) if regions else audio[:0]
+        # Start of every region on the compressed timeline, in seconds
+        self._compressed_starts = []
+        total = 0
+        for s, e in regions:
+            self._compressed_starts.append(total / SAMPLE_RATE)
+            total += e - s
+        self.total_seconds = len(audio) / SAMPLE_RATE
+        self.speech_seconds = total / SAMPLE_RATE
+        self.skipped_seconds = self.total_seconds - self.speech_seconds
+
+    def summary(self):
+        return {
+            "total_seconds": round(self.total_seconds, 2),
+            "speech_seconds": round(self.speech_seconds, 2),
+            "skipped_seconds": round(self.skipped_seconds, 2),
+        }
+
+    def to_original(self, t, end=False):
+        """Map a time on the speech-only timeline to the original audio timeline.
+
+        A region boundary belongs to the next region for start times and to
+        the previous one for end times (end=True), so a cue ending exactly at
+        a boundary does not stretch over the silence VAD removed.
+        """
+        if not self.regions:
+            return t
+        find = bisect.bisect_left if end else bisect.bisect_right
+        i = max(0, find(self._compressed_starts, t) - 1)
+        return self.regions[i][0] / SAMPLE_RATE + (t - self._compressed_starts[i])
+
+    def remap_segments(self, segments):
+        """Return copies of segments (and their words) with original timestamps."""
+        out = []
+        for seg in segments:
+            new = dict(seg, start=self.to_original(seg["start"]), end=self.to_original(seg["end"], end=True))
+            if seg.get("words"):
+                new["words"] = [dict(w, start=self.to_original(w["start"]),
+                                     end=self.to_original(w["end"], end=True))
+                                for w in seg["words"]]
+            out.append(new)
+        return out
+
+
+def speech_only(audio, mode=VAD_MODE):
+    """Run VAD over audio and return a SpeechMap of the detected speech."""
+    regions = detect_speech(audio, mode)
+    speech = SpeechMap(audio, regions)
+    print(f"VAD ({mode}): {speech.speech_seconds:.1f}s speech, skipped {speech.skipped_seconds:.1f}s "
+          f"of {speech.total_seconds:.1f}s")
+    return speech
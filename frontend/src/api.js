@@ -44,6 +44,39 @@ export const uploadVideo = async (videoFile, language, burn = false, token = nul
   return res.json();
 };
 
+// ---------------- JOBS --------------------
+
+// Queue a video for background processing; resolves to { job_id, status }
+export const submitJob = async (videoFile, language, burn = false, token = null, burnMode = null) => {
+  const formData = new FormData();
+  formData.append("video", videoFile);
+  formData.append("language", language);
+  formData.append("burn", burn ? "true" : "false");
+  // "soft" (subtitle track, no re-encode), "hard" or "parallel"
+  if (burnMode) formData.append("burn_mode", burnMode);
+
+  const headers = {};
+  if (token) headers["Authorization"] = `Bearer ${token}`;
+
+  const res = await fetch(`${API_BASE}/jobs`, {
+    method: "POST",
+    body: formData,
+    headers,
+  });
+
+  if (!res.ok) {
+    const errorData = await res.json().catch(() => ({}));
+    throw new Error(errorData.detail || `Server error: ${res.status}`);
+  }
+  return res.json();
+};
+
+// Server-Sent Events stream with "stage", "progress", "cue", "done" and "failed" events
+export const jobEventsUrl = (jobId) => `${API_BASE}/jobs/${encodeURIComponent(jobId)}/events`;
+
+// Current state of a job; results are included once status is "done"
+export const getJob = (jobId) => request(`/jobs/${encodeURIComponent(jobId)}`);
+
 // ---------------- AUTH --------------------
 
 export const register = async (email, password) => {
@@ -1,11 +1,12 @@
 // src/pages/VideoUploader.js
-import React, { useState, useRef, useContext } from "react";
+import React, { useState, useRef, useContext, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
-import { uploadVideo } from "../api";
+import { submitJob, jobEventsUrl, getJob } from "../api";
 import API_BASE from "../api";
 import { AuthContext } from "../AuthContext";
 
 const MAX_FILE_SIZE = 500 * 1024 * 1024; // 500MB
+const JOB_POLL_MS = 2000; // status polling when the event stream drops
 const ALLOWED_VIDEO_TYPES = [
   "video/mp4",
   "video/mpeg",
@@ -24,9 +25,13 @@ const VideoUploader = () => {
   const [srtFilename, setSrtFilename] = useState("");
   const [burnedFilename, setBurnedFilename] = useState("");
   const [burn, setBurn] = useState(false);
+  const [burnMode, setBurnMode] = useState("hard");
   const [dragOver, setDragOver] = useState(false);
   const fileInputRef = useRef(null);
   const [remainingUploads, setRemainingUploads] = useState(null);
+  const [progress, setProgress] = useState(null);
+  const eventSourceRef = useRef(null);
+  const pollTimerRef = useRef(null);
   
   const { user, token, logout } = useContext(AuthContext);
   const navigate = useNavigate();
@@ -37,6 +42,13 @@ const VideoUploader = () => {
     "Korean","Russian","Arabic","Italian","Dutch","Polish","Turkish","Vietnamese","Thai",
   ];
 
+  // Close any open progress stream and stop polling when leaving the page
+  useEffect(() => () => {
+    eventSourceRef.current?.close();
+    eventSourceRef.current = null;
+    clearTimeout(pollTimerRef.current);
+  }, []);
+
   const validateFile = (file) => {
     if (!file) { setError("Please select a video file."); return false; }
     if (!ALLOWED_VIDEO_TYPES.includes(file.type)) {
@@ -67,12 +79,25 @@ const VideoUploader = () => {
   const handleUpload = async () => {
     if (!videoFile) { setError("Please select a video file."); return; }
     setLoading(true); setError(""); setSuccess("");
+    setSubtitles([]); setSrtFilename(""); setBurnedFilename(""); setProgress(null);
+    eventSourceRef.current?.close();
+    clearTimeout(pollTimerRef.current);
 
     try {
-      const response = await uploadVideo(videoFile, language.toLowerCase(), burn, token);
+      // The upload returns as soon as the job is queued; results arrive over SSE
+      const { job_id } = await submitJob(videoFile, language.toLowerCase(), burn, token, burnMode);
+      const source = new EventSource(jobEventsUrl(job_id));
+      eventSourceRef.current = source;
+
+      const finish = () => {
+        source.close();
+        clearTimeout(pollTimerRef.current);
+        setLoading(false);
+        setProgress(null);
+      };
 
-      if (response && response.subtitles && Array.isArray(response.subtitles)) {
-        setSubtitles(response.subtitles);
+      const showResult = (response) => {
+        if (Array.isArray(response.subtitles)) setSubtitles(response.subtitles);
         setSuccess("Subtitles generated successfully!");
         if (response.remaining_uploads !== undefined) {
           setRemainingUploads(response.remaining_uploads);
@@ -80,12 +105,58 @@ const VideoUploader = () => {
         if (response.srt_file) setSrtFilename(response.srt_file);
         if (response.burned_video) setBurnedFilename(response.burned_video);
         if (response.burn_error) setError(`Burn error: ${response.burn_error}`);
-      } else {
-        setError("Unexpected response format from server.");
-      }
+      };
+
+      // Fallback when the event stream fails: poll the job until it finishes
+      const poll = async () => {
+        try {
+          const job = await getJob(job_id);
+          // A newer upload (or leaving the page) replaced this job's stream
+          if (eventSourceRef.current !== source) return;
+          if (job.status === "done") {
+            showResult(job);
+            finish();
+          } else if (job.status === "failed") {
+            setError(job.error || "Failed to process video. Please try again.");
+            finish();
+          } else {
+            setProgress((prev) => ({ ...prev, stage: job.status }));
+            pollTimerRef.current = setTimeout(poll, JOB_POLL_MS);
+          }
+        } catch (err) {
+          if (eventSourceRef.current !== source) return;
+          setError(err.status === 404
+            ? "This job no longer exists. Please upload the video again."
+            : `Lost connection to the server: ${err.message}`);
+          finish();
+        }
+      };
+
+      source.addEventListener("stage", (e) => {
+        const data = JSON.parse(e.data);
+        setProgress((prev) => ({ ...prev, stage: data.stage }));
+      });
+      source.addEventListener("progress", (e) => setProgress(JSON.parse(e.data)));
+      source.addEventListener("cue", (e) => {
+        const cue = JSON.parse(e.data);
+        setSubtitles((prev) => [...prev, cue]);
+      });
+      source.addEventListener("done", (e) => {
+        showResult(JSON.parse(e.data) || {});
+        finish();
+      });
+      source.addEventListener("failed", (e) => {
+        const data = JSON.parse(e.data) || {};
+        setError(data.error || "Failed to process video. Please try again.");
+        finish();
+      });
+      // Dropped connection or an error response: stop the browser's reconnect loop
+      source.onerror = () => {
+        source.close();
+        poll();
+      };
     } catch (err) {
       setError(err?.message || "Failed to process video. Please try again.");
-    } finally {
       setLoading(false);
     }
   };
@@ -136,6 +207,17 @@ const VideoUploader = () => {
             <span style={{ fontSize: "0.95em" }}>Burn subtitles into video</span>
           </label>
 
+          {burn && (
+            <div style={{ marginBottom: 12 }}>
+              <label htmlFor="burn-mode-select" style={{ display: "block", marginBottom: 4, fontSize: "0.9em", fontWeight: 500 }}>Subtitle Output</label>
+              <select id="burn-mode-select" className="language-select" value={burnMode} onChange={(e) => setBurnMode(e.target.value)} aria-label="Select subtitle output mode">
+                <option value="soft">Subtitle track (fastest, no re-encode)</option>
+                <option value="hard">Burned into picture</option>
+                <option value="parallel">Burned into picture (parallel, for long videos)</option>
+              </select>
+            </div>
+          )}
+
           <button className="btn" onClick={handleUpload} disabled={loading || !videoFile} aria-busy={loading} aria-label={loading ? "Processing video..." : "Generate Subtitles"}>{loading ? "Processing..." : "Generate Subtitles"}</button>
         </div>
 
@@ -168,7 +250,11 @@ const VideoUploader = () => {
         {loading && (
           <div className="loading active">
             <div className="spinner" aria-label="Loading" />
-            <p>Processing your video...</p>
+            <p>
+              {progress?.stage ? `${progress.stage.charAt(0).toUpperCase()}${progress.stage.slice(1)}` : "Processing your video"}
+              {progress?.percent !== undefined && progress?.percent !== null ? ` ${Math.round(progress.percent)}%` : "..."}
+              {progress?.eta_seconds ? ` (about ${Math.ceil(progress.eta_seconds)}s left)` : ""}
+            </p>
           </div>
         )}
       </div>